@@ -1,6 +1,31 @@
+import os
+
+# ===== MODO DE SERVICIO =====
+# MODO_SERVIDOR=gevent: cada peticion es un greenlet y los sockets de boto3, urllib3 y PyMySQL
+# pasan a ser cooperativos, asi un proceso mantiene cientos de llamadas a S3/SNS/DynamoDB en vuelo.
+# Se lee directo del entorno porque el parche debe aplicarse antes de cualquier otro import.
+MODO_SERVIDOR = os.environ.get('MODO_SERVIDOR', 'sync')
+
+if MODO_SERVIDOR == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
+    # El pool HTTP de botocore debe alcanzar para todas las conexiones concurrentes
+    os.environ.setdefault('AWS_MAX_POOL_CONNECTIONS', os.environ.get('GEVENT_CONEXIONES', '1000'))
+
 from app import app
+import metricas  # /metrics e instrumentacion de peticiones, SQL y AWS
+import perfilado  # perfilado opcional por peticion (X-Perfilar con PERFILADO_TOKEN)
 from controllers.api_route_alumnos import *
 from controllers.api_route_profesores import *
+from config import GEVENT_CONEXIONES
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
+    if MODO_SERVIDOR == 'gevent':
+        from gevent.pool import Pool
+        from gevent.pywsgi import WSGIServer
+
+        print(f"Servidor gevent : hasta {GEVENT_CONEXIONES} peticiones concurrentes")
+        WSGIServer(('0.0.0.0', 5000), app, spawn=Pool(GEVENT_CONEXIONES)).serve_forever()
+    else:
+        app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -1,7 +1,11 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_migrate import Migrate
+from sqlalchemy.exc import IntegrityError
+import json
 import os
+from config import MODO_SERVIDOR, GEVENT_CONEXIONES, DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
 
 app = Flask(__name__)
 
@@ -17,145 +21,157 @@ if os.environ.get('ENV') == 'production':
     
     DATABASE_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}'
     
+    # Replica de lectura opcional (mismas credenciales que el primario)
+    DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+    DATABASE_REPLICA_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_REPLICA_HOST}:{DB_PORT}/{DB_NAME}' if DB_REPLICA_HOST else None
+    
 else:
     # ===== CONFIGURACION SQLITE (LOCAL/DEV) =====
     basedir = os.path.abspath(os.path.dirname(__file__))
-    DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'alumnos_profesores.db')
+    DATABASE_URI = os.environ.get('DATABASE_URI') or 'sqlite:///' + os.path.join(basedir, 'alumnos_profesores.db')
+    DATABASE_REPLICA_URI = None
+
+DATABASE_REPLICA_URI = os.environ.get('DATABASE_REPLICA_URI') or DATABASE_REPLICA_URI
 
 # CONFIGURACION Flask
 app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URI
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# ===== POOL DE CONEXIONES =====
+# Tamaños y tiempos en config.py. Solo para servidores: SQLite usa su propio pool (SingletonThreadPool/StaticPool en memoria)
+if not DATABASE_URI.startswith('sqlite'):
+    # Con gevent el pool sigue acotado: los greenlets que no alcanzan conexion esperan hasta pool_timeout
+    if MODO_SERVIDOR == 'gevent' and DB_POOL_SIZE + DB_MAX_OVERFLOW < GEVENT_CONEXIONES:
+        print(f"Pool de {DB_POOL_SIZE + DB_MAX_OVERFLOW} conexiones para {GEVENT_CONEXIONES} peticiones en vuelo : las que usen la base esperan hasta DB_POOL_TIMEOUT")
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING
+    }
+
+if DATABASE_REPLICA_URI:
+    app.config['SQLALCHEMY_BINDS'] = {'replica': DATABASE_REPLICA_URI}
+
 print(f"Conexion a la base de datos : {DATABASE_URI.split('@')[-1] if '@' in DATABASE_URI else 'SQLite local'}")
 
-db = SQLAlchemy(app)
+class SessionEnrutada(Session):
+
+    # Las lecturas de peticiones GET van a la replica; escrituras y flush al primario
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+
+        if bind is None and not self._flushing and has_request_context() and g.get('usar_replica'):
+            engine = self._db.engines.get('replica')
+            if engine is not None:
+                return engine
+
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(app, session_options={'class_': SessionEnrutada})
+
+def en_primario():
+    # bind_arguments para leer del primario aunque la peticion sea GET: lo que se guarda en una
+    # cache compartida no debe venir de una replica atrasada
+    return {'bind': db.engine}
 migrate = Migrate(app, db)
 
 labeles_alumnos = ["id", "nombres", "apellidos", "matricula", "promedio"]
 labeles_profesores = ["id", "nombres", "apellidos", "numeroEmpleado", "horasClase"]
 
 #VALIDACIONES
-def validar_id(id):
-    try:
-        id = int(id)
-        if id > 0:
-            return id
-        return None
-    except (ValueError, TypeError):
-        return None
-
-def validar_matricula(matricula):
-    if not isinstance(matricula, str):
-        return None
-    matricula = matricula.strip()
-    if not matricula:
-        return None
-    if not matricula.startswith('A'):
-        return None
-    if not matricula[1:].isdigit():
-        return None
-    return matricula
-
-def validar_nombre(nombre):
-    if not isinstance(nombre, str):
-        return None
-    nombre = nombre.strip()
-    if not nombre:
-        return None
-    for ch in nombre:
-        if not (ch.isalpha() or ch in " -'"):
-            return None
-    return nombre
-
-def validar_promedio(promedio):
-    try:
-        promedio = float(promedio)
-        if 0 <= promedio <= 100:
-            return promedio
-        return None
-    except (ValueError, TypeError):
-        return None
-
-def validar_horas(horas):
-    try:
-        horas = int(horas)
-        if horas > 0:
-            return horas
-        return None
-    except (ValueError, TypeError):
-        return None
+# Los validadores viven en validacion.py; se reexportan aqui porque el resto del codigo los importa de app
+from validacion import validar_id, validar_matricula, validar_nombre, validar_promedio, validar_horas, ESQUEMA_ALUMNO, ESQUEMA_PROFESOR
 
 def validar_alumno_payload(payload):
-    errors = {}
-    
-    # if "id" not in payload:
-    #     errors["id"] = "ID requerido."
-    # else:
-    #     id_validado = validar_id(payload.get("id"))
-    #     if id_validado is None:
-    #         errors["id"] = "ID inválido."
-    
-    if "nombres" in payload:
-        nombres = validar_nombre(payload.get("nombres"))
-        if nombres is None:
-            errors["nombres"] = "Nombre inválido."
-    
-    if "apellidos" in payload:
-        apellidos = validar_nombre(payload.get("apellidos"))
-        if apellidos is None:
-            errors["apellidos"] = "Apellido inválido."
-    
-    if "matricula" in payload:
-        matricula = validar_matricula(payload.get("matricula"))
-        if matricula is None:
-            errors["matricula"] = "Matrícula inválida."
-    
-    if "promedio" in payload:
-        promedio = validar_promedio(payload.get("promedio"))
-        if promedio is None:
-            errors["promedio"] = "Promedio inválido."
-    
-    return errors
+    return ESQUEMA_ALUMNO.errores(payload)
 
 def validar_profesor_payload(payload):
-    errors = {}
-    
-    if "nombres" in payload:
-        nombres = validar_nombre(payload.get("nombres"))
-        if nombres is None:
-            errors["nombres"] = "Nombre inválido."
-    
-    if "apellidos" in payload:
-        apellidos = validar_nombre(payload.get("apellidos"))
-        if apellidos is None:
-            errors["apellidos"] = "Apellido inválido."
-    
-    if "numeroEmpleado" in payload:
-        numero = validar_id(payload.get("numeroEmpleado"))
-        if numero is None:
-            errors["numeroEmpleado"] = "Número de empleado inválido."
-    
-    if "horasClase" in payload:
-        horas = validar_horas(payload.get("horasClase"))
-        if horas is None:
-            errors["horasClase"] = "Horas de clase inválidas."
-    
-    return errors
+    return ESQUEMA_PROFESOR.errores(payload)
 
 # ===== MODELOS DE BASE DE DATOS =====
 
+# Contador de versiones por tabla. El UPDATE bloquea la fila del contador hasta el commit, asi
+# las versiones crecen en el orden en que se confirman las escrituras y max(version) cambia siempre.
+# El costo: una sola fila por tabla serializa a los escritores, cada transaccion que escribe en
+# alumnos (o profesores) espera a que la anterior haga commit antes de tomar su version
+versiones = db.Table(
+    'versiones',
+    db.Column('tabla', db.String(50), primary_key=True),
+    db.Column('valor', db.BigInteger, nullable=False)
+)
+
+def nueva_version(context):
+    # Una sola version por sentencia: un insert de muchas filas (executemany) comparte el valor
+    version = getattr(context, 'version_nueva', None)
+    if version is not None:
+        return version
+
+    tabla = context.current_column.table
+    conexion = context.connection
+    contador = versiones.c.tabla == tabla.name
+
+    incrementar = db.update(versiones).where(contador).values(valor=versiones.c.valor + 1)
+
+    if not conexion.execute(incrementar).rowcount:
+        # Sin fila del contador (base creada con create_all): parte de la version mas alta de la tabla
+        maximo = conexion.execute(db.select(db.func.max(tabla.c.version))).scalar() or 0
+        try:
+            # En un savepoint: en PostgreSQL un INSERT fallido aborta la transaccion completa
+            with conexion.begin_nested():
+                conexion.execute(db.insert(versiones).values(tabla=tabla.name, valor=maximo + 1))
+        except IntegrityError:
+            # Otra escritura concurrente creo la fila primero: ahora el UPDATE si la encuentra
+            conexion.execute(incrementar)
+
+    context.version_nueva = conexion.execute(db.select(versiones.c.valor).where(contador)).scalar()
+    return context.version_nueva
+
+def variantes_de_foto(variantes_json):
+    # Solo las variantes que el worker de S3Service.generar_variantes termino de subir
+    if not variantes_json:
+        return None
+    return json.loads(variantes_json)
+
 class Alumno(db.Model):
     __tablename__ = 'alumnos'
+    __table_args__ = (
+        # Rangos y orden por promedio con desempate por id (keyset)
+        db.Index('ix_alumnos_promedio_id', 'promedio', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     nombres = db.Column(db.String(100), nullable=True)
     apellidos = db.Column(db.String(100), nullable=True)
-    matricula = db.Column(db.String(20), nullable=True)
+    matricula = db.Column(db.String(20), nullable=True, unique=True, index=True)
     promedio = db.Column(db.Float, nullable=True)
-    fotoPerfilUrl = db.Column(db.String(500), nullable=True)
-    password = db.Column(db.String(255), nullable=True)
-    
-    def to_dict(self):
+    # Columnas grandes o sensibles: solo se cargan cuando se piden
+    fotoPerfilUrl = db.deferred(db.Column(db.String(500), nullable=True), group='detalle')
+    password = db.deferred(db.Column(db.String(255), nullable=True), group='detalle')
+    # {nombre: url} de las variantes de fotoPerfilUrl ya subidas; None mientras no existan
+    fotoPerfilVariantesUrls = db.deferred(db.Column(db.Text, nullable=True), group='detalle')
+    version = db.Column(db.BigInteger, nullable=False, default=nueva_version, onupdate=nueva_version, server_default='0')
+    
+    CAMPOS = ('id', 'nombres', 'apellidos', 'matricula', 'promedio', 'fotoPerfilUrl', 'fotoPerfilVariantes', 'password')
+    # Campos calculados y la columna de la que dependen
+    COLUMNAS_DE_CAMPO = {'fotoPerfilVariantes': 'fotoPerfilVariantesUrls'}
+    CALCULOS_DE_CAMPO = {'fotoPerfilVariantes': variantes_de_foto}
+    # Filtros de listado: exactos (?matricula=) y rangos (?promedioMin= / ?promedioMax=)
+    FILTROS_EXACTOS = {'matricula': validar_matricula}
+    FILTROS_RANGO = {'promedio': validar_promedio}
+    # Solo columnas con indice, para que ?sort= no obligue a ordenar la tabla completa
+    ORDENAMIENTOS = ('id', 'promedio', 'matricula')
+    # Nunca se copian a la cache de entidades (puede ser un redis compartido)
+    CAMPOS_SIN_CACHE = ('password',)
+
+    def to_dict(self, campos=None):
+
+        if campos is not None:
+            return {
+                campo: self.foto_perfil_variantes() if campo == 'fotoPerfilVariantes' else getattr(self, campo)
+                for campo in campos
+            }
 
         return {
             'id': self.id,
@@ -164,9 +180,14 @@ class Alumno(db.Model):
             'matricula': self.matricula,
             'promedio': self.promedio,
             'fotoPerfilUrl': self.fotoPerfilUrl,
+            'fotoPerfilVariantes': self.foto_perfil_variantes(),
             'password': self.password
         }
 
+    def foto_perfil_variantes(self):
+
+        return variantes_de_foto(self.fotoPerfilVariantesUrls)
+
 
 class Profesor(db.Model):
     __tablename__ = 'profesores'
@@ -174,10 +195,22 @@ class Profesor(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     nombres = db.Column(db.String(100), nullable=True)
     apellidos = db.Column(db.String(100), nullable=True)
-    numeroEmpleado = db.Column(db.Integer, nullable=True)
+    numeroEmpleado = db.Column(db.Integer, nullable=True, index=True)
     horasClase = db.Column(db.Integer, nullable=True)
+    version = db.Column(db.BigInteger, nullable=False, default=nueva_version, onupdate=nueva_version, server_default='0')
     
-    def to_dict(self):
+    CAMPOS = ('id', 'nombres', 'apellidos', 'numeroEmpleado', 'horasClase')
+    COLUMNAS_DE_CAMPO = {}
+    CALCULOS_DE_CAMPO = {}
+    FILTROS_EXACTOS = {'numeroEmpleado': validar_id}
+    FILTROS_RANGO = {'horasClase': validar_horas}
+    ORDENAMIENTOS = ('id', 'numeroEmpleado')
+    CAMPOS_SIN_CACHE = ()
+
+    def to_dict(self, campos=None):
+        if campos is not None:
+            return {campo: getattr(self, campo) for campo in campos}
+
         return {
             'id': self.id,
             'nombres': self.nombres,
@@ -186,6 +219,10 @@ class Profesor(db.Model):
             'horasClase': self.horasClase
         }
 
+@app.before_request
+def enrutar_lecturas():
+    g.usar_replica = request.method in ('GET', 'HEAD')
+
 #ERROR HANDLERS
 @app.errorhandler(404)
 def not_found(error):
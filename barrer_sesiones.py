@@ -0,0 +1,14 @@
+import argparse
+from services.dynamodb_service import DynamoDBService
+
+parser = argparse.ArgumentParser(description="Compacta la tabla de sesiones: borra sesiones cerradas o vencidas")
+parser.add_argument("--simular", action="store_true", help="Solo cuenta, no borra ni actualiza")
+args = parser.parse_args()
+
+dynamodb_service = DynamoDBService()
+
+# Tablas creadas antes del TTL: se activa aqui para que DynamoDB mantenga la tabla despues
+if not args.simular:
+    dynamodb_service.activar_ttl()
+
+dynamodb_service.barrer_sesiones(simular=args.simular)
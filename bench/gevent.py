@@ -0,0 +1,141 @@
+from gevent import monkey
+monkey.patch_all()
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import gevent
+from gevent.pool import Pool
+from gevent.pywsgi import WSGIServer
+
+# ===== BENCHMARK DE CONCURRENCIA: MODO SYNC CONTRA MODO GEVENT (user-019) =====
+# Levanta un sustituto local de SNS que tarda --latencia en responder cada Publish y corre
+# api_rest.py (puerto 5000) en cada modo con SNS_ENVIO_ASINCRONO=false. Luego mide
+# POST /alumnos/1/email con varios niveles de concurrencia. Desde la raiz del repo:
+#   python -m bench.gevent --concurrencias 50,200,500 --duracion 10
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PUERTO_API = 5000
+
+RESPUESTA_PUBLISH = (
+    '<PublishResponse xmlns="http://sns.amazonaws.com/doc/2010-03-31/">'
+    "<PublishResult><MessageId>{}</MessageId></PublishResult>"
+    "<ResponseMetadata><RequestId>{}</RequestId></ResponseMetadata>"
+    "</PublishResponse>"
+)
+
+def sustituto_sns(latencia):
+    # Solo Publish: lo unico que usa la ruta medida
+    def aplicacion(environ, start_response):
+        environ["wsgi.input"].read()
+        gevent.sleep(latencia)
+        cuerpo = RESPUESTA_PUBLISH.format(uuid.uuid4(), uuid.uuid4()).encode()
+        start_response("200 OK", [("Content-Type", "text/xml"), ("Content-Length", str(len(cuerpo)))])
+        return [cuerpo]
+
+    servidor = WSGIServer(("127.0.0.1", 0), aplicacion, log=None)
+    servidor.start()
+    return servidor
+
+def preparar_base(ruta):
+    # Un solo alumno: la ruta lo lee de la base (cache de entidades) antes de publicar
+    os.environ["DATABASE_URI"] = f"sqlite:///{ruta}"
+    from app import app, db, Alumno
+    with app.app_context():
+        db.create_all()
+        db.session.add(Alumno(nombres="Ana", apellidos="Diaz", matricula="A1", promedio=90, password="pw"))
+        db.session.commit()
+
+def iniciar_api(modo, base, puerto_sns):
+    entorno = {
+        **os.environ,
+        "MODO_SERVIDOR": modo,
+        "DATABASE_URI": f"sqlite:///{base}",
+        "SNS_ENDPOINT_URL": f"http://127.0.0.1:{puerto_sns}",
+        "SNS_ENVIO_ASINCRONO": "false",
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_SESSION_TOKEN": "bench",
+    }
+    proceso = subprocess.Popen(
+        [sys.executable, "api_rest.py"], cwd=RAIZ, env=entorno,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        try:
+            conexion = http.client.HTTPConnection("127.0.0.1", PUERTO_API, timeout=2)
+            conexion.request("GET", "/alumnos/1")
+            if conexion.getresponse().status == 200:
+                return proceso
+        except OSError:
+            pass
+        gevent.sleep(0.2)
+
+    proceso.kill()
+    raise RuntimeError(f"api_rest.py en modo {modo} no respondio en el puerto {PUERTO_API}")
+
+def medir(concurrencia, duracion):
+    latencias = []
+    errores = []
+    fin = time.monotonic() + duracion
+
+    def cliente():
+        while time.monotonic() < fin:
+            inicio = time.monotonic()
+            try:
+                conexion = http.client.HTTPConnection("127.0.0.1", PUERTO_API, timeout=30)
+                conexion.request("POST", "/alumnos/1/email", body=b"", headers={"Content-Type": "application/json"})
+                respuesta = conexion.getresponse()
+                respuesta.read()
+                conexion.close()
+                if respuesta.status == 200:
+                    latencias.append(time.monotonic() - inicio)
+                else:
+                    errores.append(str(respuesta.status))
+            except OSError as e:
+                errores.append(type(e).__name__)
+
+    pool = Pool(concurrencia)
+    for _ in range(concurrencia):
+        pool.spawn(cliente)
+    pool.join()
+
+    latencias.sort()
+    percentil = lambda p: latencias[min(int(len(latencias) * p), len(latencias) - 1)] * 1000 if latencias else float("nan")
+    tipos = sorted(set(errores))
+    return len(latencias) / duracion, percentil(0.5), percentil(0.99), len(errores), tipos
+
+parser = argparse.ArgumentParser(description="Compara MODO_SERVIDOR=sync y gevent con un SNS local lento")
+parser.add_argument("--concurrencias", default="50,200,500", help="Clientes simultaneos, separados por coma")
+parser.add_argument("--duracion", type=float, default=10, help="Segundos por nivel")
+parser.add_argument("--latencia", type=float, default=0.1, help="Latencia del sustituto de SNS (segundos)")
+parser.add_argument("--modos", default="sync,gevent")
+args = parser.parse_args()
+
+directorio = tempfile.mkdtemp(prefix="sicei-bench-")
+base = os.path.join(directorio, "bench.db")
+preparar_base(base)
+
+sns = sustituto_sns(args.latencia)
+print(f"Sustituto de SNS en el puerto {sns.server_port} ({args.latencia * 1000:.0f} ms por Publish)")
+
+try:
+    for modo in args.modos.split(","):
+        api = iniciar_api(modo, base, sns.server_port)
+        try:
+            for concurrencia in [int(valor) for valor in args.concurrencias.split(",")]:
+                por_segundo, p50, p99, fallidas, tipos = medir(concurrencia, args.duracion)
+                detalle = f", {fallidas} fallidas ({', '.join(tipos)})" if fallidas else ""
+                print(f"{modo:6} concurrencia {concurrencia:4} : {por_segundo:6.1f} req/s, p50 {p50:7.1f} ms, p99 {p99:7.1f} ms{detalle}")
+        finally:
+            api.terminate()
+            api.wait()
+finally:
+    sns.stop()
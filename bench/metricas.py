@@ -0,0 +1,77 @@
+import argparse
+import os
+import tempfile
+import time
+
+# ===== BENCHMARK DEL COSTO DE LAS METRICAS (user-024) =====
+# Microsegundos por peticion con y sin la instrumentacion de metricas.py (middleware WSGI, hook
+# before_request y eventos de SQL), alternando ambas configuraciones en el mismo proceso para que
+# el ruido del sistema afecte a las dos por igual. Usa una base SQLite temporal. Desde la raiz del repo:
+#   python -m bench.metricas --peticiones 2000
+
+parser = argparse.ArgumentParser(description="Mide el costo por peticion del middleware de metricas")
+parser.add_argument("--peticiones", type=int, default=2_000, help="Peticiones por medicion")
+parser.add_argument("--repeticiones", type=int, default=7)
+args = parser.parse_args()
+
+directorio = tempfile.mkdtemp(prefix="sicei-bench-")
+os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+os.environ["METRICAS_ACTIVAS"] = "true"
+os.environ.pop("METRICAS_DIR", None)
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from app import app, db, Alumno  # noqa: E402
+
+@app.route("/bench/vacia")
+def vacia():
+    # Sin base de datos: solo el costo de Flask y del middleware
+    return "ok"
+
+from controllers.api_route_alumnos import *  # noqa: E402,F401,F403
+from controllers.api_route_profesores import *  # noqa: E402,F401,F403
+
+sin_metricas = (app.wsgi_app, list(app.before_request_funcs.get(None, [])))
+import metricas  # noqa: E402
+con_metricas = (app.wsgi_app, list(app.before_request_funcs.get(None, [])))
+
+def usar_metricas(activas):
+    wsgi_app, antes = con_metricas if activas else sin_metricas
+    app.wsgi_app = wsgi_app
+    app.before_request_funcs[None] = list(antes)
+    for nombre, funcion in (("before_cursor_execute", metricas.antes_de_consulta), ("after_cursor_execute", metricas.despues_de_consulta)):
+        if activas and not event.contains(Engine, nombre, funcion):
+            event.listen(Engine, nombre, funcion)
+        elif not activas and event.contains(Engine, nombre, funcion):
+            event.remove(Engine, nombre, funcion)
+
+def medir(cliente, url):
+    inicio = time.perf_counter()
+    for _ in range(args.peticiones):
+        respuesta = cliente.get(url)
+        respuesta.close()
+    return (time.perf_counter() - inicio) / args.peticiones
+
+with app.app_context():
+    db.create_all()
+    db.session.execute(db.insert(Alumno), [
+        {"nombres": "Ana", "apellidos": "Diaz", "matricula": f"A{i}", "promedio": i % 100, "password": "pw"}
+        for i in range(1, 101)
+    ])
+    db.session.commit()
+
+cliente = app.test_client()
+
+for url in ("/bench/vacia", "/alumnos/1", "/alumnos?limit=20", "/alumnos/stats"):
+    sin, con = [], []
+    for _ in range(args.repeticiones):
+        # Alternadas: ninguna de las dos corre siempre primero ni con la cache mas fria
+        for activas, tiempos in ((False, sin), (True, con)):
+            usar_metricas(activas)
+            tiempos.append(medir(cliente, url))
+
+    mejor_sin, mejor_con = min(sin), min(con)
+    print(
+        f"{url:20} : sin metricas {mejor_sin * 1e6:8.1f} us, con metricas {mejor_con * 1e6:8.1f} us, "
+        f"costo {(mejor_con - mejor_sin) * 1e6:6.1f} us por peticion ({(mejor_con / mejor_sin - 1) * 100:+.1f}%)"
+    )
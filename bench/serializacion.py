@@ -0,0 +1,85 @@
+import argparse
+import os
+import random
+import tempfile
+import time
+
+# ===== BENCHMARK DE SERIALIZACION DE LISTADOS (user-017) =====
+# Filas/s del listado completo con objetos ORM + to_dict + jsonify (lo anterior) contra
+# SerializadorFilas (tuplas de Core escritas directo a JSON). Usa una base SQLite temporal
+# y comprueba que ambas salidas sean identicas byte a byte. Desde la raiz del repo:
+#   python -m bench.serializacion --filas 20000
+
+parser = argparse.ArgumentParser(description="Compara la serializacion de listados con y sin ORM")
+parser.add_argument("--filas", type=int, default=20_000, help="Filas por tabla")
+parser.add_argument("--repeticiones", type=int, default=5)
+args = parser.parse_args()
+
+directorio = tempfile.mkdtemp(prefix="sicei-bench-")
+os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(directorio, 'bench.db')}"
+
+from flask import jsonify  # noqa: E402
+from app import app, db, Alumno, Profesor  # noqa: E402
+from listados import construir_listado  # noqa: E402
+
+def poblar():
+    azar = random.Random(17)
+    nombres = ["José", "María", "Zoë", "O'Neil", "Ana Sofía", "Pérez-Gómez"]
+    db.session.execute(db.insert(Alumno), [
+        {
+            "nombres": azar.choice(nombres),
+            "apellidos": azar.choice(nombres),
+            "matricula": f"A{i}",
+            "promedio": round(azar.uniform(0, 100), 2),
+            "password": "secreto",
+            "fotoPerfilUrl": f"https://s3/alumnos/{i}/perfil_0000abcd.png" if i % 3 == 0 else None
+        }
+        for i in range(1, args.filas + 1)
+    ])
+    db.session.execute(db.insert(Profesor), [
+        {
+            "nombres": azar.choice(nombres),
+            "apellidos": azar.choice(nombres),
+            "numeroEmpleado": i,
+            "horasClase": azar.randint(1, 40)
+        }
+        for i in range(1, args.filas + 1)
+    ])
+    db.session.commit()
+
+def anterior(modelo):
+    # Listado antes de user-017: objetos ORM completos (columnas diferidas incluidas) y to_dict por fila
+    query = modelo.query.options(db.undefer_group("detalle")) if modelo is Alumno else modelo.query
+    return jsonify([registro.to_dict() for registro in query.all()]).get_data()
+
+def nuevo(modelo):
+    with app.test_request_context(f"/{modelo.__tablename__}"):
+        respuesta = construir_listado(modelo, None)
+        return respuesta.get_data()
+
+def medir(funcion, modelo):
+    mejor = None
+    for _ in range(args.repeticiones):
+        db.session.expunge_all()
+        inicio = time.perf_counter()
+        funcion(modelo)
+        duracion = time.perf_counter() - inicio
+        mejor = duracion if mejor is None else min(mejor, duracion)
+    return mejor
+
+with app.app_context():
+    db.create_all()
+    poblar()
+
+    for modelo in (Alumno, Profesor):
+        db.session.expunge_all()
+        assert anterior(modelo) == nuevo(modelo), f"La salida de /{modelo.__tablename__} no es identica"
+
+        duracion_anterior = medir(anterior, modelo)
+        duracion_nueva = medir(nuevo, modelo)
+        print(
+            f"/{modelo.__tablename__} ({args.filas} filas, salida identica) : "
+            f"ORM + to_dict {args.filas / duracion_anterior:,.0f} filas/s, "
+            f"SerializadorFilas {args.filas / duracion_nueva:,.0f} filas/s "
+            f"({duracion_anterior / duracion_nueva:.2f}x)"
+        )
@@ -0,0 +1,140 @@
+import argparse
+import random
+import string
+import timeit
+from validacion import validar_nombre, validar_matricula, validar_promedio, ESQUEMA_ALUMNO
+
+# ===== BENCHMARK DE VALIDACION (user-016) =====
+# Compara los validadores de validacion.py con los que habia en app.py antes del esquema
+# declarativo, y verifica que ambos den el mismo resultado. Desde la raiz del repo:
+#   python -m bench.validacion
+
+CAMPOS_ALUMNO = ("nombres", "apellidos", "matricula", "promedio", "password")
+
+# ----- Implementacion anterior (app.py antes de validacion.py) -----
+
+def validar_matricula_anterior(matricula):
+    if not isinstance(matricula, str):
+        return None
+    matricula = matricula.strip()
+    if not matricula:
+        return None
+    if not matricula.startswith('A'):
+        return None
+    if not matricula[1:].isdigit():
+        return None
+    return matricula
+
+def validar_nombre_anterior(nombre):
+    if not isinstance(nombre, str):
+        return None
+    nombre = nombre.strip()
+    if not nombre:
+        return None
+    for ch in nombre:
+        if not (ch.isalpha() or ch in " -'"):
+            return None
+    return nombre
+
+def validar_alumno_payload_anterior(payload):
+    errors = {}
+    if "nombres" in payload and validar_nombre_anterior(payload.get("nombres")) is None:
+        errors["nombres"] = "Nombre inválido."
+    if "apellidos" in payload and validar_nombre_anterior(payload.get("apellidos")) is None:
+        errors["apellidos"] = "Apellido inválido."
+    if "matricula" in payload and validar_matricula_anterior(payload.get("matricula")) is None:
+        errors["matricula"] = "Matrícula inválida."
+    if "promedio" in payload and validar_promedio(payload.get("promedio")) is None:
+        errors["promedio"] = "Promedio inválido."
+    return errors
+
+def validar_registros_anterior(registros):
+    # carga_masiva.validar_registros de entonces: un payload a la vez
+    filas, indices, errores = [], [], []
+    for indice, registro in registros:
+        errors = validar_alumno_payload_anterior(registro)
+        if errors:
+            errores.append({"index": indice, "errors": errors})
+            continue
+        filas.append({campo: registro.get(campo) for campo in CAMPOS_ALUMNO})
+        indices.append(indice)
+    return filas, indices, errores
+
+# ----- Datos -----
+
+LETRAS = string.ascii_letters + "áéíóúñÁÉÍÓÚÑü" + " -'"
+OTROS = "0123456789_.!@ \t\n" + "日本" + "٠١"
+
+def nombre_aleatorio(azar):
+    alfabeto = LETRAS if azar.random() < 0.8 else LETRAS + OTROS
+    return "".join(azar.choice(alfabeto) for _ in range(azar.randint(0, 30)))
+
+def payload_aleatorio(azar):
+    payload = {
+        "nombres": nombre_aleatorio(azar),
+        "apellidos": nombre_aleatorio(azar),
+        "matricula": azar.choice(["A", " a1", "A١٢", ""]) + "".join(azar.choice("0123456789x") for _ in range(azar.randint(0, 8))),
+        "promedio": azar.choice([azar.uniform(-10, 110), str(azar.randint(0, 100)), "nan", None, "abc"]),
+        "password": "pw"
+    }
+    for campo in list(payload):
+        if azar.random() < 0.1:
+            del payload[campo]
+        elif azar.random() < 0.05:
+            payload[campo] = azar.choice([None, 5, [], {}])
+    return payload
+
+# ----- Equivalencia -----
+
+def verificar(payloads):
+    # Mismo resultado (valido/invalido y valor normalizado) y mismos errores
+    for payload in payloads:
+        for campo, nuevo, anterior in (
+            ("nombres", validar_nombre, validar_nombre_anterior),
+            ("apellidos", validar_nombre, validar_nombre_anterior),
+            ("matricula", validar_matricula, validar_matricula_anterior),
+        ):
+            if campo in payload:
+                assert nuevo(payload[campo]) == anterior(payload[campo]), (campo, payload[campo])
+        assert ESQUEMA_ALUMNO.errores(payload) == validar_alumno_payload_anterior(payload), payload
+
+    _, indices, errores = ESQUEMA_ALUMNO.validar_lote(enumerate(payloads), CAMPOS_ALUMNO)
+    _, indices_anterior, errores_anterior = validar_registros_anterior(enumerate(payloads))
+    assert indices == indices_anterior and errores == errores_anterior
+
+def medir(funcion, repeticiones):
+    # Mejor de varias corridas: lo menos afectado por ruido del sistema
+    return min(timeit.repeat(funcion, number=1, repeat=repeticiones))
+
+parser = argparse.ArgumentParser(description="Compara la validacion declarativa con la anterior")
+parser.add_argument("--llamadas", type=int, default=100_000, help="Llamadas a validar_nombre")
+parser.add_argument("--lote", type=int, default=10_000, help="Registros del lote")
+parser.add_argument("--aleatorios", type=int, default=2_000, help="Payloads aleatorios para verificar equivalencia")
+parser.add_argument("--repeticiones", type=int, default=5)
+parser.add_argument("--semilla", type=int, default=16)
+args = parser.parse_args()
+
+azar = random.Random(args.semilla)
+
+verificar([payload_aleatorio(azar) for _ in range(args.aleatorios)])
+print(f"Equivalencia : {args.aleatorios} payloads aleatorios con el mismo resultado")
+
+# Nombres validos (el caso comun, el ciclo anterior recorre todo el texto) y aleatorios
+validos = [azar.choice(["María José", "Pérez-Gómez", "O'Neil", "De la Cruz", "Ana"]) + " " + "".join(azar.choice(string.ascii_letters) for _ in range(azar.randint(3, 12))) for _ in range(1000)]
+aleatorios = [nombre_aleatorio(azar) for _ in range(1000)]
+
+for etiqueta, nombres in (("validos", validos), ("aleatorios", aleatorios)):
+    ciclos = args.llamadas // len(nombres)
+
+    def nombres_con(validar):
+        return lambda: [validar(nombre) for _ in range(ciclos) for nombre in nombres]
+
+    anterior = medir(nombres_con(validar_nombre_anterior), args.repeticiones)
+    nuevo = medir(nombres_con(validar_nombre), args.repeticiones)
+    print(f"validar_nombre x{ciclos * len(nombres)} ({etiqueta}) : anterior {anterior:.3f}s, nuevo {nuevo:.3f}s ({anterior / nuevo:.2f}x)")
+
+lote = [(indice, payload_aleatorio(azar)) for indice in range(args.lote)]
+
+anterior = medir(lambda: validar_registros_anterior(lote), args.repeticiones)
+nuevo = medir(lambda: ESQUEMA_ALUMNO.validar_lote(lote, CAMPOS_ALUMNO), args.repeticiones)
+print(f"Lote de {args.lote} alumnos : anterior {anterior * 1000:.1f} ms, validar_lote {nuevo * 1000:.1f} ms ({anterior / nuevo:.2f}x)")
@@ -0,0 +1,178 @@
+import json
+import threading
+from app import db, en_primario
+from services.cache_service import CacheTTL
+from config import ENTIDAD_CACHE_BACKEND, ENTIDAD_CACHE_REDIS_URL, ENTIDAD_CACHE_TTL, ENTIDAD_CACHE_MAXSIZE
+
+# ===== CACHE DE LECTURA DE ENTIDADES POR ID =====
+# Guarda una copia de las columnas del registro, nunca el objeto ORM (pertenece a una sesion),
+# sin los CAMPOS_SIN_CACHE del modelo. Se llena leyendo del primario: tras una invalidacion la
+# replica puede no tener aun la escritura. Las rutas que escriben siguen leyendo de la base de
+# datos e invalidan al terminar.
+
+class BackendMemoria:
+
+    nombre = "memoria"
+
+    def __init__(self, maxsize=ENTIDAD_CACHE_MAXSIZE, ttl=ENTIDAD_CACHE_TTL):
+
+        self.cache = CacheTTL(maxsize=maxsize, ttl=ttl)
+
+    def obtener(self, clave):
+
+        return self.cache.obtener(clave)
+
+    def guardar(self, clave, datos):
+
+        self.cache.guardar(clave, datos)
+
+    def invalidar(self, clave):
+
+        self.cache.invalidar(clave)
+
+    def invalidar_varias(self, claves):
+
+        for clave in claves:
+            self.cache.invalidar(clave)
+
+    def estadisticas(self):
+
+        return self.cache.estadisticas()
+
+class BackendCompartido:
+
+    # Cualquier cliente con get / set(ex=) / delete estilo redis-py; en pruebas basta un stand-in local.
+    # Si el backend falla se lee de la base de datos: la cache nunca tumba una peticion.
+
+    nombre = "compartido"
+
+    # v2: las entradas anteriores incluian password y no deben volver a leerse
+    def __init__(self, cliente, ttl=ENTIDAD_CACHE_TTL, prefijo="sicei:entidad:v2:"):
+
+        self.cliente = cliente
+        self.ttl = ttl
+        self.prefijo = prefijo
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errores = 0
+
+    def _contar(self, contador):
+
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
+
+    def obtener(self, clave):
+
+        try:
+            valor = self.cliente.get(self.prefijo + clave)
+        except Exception as e:
+            print(f"Error leyendo cache compartida : {e}")
+            self._contar("errores")
+            return None
+
+        if valor is None:
+            self._contar("misses")
+            return None
+
+        self._contar("hits")
+        return json.loads(valor)
+
+    def guardar(self, clave, datos):
+
+        try:
+            self.cliente.set(self.prefijo + clave, json.dumps(datos), ex=self.ttl)
+        except Exception as e:
+            print(f"Error escribiendo cache compartida : {e}")
+            self._contar("errores")
+
+    def invalidar(self, clave):
+
+        try:
+            self.cliente.delete(self.prefijo + clave)
+        except Exception as e:
+            print(f"Error invalidando cache compartida : {e}")
+            self._contar("errores")
+
+    def invalidar_varias(self, claves, por_llamada=500):
+
+        # DELETE acepta varias llaves: una llamada por bloque, no una por registro
+        for inicio in range(0, len(claves), por_llamada):
+            try:
+                self.cliente.delete(*[self.prefijo + clave for clave in claves[inicio:inicio + por_llamada]])
+            except Exception as e:
+                print(f"Error invalidando cache compartida : {e}")
+                self._contar("errores")
+
+    def estadisticas(self):
+
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "errors": self.errores,
+                "hitRate": round(self.hits / total, 4) if total else 0.0
+            }
+
+def crear_backend():
+
+    if ENTIDAD_CACHE_BACKEND == "redis":
+        try:
+            import redis
+            cliente = redis.Redis.from_url(ENTIDAD_CACHE_REDIS_URL or 'redis://localhost:6379/0', socket_timeout=0.5)
+            print("Cache de entidades : redis")
+            return BackendCompartido(cliente)
+        except Exception as e:
+            print(f"Cache de entidades redis no disponible, se usa memoria : {e}")
+
+    return BackendMemoria()
+
+class CacheEntidades:
+
+    def __init__(self, backend):
+
+        self.backend = backend
+
+    def _clave(self, modelo, registro_id):
+
+        return f"{modelo.__tablename__}:{registro_id}"
+
+    def obtener(self, modelo, registro_id):
+
+        # Devuelve una instancia transitoria (fuera de la sesion) solo para lectura, o None.
+        # Los CAMPOS_SIN_CACHE quedan en None: quien los necesite los lee de la base de datos
+        clave = self._clave(modelo, registro_id)
+        datos = self.backend.obtener(clave)
+
+        if datos is None:
+            atributos = [
+                atributo for atributo in modelo.__mapper__.column_attrs
+                if atributo.key not in modelo.CAMPOS_SIN_CACHE
+            ]
+            fila = db.session.execute(
+                db.select(*[atributo.class_attribute for atributo in atributos]).where(modelo.id == registro_id),
+                bind_arguments=en_primario()
+            ).one_or_none()
+            if fila is None:
+                return None
+            datos = {atributo.key: valor for atributo, valor in zip(atributos, fila)}
+            self.backend.guardar(clave, datos)
+
+        return modelo(**datos)
+
+    def invalidar(self, modelo, registro_id):
+
+        self.backend.invalidar(self._clave(modelo, registro_id))
+
+    def invalidar_ids(self, modelo, registro_ids):
+
+        # Altas masivas: ids que pudieron quedar cacheados de un registro anterior con el mismo id
+        self.backend.invalidar_varias([self._clave(modelo, registro_id) for registro_id in registro_ids])
+
+    def estadisticas(self):
+
+        return {"backend": self.backend.nombre, **self.backend.estadisticas()}
+
+cache_entidades = CacheEntidades(crear_backend())
@@ -0,0 +1,114 @@
+import json
+from flask import request
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from app import db
+from config import BULK_TAMANO_LOTE, BULK_MAX_REGISTROS
+
+TIPOS_NDJSON = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+# ===== CARGA MASIVA (JSON ARRAY O NDJSON) =====
+
+def leer_registros():
+    # Devuelve (registros, errores); cada registro es (indice, dict)
+    texto = request.get_data(as_text=True)
+
+    if request.mimetype in TIPOS_NDJSON or not texto.lstrip().startswith("["):
+        registros = []
+        errores = []
+        for indice, linea in enumerate(texto.splitlines()):
+            if not linea.strip():
+                continue
+            try:
+                registros.append((indice, json.loads(linea)))
+            except ValueError:
+                errores.append({"index": indice, "errors": {"json": "Línea JSON inválida."}})
+        return registros, errores
+
+    try:
+        datos = json.loads(texto)
+    except ValueError:
+        raise ValueError("JSON inválido")
+
+    if not isinstance(datos, list):
+        raise ValueError("Se esperaba un arreglo JSON")
+
+    return list(enumerate(datos)), []
+
+def insertar_en_lotes(modelo, filas, indices=None, tamano_lote=BULK_TAMANO_LOTE):
+    # INSERT de varias filas por sentencia y un commit por lote
+    insertados = 0
+    errores = []
+
+    for inicio in range(0, len(filas), tamano_lote):
+        lote = filas[inicio:inicio + tamano_lote]
+        try:
+            db.session.execute(db.insert(modelo), lote)
+            db.session.commit()
+            insertados += len(lote)
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            print(f"Error insertando lote de {modelo.__tablename__} : {e}")
+            # Se reintenta fila por fila para rechazar solo las que fallan (p. ej. matricula duplicada)
+            ok, errores_lote = insertar_filas(modelo, lote, inicio, indices)
+            insertados += ok
+            errores.extend(errores_lote)
+
+    return insertados, errores
+
+def insertar_filas(modelo, lote, inicio, indices=None):
+    insertados = 0
+    errores = []
+
+    for posicion, fila in enumerate(lote, start=inicio):
+        try:
+            db.session.execute(db.insert(modelo), [fila])
+            db.session.commit()
+            insertados += 1
+        except IntegrityError:
+            db.session.rollback()
+            errores.append({
+                "index": indices[posicion] if indices is not None else posicion,
+                "errors": {"database": "Registro duplicado."}
+            })
+        except SQLAlchemyError:
+            db.session.rollback()
+            errores.append({
+                "index": indices[posicion] if indices is not None else posicion,
+                "errors": {"database": "Error al insertar el registro."}
+            })
+
+    return insertados, errores
+
+def carga_masiva(modelo, esquema, campos):
+    try:
+        registros, errores = leer_registros()
+    except ValueError as e:
+        return {"error": str(e)}, 400
+
+    recibidos = len(registros) + len(errores)
+    if not recibidos:
+        # Cuerpo vacio, solo lineas en blanco o []: no es una carga exitosa de cero registros
+        return {"error": "No se recibieron registros"}, 400
+    if recibidos > BULK_MAX_REGISTROS:
+        return {"error": f"Máximo {BULK_MAX_REGISTROS} registros por solicitud"}, 413
+
+    # Todo el lote se valida en una llamada; las filas salen ya normalizadas
+    filas, indices, errores_validacion = esquema.validar_lote(registros, campos)
+    errores.extend(errores_validacion)
+
+    insertados, errores_insercion = insertar_en_lotes(modelo, filas, indices)
+    errores.extend(errores_insercion)
+    errores.sort(key=lambda error: error["index"])
+
+    if not errores:
+        status = 201
+    elif insertados:
+        status = 207
+    else:
+        status = 400
+
+    return {
+        "received": recibidos,
+        "inserted": insertados,
+        "errors": errores
+    }, status
@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # ===== CONFIGURACION AWS S3 =====
 
@@ -8,18 +9,183 @@ AWS_SESSION_TOKEN = os.environ.get('AWS_SESSION_TOKEN', 'IQoJb3JpZ2luX2VjEJj////
 
 AWS_REGION = 'us-east-1'
 
+# Cliente HTTP de botocore compartido por S3, SNS y DynamoDB
+AWS_MAX_POOL_CONNECTIONS = int(os.environ.get('AWS_MAX_POOL_CONNECTIONS', '50'))
+AWS_CONNECT_TIMEOUT = float(os.environ.get('AWS_CONNECT_TIMEOUT', '2'))
+AWS_READ_TIMEOUT = float(os.environ.get('AWS_READ_TIMEOUT', '5'))
+AWS_RETRY_MODE = os.environ.get('AWS_RETRY_MODE', 'standard')
+AWS_MAX_ATTEMPTS = int(os.environ.get('AWS_MAX_ATTEMPTS', '3'))
+
 S3_BUCKET_NAME = 'm25090057-uady-aws-academy-proyecto-final'
 
 S3_BASE_URL = f'https://{S3_BUCKET_NAME}.s3.{AWS_REGION}.amazonaws.com'
 
+# Permite apuntar a un sustituto local de S3 en desarrollo
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+
+# Subidas directas a S3 con POST presignado
+S3_FOTO_MAX_BYTES = int(os.environ.get('S3_FOTO_MAX_BYTES', str(5 * 1024 * 1024)))
+S3_PRESIGNED_EXPIRACION = int(os.environ.get('S3_PRESIGNED_EXPIRACION', '300'))
+
+# Variantes WebP de la foto de perfil (nombre:lado maximo en px)
+IMAGEN_VARIANTES = {
+    nombre: int(lado)
+    for nombre, lado in (
+        variante.split(':') for variante in os.environ.get('IMAGEN_VARIANTES', 'thumb:128,medium:512').split(',')
+    )
+}
+IMAGEN_CALIDAD_WEBP = int(os.environ.get('IMAGEN_CALIDAD_WEBP', '80'))
+IMAGEN_WORKERS = int(os.environ.get('IMAGEN_WORKERS', '1'))
+IMAGEN_MAX_PENDIENTES = int(os.environ.get('IMAGEN_MAX_PENDIENTES', '16'))
+
 # ===== CONFIGURACION SNS =====
 SNS_TOPIC_ARN = os.environ.get(
     'SNS_TOPIC_ARN',
     'arn:aws:sns:us-east-1:022337646160:uady-proyecto-final-notificacion'
 )
 
+# Permite apuntar a un sustituto local de SNS en desarrollo
+SNS_ENDPOINT_URL = os.environ.get('SNS_ENDPOINT_URL') or None
+
+# Envio asincrono: pool de hilos acotado con reintentos y backoff exponencial
+SNS_ENVIO_ASINCRONO = os.environ.get('SNS_ENVIO_ASINCRONO', 'true').lower() in ('1', 'true', 'si', 'yes')
+SNS_WORKERS = int(os.environ.get('SNS_WORKERS', '4'))
+SNS_COLA_MAXIMA = int(os.environ.get('SNS_COLA_MAXIMA', '1000'))
+SNS_REINTENTOS = int(os.environ.get('SNS_REINTENTOS', '3'))
+SNS_BACKOFF_BASE = float(os.environ.get('SNS_BACKOFF_BASE', '0.5'))
+# El estado de cada envio vive en DYNAMODB_JOBS_TABLE_NAME (compartido por todos los workers) y se borra por TTL
+SNS_JOBS_DURACION = int(os.environ.get('SNS_JOBS_DURACION', '86400'))
+
+# PublishBatch admite como maximo 10 mensajes por llamada
+SNS_TAMANO_LOTE = 10
+SNS_MAX_ALUMNOS_POR_ENVIO = int(os.environ.get('SNS_MAX_ALUMNOS_POR_ENVIO', '5000'))
+
 # ===== CONFIGURACION DYNAMODB =====
 DYNAMODB_TABLE_NAME = os.environ.get(
     'DYNAMODB_TABLE_NAME',
     'sesiones-alumnos'
-)
\ No newline at end of file
+)
+
+# Indice secundario global sobre sessionString (ver DynamoDBService.crear_tabla)
+DYNAMODB_SESSION_INDEX = os.environ.get(
+    'DYNAMODB_SESSION_INDEX',
+    'sessionString-index'
+)
+
+# Indice secundario global sobre alumnoId (+ fecha) para listar y cerrar las sesiones de un alumno
+DYNAMODB_ALUMNO_INDEX = os.environ.get(
+    'DYNAMODB_ALUMNO_INDEX',
+    'alumnoId-index'
+)
+
+# Indice secundario global disperso: solo lo tienen las sesiones revocadas en modo token
+DYNAMODB_REVOCADAS_INDEX = os.environ.get(
+    'DYNAMODB_REVOCADAS_INDEX',
+    'revocada-index'
+)
+
+# Estado de las notificaciones asincronas (ver services/notificacion_jobs.py)
+DYNAMODB_JOBS_TABLE_NAME = os.environ.get(
+    'DYNAMODB_JOBS_TABLE_NAME',
+    'notificaciones-jobs'
+)
+
+# Segundos que init_dynamodb.py espera a que un indice nuevo quede ACTIVE (el backfill de una tabla
+# grande tarda minutos); pasado ese tiempo falla con TimeoutError en vez de esperar para siempre
+DYNAMODB_INDICE_TIMEOUT = int(os.environ.get('DYNAMODB_INDICE_TIMEOUT', '1800'))
+
+# Permite apuntar a DynamoDB Local u otro sustituto en desarrollo
+DYNAMODB_ENDPOINT_URL = os.environ.get('DYNAMODB_ENDPOINT_URL') or None
+
+# Vida de una sesion en segundos; DynamoDB borra los items vencidos por el atributo TTL expiresAt
+SESSION_DURACION = int(os.environ.get('SESSION_DURACION', '86400'))
+SESSION_TTL_ATRIBUTO = 'expiresAt'
+
+# Cache en proceso de verificaciones de sesion (segundos / numero de entradas).
+# SESSION_CACHE_TTL es la ventana de revocacion del modo "string": un logout se ve al instante en el
+# worker que lo atiende, pero los demas workers pueden seguir aceptando la sesion hasta este tiempo.
+# Debe quedar corto; para revocacion compartida entre workers usar SESSION_MODO=token
+SESSION_CACHE_TTL = float(os.environ.get('SESSION_CACHE_TTL', '5'))
+SESSION_CACHE_NEGATIVE_TTL = float(os.environ.get('SESSION_CACHE_NEGATIVE_TTL', '5'))
+SESSION_CACHE_MAXSIZE = int(os.environ.get('SESSION_CACHE_MAXSIZE', '10000'))
+
+# Modo de sesion: "string" (128 hex, cada verificacion consulta DynamoDB) o "token" (firmado con HMAC,
+# se verifica solo con CPU y DynamoDB guarda las revocaciones)
+SESSION_MODO = os.environ.get('SESSION_MODO', 'string')
+# Obligatorio con SESSION_MODO=token (la app no arranca sin el); debe ser el mismo en todos los workers e instancias
+SESSION_TOKEN_SECRETO = os.environ.get('SESSION_TOKEN_SECRETO') or None
+# Cada cuanto se recarga el conjunto de revocaciones (segundos): es lo que tarda un logout en verse en otros workers
+SESSION_REVOCACION_INTERVALO = float(os.environ.get('SESSION_REVOCACION_INTERVALO', '15'))
+
+# ===== CONFIGURACION PAGINACION =====
+PAGINACION_LIMITE_DEFECTO = int(os.environ.get('PAGINACION_LIMITE_DEFECTO', '100'))
+PAGINACION_LIMITE_MAXIMO = int(os.environ.get('PAGINACION_LIMITE_MAXIMO', '1000'))
+STREAM_TAMANO_LOTE = int(os.environ.get('STREAM_TAMANO_LOTE', '500'))
+
+# ===== CONFIGURACION CARGA MASIVA =====
+BULK_TAMANO_LOTE = int(os.environ.get('BULK_TAMANO_LOTE', '1000'))
+BULK_MAX_REGISTROS = int(os.environ.get('BULK_MAX_REGISTROS', '50000'))
+
+# ===== CONFIGURACION IMPORTACION CSV =====
+IMPORT_TAMANO_LOTE = int(os.environ.get('IMPORT_TAMANO_LOTE', '5000'))
+IMPORT_REPORTE_CADA = int(os.environ.get('IMPORT_REPORTE_CADA', '50000'))
+# Directorio propio de la app (nunca el temporal compartido): /alumnos/import/rechazos solo sirve de aqui
+IMPORT_RECHAZOS_DIR = os.environ.get('IMPORT_RECHAZOS_DIR', os.path.join(tempfile.gettempdir(), 'sicei-rechazos'))
+# Los CSV de rechazos se borran pasada esta edad (segundos)
+IMPORT_RECHAZOS_EDAD_MAXIMA = int(os.environ.get('IMPORT_RECHAZOS_EDAD_MAXIMA', '86400'))
+
+# ===== CONFIGURACION ESTADISTICAS =====
+# Resultados memorizados por proceso; una escritura invalida solo la cache del worker que la atendio:
+# con varios workers de gunicorn los demas pueden servir estadisticas viejas hasta ESTADISTICAS_CACHE_TTL
+ESTADISTICAS_CACHE_TTL = float(os.environ.get('ESTADISTICAS_CACHE_TTL', '300'))
+ESTADISTICAS_BINS_DEFECTO = int(os.environ.get('ESTADISTICAS_BINS_DEFECTO', '10'))
+ESTADISTICAS_BINS_MAXIMO = int(os.environ.get('ESTADISTICAS_BINS_MAXIMO', '100'))
+# Resultados guardados por tabla (uno por cada valor de bins pedido)
+ESTADISTICAS_CACHE_MAXIMO = int(os.environ.get('ESTADISTICAS_CACHE_MAXIMO', '16'))
+
+# ===== CONFIGURACION CACHE DE ENTIDADES =====
+# Backend "memoria" (por proceso) o "redis" (compartido entre workers; requiere el paquete redis).
+# Con "memoria" y varios workers de gunicorn, una escritura solo invalida la copia del worker que la
+# atendio: los demas sirven la entidad (y su ETag) anterior hasta ENTIDAD_CACHE_TTL segundos.
+# Si se define ENTIDAD_CACHE_REDIS_URL el backend por defecto es "redis"
+ENTIDAD_CACHE_REDIS_URL = os.environ.get('ENTIDAD_CACHE_REDIS_URL') or None
+ENTIDAD_CACHE_BACKEND = os.environ.get('ENTIDAD_CACHE_BACKEND', 'redis' if ENTIDAD_CACHE_REDIS_URL else 'memoria')
+ENTIDAD_CACHE_TTL = int(os.environ.get('ENTIDAD_CACHE_TTL', '60'))
+ENTIDAD_CACHE_MAXSIZE = int(os.environ.get('ENTIDAD_CACHE_MAXSIZE', '10000'))
+
+# ===== CONFIGURACION METRICAS (/metrics en formato Prometheus) =====
+METRICAS_ACTIVAS = os.environ.get('METRICAS_ACTIVAS', 'true').lower() in ('1', 'true', 'si', 'yes')
+# Con varios workers de gunicorn: directorio compartido donde cada proceso publica sus metricas cada intervalo
+METRICAS_DIR = os.environ.get('METRICAS_DIR') or None
+METRICAS_INTERVALO = float(os.environ.get('METRICAS_INTERVALO', '5'))
+
+# ===== CONFIGURACION PERFILADO POR PETICION (perfilado.py) =====
+# Token de administrador para la cabecera X-Perfilar; sin token no se instala ningun hook
+PERFILADO_TOKEN = os.environ.get('PERFILADO_TOKEN') or None
+# Si se define, solo estas plantillas de ruta se pueden perfilar (siempre con el token),
+# p. ej. "/alumnos/<int:alumno_id>/session/verify"
+PERFILADO_RUTAS = {ruta.strip() for ruta in os.environ.get('PERFILADO_RUTAS', '').split(',') if ruta.strip()}
+PERFILADO_HABILITADO = PERFILADO_TOKEN is not None
+# Intervalo del muestreador de pilas (segundos)
+PERFILADO_INTERVALO = float(os.environ.get('PERFILADO_INTERVALO', '0.005'))
+# Directorio propio de la app (0700, perfiles 0600) y cuantos perfiles se conservan; los mas viejos se borran
+PERFILADO_DIR = os.environ.get('PERFILADO_DIR', os.path.join(tempfile.gettempdir(), 'sicei-perfiles'))
+PERFILADO_MAXIMO = int(os.environ.get('PERFILADO_MAXIMO', '200'))
+
+# ===== CONFIGURACION MODO GEVENT (api_rest.py con MODO_SERVIDOR=gevent) =====
+MODO_SERVIDOR = os.environ.get('MODO_SERVIDOR', 'sync')
+# Maximo de peticiones en vuelo por proceso
+GEVENT_CONEXIONES = int(os.environ.get('GEVENT_CONEXIONES', '1000'))
+
+# ===== CONFIGURACION POOL DE CONEXIONES A LA BASE (MySQL/RDS) =====
+# Cada proceso abre hasta DB_POOL_SIZE + DB_MAX_OVERFLOW conexiones (y otras tantas a la replica):
+# el total por host es workers de gunicorn x (DB_POOL_SIZE + DB_MAX_OVERFLOW) y debe quedar por
+# debajo de max_connections de RDS. El mismo valor en modo sync y gevent; con gevent los greenlets
+# que no alcanzan conexion esperan hasta DB_POOL_TIMEOUT en vez de abrir mas. Para subirlo, fijar
+# DB_MAX_OVERFLOW de forma explicita
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', '20'))
+DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT', '30'))
+# Por debajo del wait_timeout/idle de RDS; pre_ping descarta conexiones muertas
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', '280'))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'si', 'yes')
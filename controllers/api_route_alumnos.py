@@ -1,5 +1,16 @@
-from flask import request, jsonify
-from app import app, db, Alumno, validar_nombre, validar_matricula, validar_promedio, validar_alumno_payload
+from flask import request, jsonify, send_file
+from app import app, db, en_primario, Alumno, validar_id, validar_promedio, validar_alumno_payload, ESQUEMA_ALUMNO
+from listados import listar, responder_con_etag, etag_registro, campos_solicitados
+from cache_entidades import cache_entidades
+from carga_masiva import carga_masiva
+from estadisticas import estadisticas, invalidar_estadisticas
+from sqlalchemy.exc import IntegrityError
+from importacion_csv import importar_alumnos_csv, nuevo_archivo_rechazos, ruta_rechazos
+from config import IMPORT_TAMANO_LOTE, SNS_ENVIO_ASINCRONO, SNS_MAX_ALUMNOS_POR_ENVIO, SESSION_MODO
+import io
+import json
+import os
+import time
 
 try:
     from services.s3_service import S3Service
@@ -10,10 +21,14 @@ except Exception as e:
 
 try:
     from services.sns_service import SNSService
+    from services.notificacion_worker import NotificacionWorker
+    from services.notificacion_jobs import NotificacionJobs
     sns_service = SNSService()
+    notificacion_worker = NotificacionWorker(sns_service, NotificacionJobs())
 except Exception as e:
     print(f"Erreur import SNSService : {e}")
     sns_service = None
+    notificacion_worker = None
 
 try:
     from services.dynamodb_service import DynamoDBService
@@ -22,12 +37,44 @@ except Exception as e:
     print(f"Erreur import DynamoDBService : {e}")
     dynamodb_service = None
 
+# Login, verify y logout usan el modo de sesion configurado; los dos comparten la tabla de DynamoDB
+if dynamodb_service is not None and SESSION_MODO == 'token':
+    from services.token_service import TokenSesionService
+    sesiones = TokenSesionService(dynamodb_service)
+else:
+    sesiones = dynamodb_service
+
 CAMPOS_PERMITIDOS_EN_PUT = {"id", "nombres", "apellidos", "matricula", "promedio", "password"}
+CAMPOS_BULK = ("nombres", "apellidos", "matricula", "promedio", "password")
+FILTROS_EMAIL = {"promedioMin", "promedioMax"}
+CABECERA_SESION = "X-Session-String"
+
+def sesion_del_alumno(alumno_id):
+
+    # Rutas que gestionan todas las sesiones de un alumno: exigen una sesion activa de ese alumno,
+    # en la cabecera X-Session-String o como sessionString en el cuerpo JSON.
+    # Devuelve (session, None) o (None, respuesta de error)
+    data = request.get_json(silent=True)
+    session_string = request.headers.get(CABECERA_SESION)
+    if not session_string and isinstance(data, dict):
+        session_string = data.get("sessionString")
+
+    if not isinstance(session_string, str) or not session_string:
+        return None, (jsonify({"error": f"Se requiere una sesión del alumno ({CABECERA_SESION})"}), 401)
+
+    session = sesiones.obtener_sesion_activa(session_string)
+
+    if session is None:
+        return None, (jsonify({"error": "Sesión inválida o inactiva"}), 401)
+
+    if session.get("alumnoId") != alumno_id:
+        return None, (jsonify({"error": "Sesión no pertenece a este alumno"}), 403)
+
+    return session, None
 
 @app.route("/alumnos", methods=["GET"])
 def alumnos_get():
-    alumnos = Alumno.query.all()
-    return jsonify([alumno.to_dict() for alumno in alumnos]), 200
+    return listar(Alumno)
 
 
 @app.route("/alumnos", methods=["POST"])
@@ -53,20 +100,103 @@ def alumnos_create():
     )
     
     db.session.add(nuevo_alumno)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"errors": {"matricula": "Matrícula duplicada."}}), 400
+
+    invalidar_estadisticas(Alumno)
 
     return jsonify(nuevo_alumno.to_dict()), 201
 
 
+@app.route("/alumnos/stats", methods=["GET"])
+def alumnos_stats():
+    return estadisticas(Alumno, "promedio")
+
+
+@app.route("/alumnos/bulk", methods=["POST"])
+def alumnos_bulk_create():
+    resultado, status = carga_masiva(Alumno, ESQUEMA_ALUMNO, CAMPOS_BULK)
+    if resultado.get("inserted"):
+        invalidar_estadisticas(Alumno)
+    return jsonify(resultado), status
+
+
+@app.route("/alumnos/import", methods=["POST"])
+def alumnos_import_csv():
+
+    if 'archivo' not in request.files:
+        return jsonify({"error": "No se proporcionó ningún archivo CSV"}), 400
+
+    archivo = request.files['archivo']
+
+    tamano_lote = IMPORT_TAMANO_LOTE
+    if "batchSize" in request.args:
+        tamano_lote = validar_id(request.args.get("batchSize"))
+        if tamano_lote is None:
+            return jsonify({"error": "batchSize inválido"}), 400
+
+    # Werkzeug ya guarda el archivo subido en disco; se lee como flujo de texto
+    texto = io.TextIOWrapper(archivo.stream, encoding="utf-8-sig", newline="")
+    nombre_rechazos, archivo_rechazos = nuevo_archivo_rechazos()
+    id_anterior = max_id_alumnos()
+
+    try:
+        with open(archivo_rechazos, "w", newline="", encoding="utf-8") as rechazos:
+            resumen = importar_alumnos_csv(texto, rechazos, tamano_lote)
+    finally:
+        texto.detach()
+
+    # Los lotes ya confirmados quedan en la base aunque el CSV se corte a la mitad
+    if resumen["inserted"]:
+        invalidar_estadisticas(Alumno)
+        cache_entidades.invalidar_ids(Alumno, range(id_anterior + 1, max_id_alumnos() + 1))
+
+    if resumen["rejected"]:
+        resumen["rejectsFile"] = nombre_rechazos
+    else:
+        os.remove(archivo_rechazos)
+
+    # CSV ilegible a partir de errorLine: 400 con el resumen parcial
+    return jsonify(resumen), 400 if "error" in resumen else 200
+
+
+def max_id_alumnos():
+    return db.session.execute(db.select(db.func.max(Alumno.id)), bind_arguments=en_primario()).scalar() or 0
+
+
+@app.route("/alumnos/import/rechazos/<nombre>", methods=["GET"])
+def alumnos_import_rechazos(nombre):
+    ruta = ruta_rechazos(nombre)
+    if ruta is None:
+        return jsonify({"error": "Archivo de rechazos no encontrado"}), 404
+    return send_file(ruta, mimetype="text/csv", as_attachment=True, download_name=nombre)
+
+
 @app.route("/alumnos/<int:alumno_id>", methods=["GET"])
 def alumno_get(alumno_id):
 
-    alumno = Alumno.query.get(alumno_id)
+    try:
+        campos = campos_solicitados(Alumno)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
     
     if alumno is None:
         return jsonify({"error": "Alumno no encontrado"}), 404
+
+    def construir():
+        # password no esta en la cache: solo se lee si la respuesta lo incluye y no es un 304
+        if campos is None or "password" in campos:
+            alumno.password = db.session.execute(
+                db.select(Alumno.password).where(Alumno.id == alumno_id)
+            ).scalar()
+        return jsonify(alumno.to_dict(campos)), 200
     
-    return jsonify(alumno.to_dict()), 200
+    return responder_con_etag(etag_registro(alumno), construir)
 
 
 @app.route("/alumnos/<int:alumno_id>", methods=["DELETE"])
@@ -80,6 +210,8 @@ def alumno_delete(alumno_id):
     db.session.delete(alumno)
     
     db.session.commit()
+    cache_entidades.invalidar(Alumno, alumno_id)
+    invalidar_estadisticas(Alumno)
     
     return jsonify({"message": "Alumno eliminado"}), 200
 
@@ -96,41 +228,7 @@ def alumno_update(alumno_id):
     
     data_to_update = {k: v for k, v in data.items() if k != "id"}
     
-    errors = {}
-    validated_data = {}
-    
-    if "nombres" in data_to_update:
-        nombres = validar_nombre(data_to_update.get("nombres"))
-        if nombres is None:
-            errors["nombres"] = "Nombre inválido."
-        else:
-            validated_data["nombres"] = nombres
-    
-    if "apellidos" in data_to_update:
-        apellidos = validar_nombre(data_to_update.get("apellidos"))
-        if apellidos is None:
-            errors["apellidos"] = "Apellido inválido."
-        else:
-            validated_data["apellidos"] = apellidos
-    
-    if "matricula" in data_to_update:
-        matricula = validar_matricula(data_to_update.get("matricula"))
-        if matricula is None:
-            errors["matricula"] = "Matrícula inválida."
-        else:
-            validated_data["matricula"] = matricula
-    
-    if "promedio" in data_to_update:
-        promedio = validar_promedio(data_to_update.get("promedio"))
-        if promedio is None:
-            errors["promedio"] = "Promedio inválido."
-        else:
-            validated_data["promedio"] = promedio
-    
-    if "password" in data_to_update:
-        password = data_to_update.get("password")
-        if password is not None and isinstance(password, str):
-            validated_data["password"] = password
+    validated_data, errors = ESQUEMA_ALUMNO.validar(data_to_update)
     
     if errors:
         return jsonify({"errors": errors}), 400
@@ -143,11 +241,42 @@ def alumno_update(alumno_id):
     for key, value in validated_data.items():
         setattr(alumno, key, value)
     
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"errors": {"matricula": "Matrícula duplicada."}}), 400
+    
+    cache_entidades.invalidar(Alumno, alumno_id)
+    invalidar_estadisticas(Alumno)
     
     return jsonify(alumno.to_dict()), 200
 
 
+def cambiar_foto_perfil(alumno, foto_url):
+
+    # Las variantes de la foto anterior dejan de valer; las nuevas se registran cuando el worker termina
+    alumno.fotoPerfilUrl = foto_url
+    alumno.fotoPerfilVariantesUrls = None
+    db.session.commit()
+    cache_entidades.invalidar(Alumno, alumno.id)
+
+    alumno_id = alumno.id
+
+    def registrar_variantes(variantes):
+        # Corre en el hilo del pool de procesos; si la foto ya cambio no se toca nada
+        with app.app_context():
+            db.session.execute(
+                db.update(Alumno)
+                .where(Alumno.id == alumno_id, Alumno.fotoPerfilUrl == foto_url)
+                .values(fotoPerfilVariantesUrls=json.dumps(variantes, sort_keys=True))
+            )
+            db.session.commit()
+            cache_entidades.invalidar(Alumno, alumno_id)
+
+    s3_service.generar_variantes(s3_service.key_de_url(foto_url), registrar_variantes)
+
+
 @app.route("/alumnos/<int:alumno_id>/fotoPerfil", methods=["POST"])
 def upload_foto_perfil(alumno_id):
     
@@ -174,8 +303,7 @@ def upload_foto_perfil(alumno_id):
         if foto_url is None:
             return jsonify({"error": "Error al subir la foto a S3"}), 500
         
-        alumno.fotoPerfilUrl = foto_url
-        db.session.commit()
+        cambiar_foto_perfil(alumno, foto_url)
         
         return jsonify(alumno.to_dict()), 200
         
@@ -186,6 +314,66 @@ def upload_foto_perfil(alumno_id):
         return jsonify({"error": "Error interno del servidor"}), 500
 
 
+@app.route("/alumnos/<int:alumno_id>/fotoPerfil/presign", methods=["POST"])
+def presign_foto_perfil(alumno_id):
+
+    if s3_service is None:
+        return jsonify({
+            "error": "Servicio S3 no disponible"
+        }), 500
+
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
+    if alumno is None:
+        return jsonify({"error": "Alumno no encontrado"}), 404
+
+    data = request.get_json(silent=True)
+
+    if not data or not data.get("filename"):
+        return jsonify({"error": "filename requerido"}), 400
+
+    try:
+        presigned = s3_service.generar_subida_presignada(alumno_id, data.get("filename"))
+
+        if presigned is None:
+            return jsonify({"error": "Error al generar la subida a S3"}), 500
+
+        return jsonify(presigned), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
+@app.route("/alumnos/<int:alumno_id>/fotoPerfil/confirm", methods=["POST"])
+def confirmar_foto_perfil(alumno_id):
+
+    if s3_service is None:
+        return jsonify({
+            "error": "Servicio S3 no disponible"
+        }), 500
+
+    alumno = Alumno.query.get(alumno_id)
+    if alumno is None:
+        return jsonify({"error": "Alumno no encontrado"}), 404
+
+    data = request.get_json(silent=True)
+
+    if not data or "key" not in data:
+        return jsonify({"error": "key requerida"}), 400
+
+    try:
+        foto_url = s3_service.confirmar_subida(alumno_id, data.get("key"))
+
+        if foto_url is None:
+            return jsonify({"error": "Error al verificar la foto en S3"}), 500
+
+        cambiar_foto_perfil(alumno, foto_url)
+
+        return jsonify(alumno.to_dict()), 200
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+
 @app.route("/alumnos/<int:alumno_id>/email", methods=["POST"])
 def enviar_email_alumno(alumno_id):
     
@@ -194,13 +382,34 @@ def enviar_email_alumno(alumno_id):
             "error": "Servicio SNS no disponible"
         }), 500
     
-    alumno = Alumno.query.get(alumno_id)
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
     
     if alumno is None:
         return jsonify({
             "error": "Alumno no encontrado"
         }), 404
     
+    if SNS_ENVIO_ASINCRONO:
+        job_id = notificacion_worker.encolar(alumno)
+
+        if job_id is None:
+            return jsonify({
+                "error": "No se pudo encolar la notificación, intente más tarde"
+            }), 503
+
+        return jsonify({
+            "message": "Notificación encolada",
+            "jobId": job_id,
+            "statusUrl": f"/notificaciones/{job_id}",
+            "alumno": {
+                "id": alumno.id,
+                "nombres": alumno.nombres,
+                "apellidos": alumno.apellidos,
+                "matricula": alumno.matricula,
+                "promedio": alumno.promedio
+            }
+        }), 202, {"Location": f"/notificaciones/{job_id}"}
+
     success = sns_service.enviar_notificacion_alumno(alumno)
     
     if success:
@@ -221,6 +430,109 @@ def enviar_email_alumno(alumno_id):
         }), 500
 
 
+@app.route("/alumnos/email", methods=["POST"])
+def enviar_email_alumnos():
+
+    if sns_service is None:
+        return jsonify({
+            "error": "Servicio SNS no disponible"
+        }), 500
+
+    data = request.get_json(silent=True)
+
+    if not isinstance(data, dict) or ("ids" not in data and "filtro" not in data and "todos" not in data):
+        return jsonify({
+            "error": "Se requiere una lista 'ids', un 'filtro' o 'todos': true"
+        }), 400
+
+    # Notificar a todo el padron debe pedirse de forma explicita, nunca por un filtro vacio
+    if "todos" in data:
+        if data["todos"] is not True or "ids" in data or "filtro" in data:
+            return jsonify({"error": "'todos' solo acepta true y no se combina con 'ids' ni 'filtro'"}), 400
+
+    query = Alumno.query
+    ids = None
+
+    if "ids" in data:
+        if not isinstance(data["ids"], list) or not data["ids"]:
+            return jsonify({"error": "ids debe ser una lista no vacía"}), 400
+
+        ids = [validar_id(alumno_id) for alumno_id in data["ids"]]
+        if None in ids:
+            return jsonify({"error": "ids contiene valores inválidos"}), 400
+
+        ids = list(dict.fromkeys(ids))
+        query = query.filter(Alumno.id.in_(ids))
+
+    if "filtro" in data:
+        filtro = data["filtro"]
+        if not isinstance(filtro, dict):
+            return jsonify({"error": "filtro inválido"}), 400
+
+        if not filtro:
+            return jsonify({"error": "filtro vacío: use 'todos': true para notificar a todos los alumnos"}), 400
+
+        desconocidos = sorted(set(filtro) - FILTROS_EMAIL)
+        if desconocidos:
+            return jsonify({"error": f"Campos de filtro desconocidos: {', '.join(desconocidos)}"}), 400
+
+        errors = {}
+
+        if "promedioMin" in filtro:
+            promedio_min = validar_promedio(filtro["promedioMin"])
+            if promedio_min is None:
+                errors["promedioMin"] = "Promedio inválido."
+            else:
+                query = query.filter(Alumno.promedio >= promedio_min)
+
+        if "promedioMax" in filtro:
+            promedio_max = validar_promedio(filtro["promedioMax"])
+            if promedio_max is None:
+                errors["promedioMax"] = "Promedio inválido."
+            else:
+                query = query.filter(Alumno.promedio <= promedio_max)
+
+        if errors:
+            return jsonify({"errors": errors}), 400
+
+    # Una sola consulta para todo el grupo
+    alumnos = query.order_by(Alumno.id).limit(SNS_MAX_ALUMNOS_POR_ENVIO + 1).all()
+
+    if len(alumnos) > SNS_MAX_ALUMNOS_POR_ENVIO:
+        return jsonify({
+            "error": f"Máximo {SNS_MAX_ALUMNOS_POR_ENVIO} alumnos por envío"
+        }), 413
+
+    resultados = sns_service.enviar_notificaciones_lote(alumnos)
+    resultados.sort(key=lambda resultado: resultado["alumnoId"])
+
+    encontrados = {alumno.id for alumno in alumnos}
+    enviados = sum(1 for resultado in resultados if resultado["success"])
+
+    return jsonify({
+        "sent": enviados,
+        "failed": len(resultados) - enviados,
+        "notFound": [alumno_id for alumno_id in ids if alumno_id not in encontrados] if ids else [],
+        "results": resultados
+    }), 200
+
+
+@app.route("/notificaciones/<job_id>", methods=["GET"])
+def notificacion_estado(job_id):
+
+    if notificacion_worker is None:
+        return jsonify({
+            "error": "Servicio SNS no disponible"
+        }), 500
+
+    job = notificacion_worker.estado(job_id)
+
+    if job is None:
+        return jsonify({"error": "Notificación no encontrada"}), 404
+
+    return jsonify(job), 200
+
+
 @app.route("/alumnos/<int:alumno_id>/session/login", methods=["POST"])
 def alumno_session_login(alumno_id):
     
@@ -238,19 +550,22 @@ def alumno_session_login(alumno_id):
     
     password = data.get('password')
     
-    alumno = Alumno.query.get(alumno_id)
+    # El password nunca se cachea: se compara con el del primario
+    guardado = db.session.execute(
+        db.select(Alumno.password).where(Alumno.id == alumno_id), bind_arguments=en_primario()
+    ).one_or_none()
     
-    if alumno is None:
+    if guardado is None:
         return jsonify({
             "error": "Alumno no encontrado"
         }), 404
     
-    if alumno.password != password:
+    if guardado.password != password:
         return jsonify({
             "error": "Contraseña incorrecta"
         }), 400
     
-    session_data = dynamodb_service.crear_sesion(alumno_id)
+    session_data = sesiones.crear_sesion(alumno_id)
     
     if session_data is None:
         return jsonify({
@@ -283,19 +598,18 @@ def alumno_session_verify(alumno_id):
     
     session_string = data.get('sessionString')
     
-    alumno = Alumno.query.get(alumno_id)
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
     
     if alumno is None:
         return jsonify({
             "error": "Alumno no encontrado"
         }), 404
     
-    is_valid = dynamodb_service.verificar_sesion(session_string)
-    
-    if is_valid:
-        session = dynamodb_service.obtener_sesion_por_string(session_string)
-        
-        if session and session.get('alumnoId') == alumno_id:
+    session = sesiones.obtener_sesion_activa(session_string)
+
+    if session is not None:
+
+        if session.get('alumnoId') == alumno_id:
             return jsonify({
                 "message": "Sesión válida",
                 "valid": True,
@@ -332,14 +646,14 @@ def alumno_session_logout(alumno_id):
     
     session_string = data.get('sessionString')
     
-    alumno = Alumno.query.get(alumno_id)
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
     
     if alumno is None:
         return jsonify({
             "error": "Alumno no encontrado"
         }), 404
     
-    session = dynamodb_service.obtener_sesion_por_string(session_string)
+    session = sesiones.obtener_sesion_por_string(session_string)
     
     if session is None:
         return jsonify({
@@ -351,7 +665,7 @@ def alumno_session_logout(alumno_id):
             "error": "Sesión no pertenece a este alumno"
         }), 400
     
-    success = dynamodb_service.cerrar_sesion(session_string)
+    success = sesiones.cerrar_sesion(session_string, session=session)
     
     if success:
         return jsonify({
@@ -364,4 +678,103 @@ def alumno_session_logout(alumno_id):
         }), 500
 
 
+@app.route("/alumnos/<int:alumno_id>/sessions", methods=["GET"])
+def alumno_sessions_list(alumno_id):
+
+    if dynamodb_service is None:
+        return jsonify({
+            "error": "Servicio DynamoDB no disponible"
+        }), 500
+
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
+
+    if alumno is None:
+        return jsonify({
+            "error": "Alumno no encontrado"
+        }), 404
+
+    _, error = sesion_del_alumno(alumno_id)
+
+    if error is not None:
+        return error
+
+    registros = dynamodb_service.listar_sesiones(alumno_id)
+
+    if registros is None:
+        return jsonify({
+            "error": "Error al consultar las sesiones"
+        }), 500
+
+    # Nunca se devuelve el sessionString: es la credencial de la sesion
+    ahora = int(time.time())
+    items = []
+    for session in registros:
+        expira = dynamodb_service.expiracion(session)
+        items.append({
+            "sessionId": session['id'],
+            "fecha": int(session['fecha']),
+            "expiresAt": expira,
+            "active": session.get('active') is True and expira > ahora
+        })
+
+    return jsonify({
+        "alumnoId": alumno_id,
+        "count": len(items),
+        "sessions": items
+    }), 200
+
+
+@app.route("/alumnos/<int:alumno_id>/session/logout-all", methods=["POST"])
+def alumno_session_logout_all(alumno_id):
+
+    if dynamodb_service is None:
+        return jsonify({
+            "error": "Servicio DynamoDB no disponible"
+        }), 500
+
+    alumno = cache_entidades.obtener(Alumno, alumno_id)
+
+    if alumno is None:
+        return jsonify({
+            "error": "Alumno no encontrado"
+        }), 404
+
+    _, error = sesion_del_alumno(alumno_id)
+
+    if error is not None:
+        return error
+
+    cerradas = sesiones.cerrar_sesiones_alumno(alumno_id)
+
+    if cerradas is None:
+        return jsonify({
+            "error": "Error al cerrar las sesiones"
+        }), 500
+
+    return jsonify({
+        "message": "Sesiones cerradas",
+        "alumnoId": alumno_id,
+        "sessionsClosed": cerradas
+    }), 200
+
+
+@app.route("/sesiones/cache", methods=["GET"])
+def sesiones_cache_stats():
+
+    if dynamodb_service is None:
+        return jsonify({
+            "error": "Servicio DynamoDB no disponible"
+        }), 500
+
+    estadisticas_sesiones = dynamodb_service.cache.estadisticas()
+
+    if sesiones is not dynamodb_service:
+        estadisticas_sesiones["revocaciones"] = sesiones.revocaciones.estadisticas()
+
+    return jsonify(estadisticas_sesiones), 200
+
+
+@app.route("/entidades/cache", methods=["GET"])
+def entidades_cache_stats():
 
+    return jsonify(cache_entidades.estadisticas()), 200
@@ -1,12 +1,16 @@
 from flask import request, jsonify
-from app import app, db, Profesor, validar_nombre, validar_horas, validar_id, validar_profesor_payload
+from app import app, db, Profesor, validar_profesor_payload, ESQUEMA_PROFESOR
+from listados import listar, responder_con_etag, etag_registro, campos_solicitados
+from cache_entidades import cache_entidades
+from carga_masiva import carga_masiva
+from estadisticas import estadisticas, invalidar_estadisticas
 
 CAMPOS_PERMITIDOS_EN_PUT = {"id", "nombres", "apellidos", "numeroEmpleado", "horasClase"}
+CAMPOS_BULK = ("nombres", "apellidos", "numeroEmpleado", "horasClase")
 
 @app.route("/profesores", methods=["GET"])
 def profesores_get():
-    profesores = Profesor.query.all()
-    return jsonify([profesor.to_dict() for profesor in profesores]), 200
+    return listar(Profesor)
 
 
 @app.route("/profesores", methods=["POST"])
@@ -31,18 +35,37 @@ def profesores_create():
     
     db.session.add(nuevo_profesor)
     db.session.commit()
+    invalidar_estadisticas(Profesor)
 
     return jsonify(nuevo_profesor.to_dict()), 201
 
 
+@app.route("/profesores/stats", methods=["GET"])
+def profesores_stats():
+    return estadisticas(Profesor, "horasClase")
+
+
+@app.route("/profesores/bulk", methods=["POST"])
+def profesores_bulk_create():
+    resultado, status = carga_masiva(Profesor, ESQUEMA_PROFESOR, CAMPOS_BULK)
+    if resultado.get("inserted"):
+        invalidar_estadisticas(Profesor)
+    return jsonify(resultado), status
+
+
 @app.route("/profesores/<int:profesor_id>", methods=["GET"])
 def profesor_get(profesor_id):
-    profesor = Profesor.query.get(profesor_id)
+    try:
+        campos = campos_solicitados(Profesor)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    profesor = cache_entidades.obtener(Profesor, profesor_id)
     
     if profesor is None:
         return jsonify({"error": "Profesor no encontrado"}), 404
     
-    return jsonify(profesor.to_dict()), 200
+    return responder_con_etag(etag_registro(profesor), lambda: (jsonify(profesor.to_dict(campos)), 200))
 
 
 @app.route("/profesores/<int:profesor_id>", methods=["DELETE"])
@@ -54,6 +77,8 @@ def profesor_delete(profesor_id):
     
     db.session.delete(profesor)
     db.session.commit()
+    cache_entidades.invalidar(Profesor, profesor_id)
+    invalidar_estadisticas(Profesor)
     
     return jsonify({"message": "Profesor eliminado"}), 200
 
@@ -70,36 +95,7 @@ def profesor_update(profesor_id):
     
     data_to_update = {k: v for k, v in data.items() if k != "id"}
     
-    errors = {}
-    validated_data = {}
-    
-    if "nombres" in data_to_update:
-        nombres = validar_nombre(data_to_update.get("nombres"))
-        if nombres is None:
-            errors["nombres"] = "Nombre inválido."
-        else:
-            validated_data["nombres"] = nombres
-    
-    if "apellidos" in data_to_update:
-        apellidos = validar_nombre(data_to_update.get("apellidos"))
-        if apellidos is None:
-            errors["apellidos"] = "Apellido inválido."
-        else:
-            validated_data["apellidos"] = apellidos
-    
-    if "numeroEmpleado" in data_to_update:
-        numeroEmpleado = validar_id(data_to_update.get("numeroEmpleado"))
-        if numeroEmpleado is None:
-            errors["numeroEmpleado"] = "Número de empleado inválido."
-        else:
-            validated_data["numeroEmpleado"] = numeroEmpleado
-    
-    if "horasClase" in data_to_update:
-        horasClase = validar_horas(data_to_update.get("horasClase"))
-        if horasClase is None:
-            errors["horasClase"] = "Horas de clase inválidas."
-        else:
-            validated_data["horasClase"] = horasClase
+    validated_data, errors = ESQUEMA_PROFESOR.validar(data_to_update)
     
     if errors:
         return jsonify({"errors": errors}), 400
@@ -113,6 +109,8 @@ def profesor_update(profesor_id):
         setattr(profesor, key, value)
     
     db.session.commit()
+    cache_entidades.invalidar(Profesor, profesor_id)
+    invalidar_estadisticas(Profesor)
     
     return jsonify(profesor.to_dict()), 200
 
@@ -0,0 +1,126 @@
+import math
+import threading
+from flask import request, jsonify
+from app import db, validar_id, en_primario
+from services.cache_service import CacheTTL
+from config import ESTADISTICAS_CACHE_TTL, ESTADISTICAS_CACHE_MAXIMO, ESTADISTICAS_BINS_DEFECTO, ESTADISTICAS_BINS_MAXIMO
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+PERCENTILES = (25, 50, 75, 90, 95, 99)
+
+# Una cache por tabla: cualquier escritura la vacia completa. Se llena leyendo del primario,
+# si no el primer calculo tras una escritura podria guardar datos viejos de la replica.
+# Cada invalidacion avanza la generacion de la tabla: un calculo que empezo antes no se guarda.
+# Todo es por proceso: los demas workers ven la escritura cuando vence ESTADISTICAS_CACHE_TTL
+_caches = {}
+_generaciones = {}
+_lock = threading.Lock()
+
+# ===== ESTADISTICAS DE UNA COLUMNA NUMERICA =====
+
+def _cache(modelo):
+    return _caches.setdefault(modelo.__tablename__, CacheTTL(maxsize=ESTADISTICAS_CACHE_MAXIMO, ttl=ESTADISTICAS_CACHE_TTL))
+
+def invalidar_estadisticas(modelo):
+    with _lock:
+        _generaciones[modelo.__tablename__] = _generaciones.get(modelo.__tablename__, 0) + 1
+        _cache(modelo).limpiar()
+
+def _agregados(modelo, columna):
+    # count, avg, min y max los resuelve la base de datos en una sola consulta
+    total, cantidad, media, minimo, maximo = db.session.execute(
+        db.select(
+            db.func.count(),
+            db.func.count(columna),
+            db.func.avg(columna),
+            db.func.min(columna),
+            db.func.max(columna)
+        ).select_from(modelo),
+        bind_arguments=en_primario()
+    ).one()
+    return total, cantidad, media, minimo, maximo
+
+def _percentil(ordenados, p):
+    # Interpolacion lineal, igual que numpy.percentile
+    posicion = (len(ordenados) - 1) * p / 100
+    inferior = int(posicion)
+    superior = min(inferior + 1, len(ordenados) - 1)
+    return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+def _histograma(ordenados, bins):
+    # Mismos bordes que numpy.histogram: intervalos iguales y el ultimo cerrado
+    minimo, maximo = ordenados[0], ordenados[-1]
+    if minimo == maximo:
+        minimo, maximo = minimo - 0.5, maximo + 0.5
+    ancho = (maximo - minimo) / bins
+    bordes = [minimo + ancho * i for i in range(bins)] + [maximo]
+    conteos = [0] * bins
+    for valor in ordenados:
+        conteos[min(int((valor - minimo) / ancho), bins - 1)] += 1
+    return bordes, conteos
+
+def _distribucion(columna, bins):
+    # Percentiles e histograma sobre una sola columna, sin cargar objetos ORM
+    valores = db.session.execute(
+        db.select(columna).where(columna.isnot(None)), bind_arguments=en_primario()
+    ).scalars().all()
+
+    if np is not None:
+        arreglo = np.asarray(valores, dtype=np.float64)
+        percentiles = np.percentile(arreglo, PERCENTILES)
+        conteos, bordes = np.histogram(arreglo, bins=bins)
+        return float(arreglo.std()), percentiles.tolist(), bordes.tolist(), conteos.tolist()
+
+    ordenados = sorted(float(valor) for valor in valores)
+    media = math.fsum(ordenados) / len(ordenados)
+    desviacion = math.sqrt(math.fsum((valor - media) ** 2 for valor in ordenados) / len(ordenados))
+    percentiles = [_percentil(ordenados, p) for p in PERCENTILES]
+    bordes, conteos = _histograma(ordenados, bins)
+    return desviacion, percentiles, bordes, conteos
+
+def calcular_estadisticas(modelo, campo, bins):
+    columna = getattr(modelo, campo)
+    total, cantidad, media, minimo, maximo = _agregados(modelo, columna)
+
+    resultado = {
+        "campo": campo,
+        "count": cantidad,
+        "nulls": total - cantidad,
+        "mean": float(media) if media is not None else None,
+        "min": minimo,
+        "max": maximo,
+        "stddev": None,
+        "percentiles": {},
+        "histogram": {"edges": [], "counts": []}
+    }
+
+    if cantidad:
+        desviacion, percentiles, bordes, conteos = _distribucion(columna, bins)
+        resultado["stddev"] = desviacion
+        resultado["percentiles"] = {f"p{p}": valor for p, valor in zip(PERCENTILES, percentiles)}
+        resultado["histogram"] = {"edges": bordes, "counts": conteos}
+
+    return resultado
+
+def estadisticas(modelo, campo):
+    bins = ESTADISTICAS_BINS_DEFECTO
+    if "bins" in request.args:
+        bins = validar_id(request.args.get("bins"))
+        if bins is None or bins > ESTADISTICAS_BINS_MAXIMO:
+            return jsonify({"error": f"bins debe estar entre 1 y {ESTADISTICAS_BINS_MAXIMO}"}), 400
+
+    cache = _cache(modelo)
+    generacion = _generaciones.get(modelo.__tablename__, 0)
+    resultado = cache.obtener(bins)
+    if resultado is None:
+        resultado = calcular_estadisticas(modelo, campo, bins)
+        # Si hubo una escritura durante el calculo el resultado puede ser viejo: se responde, no se guarda
+        with _lock:
+            if _generaciones.get(modelo.__tablename__, 0) == generacion:
+                cache.guardar(bins, resultado)
+
+    return jsonify(resultado), 200
@@ -0,0 +1,67 @@
+import multiprocessing
+import os
+
+# ===== SERVIDOR DE PRODUCCION (gunicorn -c gunicorn.conf.py wsgi:app) =====
+# Todo se ajusta por variables de entorno, igual que config.py.
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Un proceso por nucleo (x2 + 1) para que el rendimiento escale con la instancia
+workers = int(os.environ.get('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+
+# gthread: hilos por worker para las rutas sincronas; gevent: greenlets (ver MODO_SERVIDOR en api_rest.py)
+if os.environ.get('MODO_SERVIDOR', 'sync') == 'gevent':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('GEVENT_CONEXIONES', '1000'))
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+
+# La app se importa una vez en el maestro y los workers la heredan por fork (menos memoria, arranque rapido).
+# Con preload, HUP recicla los workers pero no recarga el codigo: para desplegar usar USR2 y luego QUIT al maestro viejo.
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'si', 'yes')
+
+# Reciclado de workers: acota fugas de memoria; el jitter evita que todos reinicien a la vez
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Keep-alive mayor que el idle timeout del balanceador (60 s en ALB) para que no corte conexiones reutilizadas
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '75'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+backlog = int(os.environ.get('GUNICORN_BACKLOG', '2048'))
+
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+errorlog = '-'
+
+def on_starting(server):
+    # Las metricas de una ejecucion anterior no se suman a las de esta
+    directorio = os.environ.get('METRICAS_DIR')
+    if directorio:
+        from services.metricas_service import limpiar_instantaneas
+        limpiar_instantaneas(directorio)
+
+def post_fork(server, worker):
+    # Los sockets heredados del maestro no se comparten entre procesos: cada worker abre los suyos
+    from app import app, db
+    from services import aws_session
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+
+    aws_session.reiniciar()
+    print(f"Worker {worker.pid} listo")
+
+def worker_exit(server, worker):
+    # Reciclado o apagado ordenado: termina notificaciones y variantes ya encoladas
+    from controllers.api_route_alumnos import notificacion_worker, s3_service
+    from metricas import publicador
+
+    if notificacion_worker is not None:
+        notificacion_worker.detener()
+    if s3_service is not None:
+        s3_service.detener()
+    # Ultima instantanea: lo contado por este worker sigue sumando en /metrics
+    if publicador is not None:
+        publicador.detener()
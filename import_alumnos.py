@@ -0,0 +1,22 @@
+import argparse
+from app import app
+from importacion_csv import importar_alumnos_csv
+from config import IMPORT_TAMANO_LOTE, IMPORT_REPORTE_CADA
+
+parser = argparse.ArgumentParser(description="Importa alumnos desde un CSV (nombres, apellidos, matricula, promedio, password)")
+parser.add_argument("archivo", help="Ruta del archivo CSV")
+parser.add_argument("--batch-size", type=int, default=IMPORT_TAMANO_LOTE, help="Filas por transaccion")
+parser.add_argument("--rechazos", default=None, help="Ruta del CSV de filas rechazadas")
+parser.add_argument("--reporte-cada", type=int, default=IMPORT_REPORTE_CADA, help="Filas entre reportes de progreso")
+args = parser.parse_args()
+
+with app.app_context():
+    rechazos = open(args.rechazos, "w", newline="", encoding="utf-8") if args.rechazos else None
+    try:
+        with open(args.archivo, newline="", encoding="utf-8-sig") as archivo:
+            resumen = importar_alumnos_csv(archivo, rechazos, args.batch_size, args.reporte_cada)
+    finally:
+        if rechazos is not None:
+            rechazos.close()
+
+    print(f"Importacion terminada : {resumen['rows']} filas, {resumen['inserted']} insertadas, {resumen['rejected']} rechazadas en {resumen['seconds']}s ({resumen['rowsPerSecond']} filas/s)")
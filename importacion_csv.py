@@ -0,0 +1,137 @@
+import csv
+import os
+import re
+import stat
+import time
+import uuid
+from app import Alumno, ESQUEMA_ALUMNO
+from carga_masiva import insertar_en_lotes
+from config import IMPORT_TAMANO_LOTE, IMPORT_REPORTE_CADA, IMPORT_RECHAZOS_DIR, IMPORT_RECHAZOS_EDAD_MAXIMA
+
+CAMPOS_CSV_ALUMNOS = ("nombres", "apellidos", "matricula", "promedio", "password")
+
+# ===== ARCHIVOS DE RECHAZOS =====
+# Viven en un directorio exclusivo (0700, archivos 0600) y solo se sirven nombres generados aqui
+
+NOMBRE_RECHAZOS = re.compile(r"^rechazos_[0-9a-f]{32}\.csv$")
+
+def directorio_rechazos():
+    os.makedirs(IMPORT_RECHAZOS_DIR, mode=0o700, exist_ok=True)
+    # Si otro usuario creo antes el directorio (o es un enlace) no se usa
+    info = os.lstat(IMPORT_RECHAZOS_DIR)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{IMPORT_RECHAZOS_DIR} no es un directorio privado de esta aplicacion")
+    return IMPORT_RECHAZOS_DIR
+
+def nuevo_archivo_rechazos():
+    # Devuelve (nombre, ruta) de un CSV nuevo, creado vacio con permisos 0600
+    limpiar_rechazos()
+    nombre = f"rechazos_{uuid.uuid4().hex}.csv"
+    ruta = os.path.join(directorio_rechazos(), nombre)
+    os.close(os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600))
+    return nombre, ruta
+
+def ruta_rechazos(nombre):
+    # None si el nombre no es de un archivo de rechazos o ya expiro
+    if not NOMBRE_RECHAZOS.match(nombre):
+        return None
+    limpiar_rechazos()
+    ruta = os.path.join(IMPORT_RECHAZOS_DIR, nombre)
+    return ruta if os.path.isfile(ruta) else None
+
+def limpiar_rechazos():
+    limite = time.time() - IMPORT_RECHAZOS_EDAD_MAXIMA
+    try:
+        nombres = os.listdir(IMPORT_RECHAZOS_DIR)
+    except FileNotFoundError:
+        return
+    for nombre in nombres:
+        ruta = os.path.join(IMPORT_RECHAZOS_DIR, nombre)
+        try:
+            if NOMBRE_RECHAZOS.match(nombre) and os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+# ===== IMPORTACION CSV DE ALUMNOS =====
+
+def _limpiar_registro(registro):
+    # Las celdas vacias del CSV cuentan como campos ausentes
+    return {
+        campo: registro[campo].strip()
+        for campo in CAMPOS_CSV_ALUMNOS
+        if registro.get(campo) is not None and registro[campo].strip() != ""
+    }
+
+def importar_alumnos_csv(archivo, rechazos=None, tamano_lote=IMPORT_TAMANO_LOTE, reporte_cada=IMPORT_REPORTE_CADA):
+    # archivo: flujo de texto; solo un lote de filas vive en memoria a la vez. Si el archivo no se
+    # puede decodificar o leer a la mitad, lo ya leido queda insertado y el resumen trae "error"
+    lector = csv.DictReader(archivo)
+    escritor_rechazos = None
+
+    filas_leidas = 0
+    insertados = 0
+    rechazados = 0
+    # (linea, registro original, datos limpios) pendientes de validar e insertar
+    lote = []
+    inicio = time.monotonic()
+
+    def rechazar(linea, registro, errores):
+        nonlocal escritor_rechazos, rechazados
+        rechazados += 1
+        if rechazos is None:
+            return
+        if escritor_rechazos is None:
+            escritor_rechazos = csv.writer(rechazos)
+            escritor_rechazos.writerow(["linea"] + list(lector.fieldnames or []) + ["errores"])
+        valores = [registro.get(campo, "") for campo in (lector.fieldnames or [])]
+        escritor_rechazos.writerow([linea] + valores + ["; ".join(f"{k}: {v}" for k, v in errores.items())])
+
+    def insertar_lote():
+        nonlocal insertados
+        # Validacion del lote completo en una llamada; los indices apuntan a posiciones en lote
+        filas, indices, errores = ESQUEMA_ALUMNO.validar_lote(
+            ((posicion, datos) for posicion, (_, _, datos) in enumerate(lote)),
+            CAMPOS_CSV_ALUMNOS
+        )
+        ok, errores_insercion = insertar_en_lotes(Alumno, filas, indices, tamano_lote=tamano_lote)
+        insertados += ok
+        for error in sorted(errores + errores_insercion, key=lambda error: error["index"]):
+            linea, registro, _ = lote[error["index"]]
+            rechazar(linea, registro, error["errors"])
+        lote.clear()
+
+    error = None
+    try:
+        for registro in lector:
+            filas_leidas += 1
+            lote.append((lector.line_num, registro, _limpiar_registro(registro)))
+
+            if len(lote) >= tamano_lote:
+                insertar_lote()
+
+            if reporte_cada and filas_leidas % reporte_cada == 0:
+                transcurrido = time.monotonic() - inicio
+                print(f"Importacion : {filas_leidas} filas leidas, {insertados} insertadas, {rechazados} rechazadas ({filas_leidas / transcurrido:.0f} filas/s)")
+    except (UnicodeDecodeError, csv.Error) as e:
+        # csv.Error ocurre en la linea ya contada; el error de decodificacion, al pedir la siguiente
+        linea = lector.line_num if isinstance(e, csv.Error) else lector.line_num + 1
+        error = {"error": f"CSV inválido: {e}", "errorLine": linea}
+        print(f"Importacion interrumpida en la linea {linea} : {e}")
+
+    # Las filas pendientes se leyeron completas antes del error
+    if lote:
+        insertar_lote()
+
+    transcurrido = time.monotonic() - inicio
+
+    resumen = {
+        "rows": filas_leidas,
+        "inserted": insertados,
+        "rejected": rechazados,
+        "seconds": round(transcurrido, 3),
+        "rowsPerSecond": round(filas_leidas / transcurrido, 1) if transcurrido else None
+    }
+    if error is not None:
+        resumen.update(error)
+    return resumen
@@ -0,0 +1,16 @@
+from services.dynamodb_service import DynamoDBService
+from services.notificacion_jobs import NotificacionJobs
+
+dynamodb_service = DynamoDBService()
+
+if dynamodb_service.crear_tabla():
+    print("Success initializing DynamoDB sessions table")
+else:
+    # La tabla ya existia: se agregan los indices que le falten
+    if dynamodb_service.crear_indice_alumno():
+        print("Success adding alumnoId index to DynamoDB sessions table")
+    if dynamodb_service.crear_indice_revocadas():
+        print("Success adding revocada index to DynamoDB sessions table")
+# Estado de las notificaciones asincronas, compartido por todos los workers
+if NotificacionJobs().crear_tabla():
+    print("Success initializing DynamoDB notification jobs table")
@@ -0,0 +1,245 @@
+from flask import Response, request, jsonify, make_response, stream_with_context
+from app import db, validar_id
+import zlib
+from config import PAGINACION_LIMITE_DEFECTO, PAGINACION_LIMITE_MAXIMO, STREAM_TAMANO_LOTE
+from serializacion import SerializadorFilas, codificar_valor, salida_compacta, respuesta_json
+
+VALORES_VERDADEROS = {"1", "true", "si", "yes"}
+
+# ===== PAGINACION Y STREAMING DE LISTADOS =====
+
+def validar_limit(limit):
+    if limit is None:
+        return PAGINACION_LIMITE_DEFECTO
+    limit = validar_id(limit)
+    if limit is None:
+        return None
+    return min(limit, PAGINACION_LIMITE_MAXIMO)
+
+def validar_cursor(after, modelo=None, campo="id"):
+    # Orden por id: el cursor es el ultimo id. Otro orden: "v<valor>,id" del ultimo registro, o "n,id"
+    # si su valor es NULL. El valor se compara tal cual esta en la columna, sin los validadores de hoy:
+    # las filas viejas que ya no los pasan tambien se pueden paginar
+    if campo != "id":
+        if not isinstance(after, str) or "," not in after:
+            return None
+        valor, ultimo_id = after.rsplit(",", 1)
+        ultimo_id = validar_cursor(ultimo_id)
+        if ultimo_id is None:
+            return None
+        if valor == "n":
+            return None, ultimo_id
+        if not valor.startswith("v"):
+            return None
+        try:
+            return getattr(modelo, campo).type.python_type(valor[1:]), ultimo_id
+        except (ValueError, TypeError):
+            return None
+
+    try:
+        after = int(after)
+        if after >= 0:
+            return after
+        return None
+    except (ValueError, TypeError):
+        return None
+
+def filtros_solicitados(modelo):
+    # Condiciones WHERE a partir de ?campo= y ?campoMin= / ?campoMax=
+    args = request.args
+    condiciones = []
+    errores = {}
+
+    for campo, validar in modelo.FILTROS_EXACTOS.items():
+        if campo in args:
+            valor = validar(args.get(campo))
+            if valor is None:
+                errores[campo] = f"{campo} inválido."
+            else:
+                condiciones.append(getattr(modelo, campo) == valor)
+
+    for campo, validar in modelo.FILTROS_RANGO.items():
+        columna = getattr(modelo, campo)
+        for parametro, condicion in ((campo + "Min", columna.__ge__), (campo + "Max", columna.__le__)):
+            if parametro in args:
+                valor = validar(args.get(parametro))
+                if valor is None:
+                    errores[parametro] = f"{parametro} inválido."
+                else:
+                    condiciones.append(condicion(valor))
+
+    return condiciones, errores
+
+def orden_solicitado(modelo):
+    # ?sort=promedio ascendente, ?sort=-promedio descendente; por defecto id
+    sort = request.args.get("sort", "id")
+    descendente = sort.startswith("-")
+    campo = sort[1:] if descendente else sort
+
+    if campo not in modelo.ORDENAMIENTOS:
+        raise ValueError(f"sort inválido. Valores permitidos: {', '.join(modelo.ORDENAMIENTOS)}")
+
+    return campo, descendente
+
+def ordenar(query, modelo, campo, descendente):
+    # Siempre se desempata por id para que el orden sea total y el keyset no salte filas
+    if campo == "id":
+        return query.order_by(modelo.id.desc() if descendente else modelo.id)
+
+    # Ordenar nunca quita filas: NULL cuenta como el valor mas chico (primero ascendente, ultimo
+    # descendente). Es el orden nativo de MySQL y SQLite, asi se sigue usando el indice; MySQL no
+    # acepta NULLS FIRST/LAST y solo se escribe en los dialectos que lo aceptan
+    columna = getattr(modelo, campo)
+    orden = columna.desc() if descendente else columna.asc()
+    if db.engine.dialect.name not in ("mysql", "mariadb"):
+        orden = orden.nulls_last() if descendente else orden.nulls_first()
+    return query.order_by(orden, modelo.id.desc() if descendente else modelo.id)
+
+def paginar(query, modelo, limit, after, campo="id", descendente=False):
+    # Keyset sobre (columna, id): el costo no depende de la posicion en la tabla
+    query = ordenar(query, modelo, campo, descendente)
+
+    if after is not None:
+        if campo == "id":
+            query = query.filter(modelo.id < after if descendente else modelo.id > after)
+        else:
+            columna = getattr(modelo, campo)
+            valor, ultimo_id = after
+            if valor is None and descendente:
+                # Los NULL van al final: solo quedan los NULL con id menor
+                query = query.filter(columna.is_(None), modelo.id < ultimo_id)
+            elif valor is None:
+                # Los NULL van primero: quedan los NULL con id mayor y todos los valores
+                query = query.filter(db.or_(db.and_(columna.is_(None), modelo.id > ultimo_id), columna.isnot(None)))
+            elif descendente:
+                query = query.filter(db.or_(columna < valor, db.and_(columna == valor, modelo.id < ultimo_id), columna.is_(None)))
+            else:
+                query = query.filter(db.or_(columna > valor, db.and_(columna == valor, modelo.id > ultimo_id)))
+
+    # Se pide una fila de mas para saber si existe otra pagina
+    filas = db.session.execute(query.limit(limit + 1)).all()
+
+    next_cursor = None
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultima = filas[-1]
+        if campo == "id":
+            next_cursor = ultima.id
+        elif getattr(ultima, campo) is None:
+            next_cursor = f"n,{ultima.id}"
+        else:
+            next_cursor = f"v{getattr(ultima, campo)},{ultima.id}"
+
+    return filas, next_cursor
+
+def stream_json(query, codificar):
+    # Cursor del lado del servidor: solo un lote de filas vive en memoria a la vez
+    query = query.execution_options(yield_per=STREAM_TAMANO_LOTE)
+
+    def generar():
+        yield "["
+        separador = ""
+        lote = []
+        for fila in db.session.execute(query):
+            lote.append(codificar(fila))
+            if len(lote) >= STREAM_TAMANO_LOTE:
+                yield separador + ",".join(lote)
+                separador = ","
+                lote = []
+        if lote:
+            yield separador + ",".join(lote)
+        yield "]\n"
+
+    return Response(stream_with_context(generar()), mimetype="application/json")
+
+# ===== PROYECCION DE CAMPOS (?fields=) =====
+
+def campos_solicitados(modelo):
+    # None significa todos los campos de to_dict
+    if "fields" not in request.args:
+        return None
+
+    campos = [campo.strip() for campo in request.args.get("fields").split(",") if campo.strip()]
+    invalidos = [campo for campo in campos if campo not in modelo.CAMPOS]
+
+    if not campos or invalidos:
+        raise ValueError(f"fields inválido. Campos disponibles: {', '.join(modelo.CAMPOS)}")
+
+    return list(dict.fromkeys(campos))
+
+# ===== ETAGS / GET CONDICIONAL =====
+
+def responder_con_etag(etag, construir):
+    # Si el cliente ya tiene esta version no se consulta ni se serializa nada mas
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = make_response(construir())
+
+    respuesta.set_etag(etag)
+    return respuesta
+
+def etag_registro(registro):
+    parametros = zlib.crc32(request.query_string)
+    return f"{registro.__tablename__}-{registro.id}-{registro.version}-{parametros:08x}"
+
+def etag_listado(modelo):
+    # Agregado barato: cualquier alta o cambio mueve max(version), cualquier baja mueve count
+    max_version, total = db.session.query(db.func.max(modelo.version), db.func.count(modelo.id)).one()
+    parametros = zlib.crc32(request.query_string)
+    return f"{modelo.__tablename__}-{max_version or 0}-{total}-{parametros:08x}"
+
+def listar(modelo):
+    try:
+        campos = campos_solicitados(modelo)
+        campo_orden, descendente = orden_solicitado(modelo)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    condiciones, errores = filtros_solicitados(modelo)
+    if errores:
+        return jsonify({"errors": errores}), 400
+
+    return responder_con_etag(
+        etag_listado(modelo),
+        lambda: construir_listado(modelo, campos, condiciones, campo_orden, descendente)
+    )
+
+def construir_listado(modelo, campos, condiciones=(), campo_orden="id", descendente=False):
+    args = request.args
+    # Tuplas de columnas con Core: sin objetos ORM ni to_dict por fila
+    serializador = SerializadorFilas(modelo, campos, ("id", campo_orden))
+    query = db.select(*serializador.columnas).filter(*condiciones)
+
+    if args.get("stream", "").lower() in VALORES_VERDADEROS:
+        query = ordenar(query, modelo, campo_orden, descendente)
+        return stream_json(query, serializador.codificar)
+
+    if "limit" not in args and "after" not in args:
+        # Sin ?sort= se mantiene el orden natural de la respuesta historica
+        if "sort" in args:
+            query = ordenar(query, modelo, campo_orden, descendente)
+        filas = db.session.execute(query).all()
+        if salida_compacta():
+            return respuesta_json(serializador.codificar_lista(filas))
+        return jsonify([serializador.a_dict(fila) for fila in filas]), 200
+
+    limit = validar_limit(args.get("limit"))
+    if limit is None:
+        return jsonify({"error": "limit inválido"}), 400
+
+    after = None
+    if "after" in args:
+        after = validar_cursor(args.get("after"), modelo, campo_orden)
+        if after is None:
+            return jsonify({"error": "Cursor after inválido"}), 400
+
+    filas, next_cursor = paginar(query, modelo, limit, after, campo_orden, descendente)
+
+    if salida_compacta():
+        return respuesta_json(f'{{"items":{serializador.codificar_lista(filas)},"nextCursor":{codificar_valor(next_cursor)}}}')
+
+    return jsonify({
+        "items": [serializador.a_dict(fila) for fila in filas],
+        "nextCursor": next_cursor
+    }), 200
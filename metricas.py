@@ -0,0 +1,117 @@
+from contextvars import ContextVar
+import time
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.wsgi import ClosingIterator
+from app import app
+from services.metricas_service import registro, PublicadorMetricas, BUCKETS_CONSULTAS
+from config import METRICAS_ACTIVAS, METRICAS_DIR, METRICAS_INTERVALO
+
+# ===== METRICAS DE PETICIONES Y SQL =====
+# Un middleware WSGI mide cada peticion hasta que el servidor cierra el cuerpo, asi los listados
+# en streaming cuentan completos. La etiqueta route es la plantilla de Flask
+# (/alumnos/<int:alumno_id>), no la URL, para que el numero de series quede acotado.
+
+SIN_RUTA = "<sin_ruta>"
+METODOS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+peticiones = registro.contador(
+    "http_requests_total", "Peticiones HTTP por metodo, ruta y codigo de estado.", ("method", "route", "status")
+)
+duracion_peticiones = registro.histograma(
+    "http_request_duration_seconds", "Latencia de las peticiones HTTP hasta enviar el cuerpo completo.", ("method", "route")
+)
+consultas_por_peticion = registro.histograma(
+    "db_queries_per_request", "Consultas SQL ejecutadas por peticion.", ("method", "route"), BUCKETS_CONSULTAS
+)
+duracion_sql_por_peticion = registro.histograma(
+    "db_duration_per_request_seconds", "Tiempo total en SQL por peticion.", ("method", "route")
+)
+duracion_consultas = registro.histograma(
+    "db_query_duration_seconds", "Latencia de cada consulta SQL."
+)
+
+# Medicion de la peticion en curso; ContextVar es por hilo y por greenlet
+_medicion = ContextVar("metricas_peticion", default=None)
+
+publicador = PublicadorMetricas(registro, METRICAS_DIR, METRICAS_INTERVALO) if METRICAS_DIR else None
+
+class MiddlewareMetricas:
+
+    def __init__(self, wsgi_app):
+
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+
+        if publicador is not None:
+            publicador.asegurar_hilo()
+
+        inicio = time.perf_counter()
+        medicion = {"ruta": SIN_RUTA, "estado": "500", "consultas": 0, "tiempo_sql": 0.0}
+        _medicion.set(medicion)
+
+        def start_response_medido(status, headers, exc_info=None):
+            medicion["estado"] = status[:3]
+            return start_response(status, headers, exc_info)
+
+        def registrar():
+            _medicion.set(None)
+            metodo = environ.get("REQUEST_METHOD", "")
+            if metodo not in METODOS:
+                metodo = "OTHER"
+            ruta = medicion["ruta"]
+            peticiones.incrementar(metodo, ruta, medicion["estado"])
+            duracion_peticiones.observar(time.perf_counter() - inicio, metodo, ruta)
+            consultas_por_peticion.observar(medicion["consultas"], metodo, ruta)
+            duracion_sql_por_peticion.observar(medicion["tiempo_sql"], metodo, ruta)
+
+        try:
+            cuerpo = self.wsgi_app(environ, start_response_medido)
+        except Exception:
+            registrar()
+            raise
+
+        return ClosingIterator(cuerpo, registrar)
+
+def registrar_ruta():
+    medicion = _medicion.get()
+    if medicion is not None and request.url_rule is not None:
+        medicion["ruta"] = request.url_rule.rule
+
+def antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    # El contexto de ejecucion es propio de cada consulta (conn.info resulto varias veces mas caro)
+    if context is not None:
+        context.metricas_inicio = time.perf_counter()
+
+def despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "metricas_inicio", None)
+    if inicio is None:
+        return
+
+    duracion = time.perf_counter() - inicio
+    duracion_consultas.observar(duracion)
+
+    medicion = _medicion.get()
+    if medicion is not None:
+        medicion["consultas"] += 1
+        medicion["tiempo_sql"] += duracion
+
+def metrics():
+    # Con METRICAS_DIR se suman las instantaneas de todos los workers, incluida la de este
+    if publicador is not None:
+        publicador.publicar()
+        texto = registro.exponer(registro.leer_instantaneas(METRICAS_DIR))
+    else:
+        texto = registro.exponer()
+
+    return app.response_class(texto, content_type="text/plain; version=0.0.4; charset=utf-8")
+
+if METRICAS_ACTIVAS:
+    app.wsgi_app = MiddlewareMetricas(app.wsgi_app)
+    app.before_request(registrar_ruta)
+    # Sobre la clase Engine: cubre el primario y la replica
+    event.listen(Engine, "before_cursor_execute", antes_de_consulta)
+    event.listen(Engine, "after_cursor_execute", despues_de_consulta)
+    app.add_url_rule("/metrics", view_func=metrics, methods=["GET"])
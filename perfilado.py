@@ -0,0 +1,155 @@
+import hmac
+import json
+import os
+import re
+import stat
+import time
+import uuid
+from flask import request, jsonify, g, send_from_directory
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app import app
+from services.perfilado_service import TrazaPeticion, traza_actual, OCULTO
+from config import PERFILADO_HABILITADO, PERFILADO_TOKEN, PERFILADO_RUTAS, PERFILADO_INTERVALO, PERFILADO_DIR, PERFILADO_MAXIMO
+
+# ===== PERFILADO POR PETICION (opcional) =====
+# Solo se perfila una peticion que trae la cabecera X-Perfilar con PERFILADO_TOKEN (y, si se
+# define PERFILADO_RUTAS, cuya ruta este ahi). Sin PERFILADO_TOKEN no se registra ningun hook.
+# El perfil (tiempos de Python/SQL/AWS, cada sentencia SQL y llamada a AWS, llamadas repetidas
+# y pilas muestreadas) se guarda en PERFILADO_DIR y se consulta en /perfiles/<perfil_id>.
+# Los parametros se guardan con los campos secretos ocultos y nunca se imprimen.
+
+CABECERA = "X-Perfilar"
+PERFIL_ID = re.compile(r"^[0-9a-f]{32}$")
+ARCHIVO_PERFIL = re.compile(r"^[0-9a-f]{32}\.json$")
+
+def _es_admin():
+    token = request.headers.get(CABECERA)
+    return PERFILADO_TOKEN is not None and token is not None and hmac.compare_digest(token.encode(), PERFILADO_TOKEN.encode())
+
+def iniciar_perfilado():
+    if CABECERA not in request.headers:
+        return None
+
+    if not _es_admin():
+        return jsonify({"error": "Token de perfilado inválido"}), 403
+
+    ruta = request.url_rule.rule if request.url_rule is not None else None
+
+    if PERFILADO_RUTAS and ruta not in PERFILADO_RUTAS:
+        return None
+
+    traza = TrazaPeticion(uuid.uuid4().hex, request.method, ruta, PERFILADO_INTERVALO)
+    traza_actual.set(traza)
+    traza.muestreador.iniciar()
+    g.traza_perfilado = traza
+    return None
+
+def terminar_perfilado(response):
+    traza = g.pop("traza_perfilado", None)
+    if traza is None:
+        return response
+
+    # Server-Timing lo muestran las devtools del navegador; en streaming aun falta el cuerpo
+    response.headers["X-Perfil-Id"] = traza.perfil_id
+    response.headers["Server-Timing"] = f"sql;dur={traza.total_sql() * 1000:.3f}, aws;dur={traza.total_aws() * 1000:.3f}"
+
+    # En streaming el perfil se cierra cuando el servidor termina de enviar el cuerpo. Los archivos
+    # (direct_passthrough) los envia el servidor sin llamar a close: se cierra aqui
+    if response.is_streamed and not response.direct_passthrough:
+        response.call_on_close(lambda: guardar_perfil(traza, response.status_code))
+    else:
+        guardar_perfil(traza, response.status_code)
+    return response
+
+def cancelar_perfilado(error):
+    # Excepcion no manejada: after_request no corrio, pero el muestreador debe detenerse igual
+    traza = g.pop("traza_perfilado", None)
+    if traza is not None:
+        guardar_perfil(traza, 500)
+
+def guardar_perfil(traza, status):
+    traza.muestreador.detener()
+    traza_actual.set(None)
+
+    perfil = traza.resumen()
+    perfil["status"] = status
+
+    # En el log solo sentencias y operaciones: los parametros quedan en el perfil, que solo lee el admin
+    print(f"Perfil {traza.perfil_id} : {traza.metodo} {traza.ruta} {perfil['totalMs']} ms (python {perfil['pythonMs']}, sql {perfil['sqlMs']}, aws {perfil['awsMs']})")
+    for consulta in perfil["sql"]:
+        print(f"  SQL {consulta['ms']} ms : {consulta['sentencia']}")
+    for llamada in perfil["aws"]:
+        print(f"  AWS {llamada['ms']} ms : {llamada['llamada']}{' [' + llamada['error'] + ']' if llamada['error'] else ''}")
+    for repetida in perfil["repetidas"]:
+        print(f"  REPETIDA x{repetida['veces']} ({repetida['tipo']}) : {repetida['llamada']}")
+
+    try:
+        ruta = os.path.join(directorio_perfiles(), f"{traza.perfil_id}.json")
+        with os.fdopen(os.open(ruta, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w") as archivo:
+            json.dump(perfil, archivo)
+        limpiar_perfiles()
+    except (OSError, RuntimeError) as e:
+        print(f"Error guardando el perfil {traza.perfil_id} : {e}")
+
+def directorio_perfiles():
+    os.makedirs(PERFILADO_DIR, mode=0o700, exist_ok=True)
+    # Si otro usuario creo antes el directorio (o es un enlace) no se usa
+    info = os.lstat(PERFILADO_DIR)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise RuntimeError(f"{PERFILADO_DIR} no es un directorio privado de esta aplicacion")
+    return PERFILADO_DIR
+
+def limpiar_perfiles():
+    # Conserva solo los PERFILADO_MAXIMO perfiles mas recientes
+    perfiles = []
+    for nombre in os.listdir(PERFILADO_DIR):
+        ruta = os.path.join(PERFILADO_DIR, nombre)
+        try:
+            if ARCHIVO_PERFIL.match(nombre):
+                perfiles.append((os.path.getmtime(ruta), ruta))
+        except FileNotFoundError:
+            pass
+
+    perfiles.sort()
+    for _, ruta in perfiles[:max(len(perfiles) - PERFILADO_MAXIMO, 0)]:
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+def parametros_sql(context, parameters, executemany):
+    # Los parametros posicionales no dicen a que columna van: se registran los del compilado, por
+    # nombre de bind, para poder ocultar los secretos. SQL crudo (sin compilado) no guarda valores
+    if context.compiled is None:
+        return OCULTO
+    return context.compiled_parameters if executemany else context.compiled_parameters[0]
+
+def antes_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and traza_actual.get() is not None:
+        context.perfilado_inicio = time.perf_counter()
+
+def despues_de_consulta(conn, cursor, statement, parameters, context, executemany):
+    inicio = getattr(context, "perfilado_inicio", None)
+    traza = traza_actual.get()
+    if inicio is not None and traza is not None:
+        traza.registrar_sql(statement, parametros_sql(context, parameters, executemany), time.perf_counter() - inicio)
+
+def obtener_perfil(perfil_id):
+    if not _es_admin():
+        return jsonify({"error": "Token de perfilado inválido"}), 403
+
+    if not PERFIL_ID.match(perfil_id) or not os.path.exists(os.path.join(PERFILADO_DIR, f"{perfil_id}.json")):
+        return jsonify({"error": "Perfil no encontrado"}), 404
+
+    return send_from_directory(PERFILADO_DIR, f"{perfil_id}.json", mimetype="application/json")
+
+if PERFILADO_HABILITADO:
+    app.before_request(iniciar_perfilado)
+    app.after_request(terminar_perfilado)
+    app.teardown_request(cancelar_perfilado)
+    event.listen(Engine, "before_cursor_execute", antes_de_consulta)
+    event.listen(Engine, "after_cursor_execute", despues_de_consulta)
+    app.add_url_rule("/perfiles/<perfil_id>", view_func=obtener_perfil, methods=["GET"])
+elif PERFILADO_RUTAS:
+    print("PERFILADO_RUTAS requiere PERFILADO_TOKEN : el perfilado queda deshabilitado")
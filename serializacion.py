@@ -0,0 +1,125 @@
+from json.encoder import encode_basestring_ascii
+from flask.json.provider import DefaultJSONProvider
+from app import app
+
+# ===== SERIALIZACION DE LISTADOS SIN ORM =====
+# Las filas llegan como tuplas de SQLAlchemy Core y se escriben directo como texto JSON,
+# sin objetos ORM ni dicts intermedios. La salida es identica byte a byte a
+# jsonify([fila.to_dict()]): llaves ordenadas, solo ASCII y separadores compactos.
+
+_INFINITO = float("inf")
+
+def _codificar_generico(valor):
+    # Tipos poco comunes (dicts calculados, Decimal, bool...): decide el proveedor de la app
+    return app.json.dumps(valor, separators=(",", ":"))
+
+def _codificar_cadena(valor):
+    if valor.__class__ is str:
+        return encode_basestring_ascii(valor)
+    if valor is None:
+        return "null"
+    return _codificar_generico(valor)
+
+def _codificar_entero(valor):
+    if valor.__class__ is int:
+        return int.__repr__(valor)
+    if valor is None:
+        return "null"
+    return _codificar_generico(valor)
+
+def _codificar_float(valor):
+    # Mismas reglas que json.encoder con allow_nan=True
+    if valor.__class__ is float:
+        if valor != valor:
+            return "NaN"
+        if valor == _INFINITO:
+            return "Infinity"
+        if valor == -_INFINITO:
+            return "-Infinity"
+        return float.__repr__(valor)
+    if valor is None:
+        return "null"
+    return _codificar_generico(valor)
+
+def codificar_valor(valor):
+    if valor is None:
+        return "null"
+    if valor.__class__ is str:
+        return encode_basestring_ascii(valor)
+    if valor.__class__ is int:
+        return int.__repr__(valor)
+    if valor.__class__ is float:
+        return _codificar_float(valor)
+    return _codificar_generico(valor)
+
+def _codificador_de_columna(columna):
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        return codificar_valor
+    return {str: _codificar_cadena, int: _codificar_entero, float: _codificar_float}.get(tipo, codificar_valor)
+
+def salida_compacta():
+    # Solo el proveedor por defecto en modo compacto produce lo mismo que este codificador
+    proveedor = app.json
+    if type(proveedor) is not DefaultJSONProvider:
+        return False
+    if proveedor.compact is False or (proveedor.compact is None and app.debug):
+        return False
+    return proveedor.sort_keys and proveedor.ensure_ascii
+
+def respuesta_json(texto, status=200):
+    return app.response_class(f"{texto}\n", status=status, mimetype=app.json.mimetype)
+
+class SerializadorFilas:
+
+    # columnas: lo que se debe pasar a db.select(); las columnas_extra (cursor) van al final
+
+    def __init__(self, modelo, campos=None, columnas_extra=()):
+
+        self.columnas = []
+        posiciones = {}
+
+        def posicion(nombre):
+            if nombre not in posiciones:
+                posiciones[nombre] = len(self.columnas)
+                self.columnas.append(getattr(modelo, nombre))
+            return posiciones[nombre]
+
+        self._plan = []
+        for clave in sorted(campos or modelo.CAMPOS):
+            indice = posicion(modelo.COLUMNAS_DE_CAMPO.get(clave, clave))
+            calculo = modelo.CALCULOS_DE_CAMPO.get(clave)
+            self._plan.append((clave, encode_basestring_ascii(clave) + ":", indice, calculo))
+
+        for nombre in columnas_extra:
+            posicion(nombre)
+
+        # Un codificador por campo elegido segun el tipo de la columna
+        self._codificadores = [
+            (prefijo, indice, self._codificador(calculo, self.columnas[indice]))
+            for _, prefijo, indice, calculo in self._plan
+        ]
+
+    @staticmethod
+    def _codificador(calculo, columna):
+
+        if calculo is None:
+            return _codificador_de_columna(columna)
+        return lambda valor: codificar_valor(calculo(valor))
+
+    def codificar(self, fila):
+
+        return "{" + ",".join([prefijo + codificar(fila[indice]) for prefijo, indice, codificar in self._codificadores]) + "}"
+
+    def codificar_lista(self, filas):
+
+        return "[" + ",".join([self.codificar(fila) for fila in filas]) + "]"
+
+    def a_dict(self, fila):
+
+        # Para proveedores no compactos (debug) se arma el dict y lo serializa jsonify
+        return {
+            clave: calculo(fila[indice]) if calculo is not None else fila[indice]
+            for clave, _, indice, calculo in self._plan
+        }
@@ -0,0 +1,93 @@
+import boto3
+from botocore.config import Config
+from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN, AWS_REGION, AWS_MAX_POOL_CONNECTIONS, AWS_CONNECT_TIMEOUT, AWS_READ_TIMEOUT, AWS_RETRY_MODE, AWS_MAX_ATTEMPTS, METRICAS_ACTIVAS, PERFILADO_HABILITADO
+from services.metricas_service import instrumentar_cliente_aws
+from services.perfilado_service import instrumentar_cliente_perfilado
+import threading
+
+# ===== SESION BOTO3 COMPARTIDA =====
+# Una sola sesion por proceso; clientes y recursos se crean al primer uso.
+# boto3.Session no es thread-safe al crear clientes, por eso todo pasa por el lock.
+
+_lock = threading.Lock()
+_session = None
+_clientes = {}
+_recursos = {}
+
+def configuracion_botocore(max_attempts=AWS_MAX_ATTEMPTS):
+
+    return Config(
+        region_name=AWS_REGION,
+        max_pool_connections=AWS_MAX_POOL_CONNECTIONS,
+        connect_timeout=AWS_CONNECT_TIMEOUT,
+        read_timeout=AWS_READ_TIMEOUT,
+        retries={
+            'mode': AWS_RETRY_MODE,
+            'max_attempts': max_attempts
+        }
+    )
+
+def _obtener_sesion():
+
+    global _session
+    if _session is None:
+        _session = boto3.session.Session(
+            aws_access_key_id=AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
+            aws_session_token=AWS_SESSION_TOKEN,
+            region_name=AWS_REGION
+        )
+    return _session
+
+def obtener_cliente(servicio, endpoint_url=None, max_attempts=AWS_MAX_ATTEMPTS):
+
+    # max_attempts de botocore cuenta los reintentos, sin el intento inicial: 0 para quien ya
+    # reintenta por su cuenta (el worker de SNS)
+    clave = (servicio, endpoint_url, max_attempts)
+    cliente = _clientes.get(clave)
+    if cliente is not None:
+        return cliente
+
+    with _lock:
+        if clave not in _clientes:
+            _clientes[clave] = _obtener_sesion().client(
+                servicio,
+                endpoint_url=endpoint_url,
+                config=configuracion_botocore(max_attempts)
+            )
+            if METRICAS_ACTIVAS:
+                instrumentar_cliente_aws(_clientes[clave])
+            if PERFILADO_HABILITADO:
+                instrumentar_cliente_perfilado(_clientes[clave])
+            print(f"Cliente AWS creado : {servicio}")
+        return _clientes[clave]
+
+def obtener_recurso(servicio, endpoint_url=None):
+
+    clave = (servicio, endpoint_url)
+    recurso = _recursos.get(clave)
+    if recurso is not None:
+        return recurso
+
+    with _lock:
+        if clave not in _recursos:
+            _recursos[clave] = _obtener_sesion().resource(
+                servicio,
+                endpoint_url=endpoint_url,
+                config=configuracion_botocore()
+            )
+            if METRICAS_ACTIVAS:
+                instrumentar_cliente_aws(_recursos[clave].meta.client)
+            if PERFILADO_HABILITADO:
+                instrumentar_cliente_perfilado(_recursos[clave].meta.client)
+            print(f"Recurso AWS creado : {servicio}")
+        return _recursos[clave]
+
+def reiniciar():
+
+    # Tras un fork los sockets del pool no se comparten: cada proceso crea los suyos
+    global _session, _lock
+    _lock = threading.Lock()
+    _session = None
+    _clientes.clear()
+    _recursos.clear()
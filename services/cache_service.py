@@ -0,0 +1,80 @@
+from collections import OrderedDict
+import threading
+import time
+
+_AUSENTE = object()
+
+class CacheTTL:
+
+    # LRU acotado con expiracion por entrada, seguro entre hilos
+
+    def __init__(self, maxsize, ttl):
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def obtener(self, clave, defecto=None):
+
+        ahora = time.monotonic()
+
+        with self._lock:
+            entrada = self._datos.get(clave, _AUSENTE)
+
+            if entrada is _AUSENTE:
+                self.misses += 1
+                return defecto
+
+            valor, expira = entrada
+
+            if expira <= ahora:
+                del self._datos[clave]
+                self.misses += 1
+                return defecto
+
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+
+        if self.maxsize <= 0:
+            return
+
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+                self.evictions += 1
+
+    def invalidar(self, clave):
+
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def limpiar(self):
+
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self):
+
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._datos),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hitRate": round(self.hits / total, 4) if total else 0.0
+            }
@@ -1,6 +1,8 @@
-import boto3
+from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
-from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN, AWS_REGION, DYNAMODB_TABLE_NAME
+from services.aws_session import obtener_recurso
+from config import DYNAMODB_TABLE_NAME, DYNAMODB_SESSION_INDEX, DYNAMODB_ALUMNO_INDEX, DYNAMODB_REVOCADAS_INDEX, DYNAMODB_INDICE_TIMEOUT, DYNAMODB_ENDPOINT_URL, SESSION_DURACION, SESSION_TTL_ATRIBUTO, SESSION_CACHE_TTL, SESSION_CACHE_NEGATIVE_TTL, SESSION_CACHE_MAXSIZE
+from services.cache_service import CacheTTL
 import uuid
 import time
 import secrets
@@ -10,37 +12,208 @@ class DynamoDBService:
     
     def __init__(self):
 
-        self.dynamodb = boto3.resource(
-            'dynamodb',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            aws_session_token=AWS_SESSION_TOKEN,
-            region_name=AWS_REGION
-        )
-        self.table = self.dynamodb.Table(DYNAMODB_TABLE_NAME)
-    
+        self.session_index = DYNAMODB_SESSION_INDEX
+        self.alumno_index = DYNAMODB_ALUMNO_INDEX
+        self.revocadas_index = DYNAMODB_REVOCADAS_INDEX
+        self._table = (None, None)
+
+        # Resultados positivos y negativos de busqueda por sessionString. Es por proceso: SESSION_CACHE_TTL
+        # acota cuanto tarda un logout en verse en los demas workers
+        self.cache = CacheTTL(SESSION_CACHE_MAXSIZE, SESSION_CACHE_TTL)
+
+    @property
+    def dynamodb(self):
+
+        # El recurso se crea en la primera llamada real a DynamoDB
+        return obtener_recurso('dynamodb', DYNAMODB_ENDPOINT_URL)
+
+    @property
+    def table(self):
+
+        # Una Table por recurso: tras un fork el recurso compartido se recrea
+        dynamodb = self.dynamodb
+        if self._table[0] is not dynamodb:
+            self._table = (dynamodb, dynamodb.Table(DYNAMODB_TABLE_NAME))
+        return self._table[1]
+
+    def crear_tabla(self):
+
+        # Tabla de sesiones con GSIs sobre sessionString, alumnoId y revocada para evitar los scans
+        try:
+            table = self.dynamodb.create_table(
+                TableName=DYNAMODB_TABLE_NAME,
+                KeySchema=[
+                    {'AttributeName': 'id', 'KeyType': 'HASH'}
+                ],
+                AttributeDefinitions=[
+                    {'AttributeName': 'id', 'AttributeType': 'S'},
+                    {'AttributeName': 'sessionString', 'AttributeType': 'S'},
+                    {'AttributeName': 'alumnoId', 'AttributeType': 'N'},
+                    {'AttributeName': 'fecha', 'AttributeType': 'N'},
+                    {'AttributeName': 'revocada', 'AttributeType': 'N'},
+                    {'AttributeName': SESSION_TTL_ATRIBUTO, 'AttributeType': 'N'}
+                ],
+                GlobalSecondaryIndexes=[
+                    {
+                        'IndexName': self.session_index,
+                        'KeySchema': [
+                            {'AttributeName': 'sessionString', 'KeyType': 'HASH'}
+                        ],
+                        'Projection': {'ProjectionType': 'ALL'}
+                    },
+                    self._definicion_indice_alumno(),
+                    self._definicion_indice_revocadas()
+                ],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            table.wait_until_exists()
+
+            print(f"Tabla creada : {DYNAMODB_TABLE_NAME}")
+            return self.activar_ttl()
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return False
+
+    def _definicion_indice_alumno(self):
+
+        # Solo lo necesario para listar y revocar; sessionString hace falta para limpiar la cache
+        return {
+            'IndexName': self.alumno_index,
+            'KeySchema': [
+                {'AttributeName': 'alumnoId', 'KeyType': 'HASH'},
+                {'AttributeName': 'fecha', 'KeyType': 'RANGE'}
+            ],
+            'Projection': {
+                'ProjectionType': 'INCLUDE',
+                'NonKeyAttributes': ['active', SESSION_TTL_ATRIBUTO, 'sessionString']
+            }
+        }
+
+    def _definicion_indice_revocadas(self):
+
+        # Disperso: solo las sesiones revocadas en modo token tienen el atributo revocada
+        return {
+            'IndexName': self.revocadas_index,
+            'KeySchema': [
+                {'AttributeName': 'revocada', 'KeyType': 'HASH'},
+                {'AttributeName': SESSION_TTL_ATRIBUTO, 'KeyType': 'RANGE'}
+            ],
+            'Projection': {'ProjectionType': 'KEYS_ONLY'}
+        }
+
+    def crear_indice_alumno(self):
+
+        # Para tablas creadas antes del indice por alumnoId
+        return self._crear_indice(self._definicion_indice_alumno())
+
+    def crear_indice_revocadas(self):
+
+        # Para tablas creadas antes del indice de revocaciones
+        return self._crear_indice(self._definicion_indice_revocadas())
+
+    def _crear_indice(self, definicion):
+
+        # UpdateTable admite un solo indice nuevo por llamada; las llaves de estos indices son numericas
+        try:
+            self.dynamodb.meta.client.update_table(
+                TableName=DYNAMODB_TABLE_NAME,
+                AttributeDefinitions=[
+                    {'AttributeName': llave['AttributeName'], 'AttributeType': 'N'}
+                    for llave in definicion['KeySchema']
+                ],
+                GlobalSecondaryIndexUpdates=[
+                    {'Create': definicion}
+                ]
+            )
+            print(f"Indice creado : {definicion['IndexName']}")
+
+            # DynamoDB construye un solo indice nuevo a la vez: se espera a que termine el backfill
+            self._esperar_indice(definicion['IndexName'])
+            return True
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return False
+
+    def _esperar_indice(self, nombre, intervalo=5, intervalo_maximo=60, timeout=DYNAMODB_INDICE_TIMEOUT):
+
+        # Consulta con backoff (5, 10, 20... hasta 60 s); un indice que nunca llega a ACTIVE no cuelga el script
+        limite = time.monotonic() + timeout
+        while True:
+            tabla = self.dynamodb.meta.client.describe_table(TableName=DYNAMODB_TABLE_NAME)['Table']
+            estados = {indice['IndexName']: indice['IndexStatus'] for indice in tabla.get('GlobalSecondaryIndexes', [])}
+            if estados.get(nombre, 'ACTIVE') == 'ACTIVE':
+                return
+
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                raise TimeoutError(
+                    f"El indice {nombre} de {DYNAMODB_TABLE_NAME} sigue en {estados[nombre]} despues de {timeout} s "
+                    f"(DYNAMODB_INDICE_TIMEOUT); revisar su estado con describe-table"
+                )
+            time.sleep(min(intervalo, restante))
+            intervalo = min(intervalo * 2, intervalo_maximo)
+
+    def activar_ttl(self):
+
+        # DynamoDB borra sin costo los items cuyo expiresAt ya paso (en horas, no al instante)
+        try:
+            self.dynamodb.meta.client.update_time_to_live(
+                TableName=DYNAMODB_TABLE_NAME,
+                TimeToLiveSpecification={
+                    'Enabled': True,
+                    'AttributeName': SESSION_TTL_ATRIBUTO
+                }
+            )
+            print(f"TTL activado en {DYNAMODB_TABLE_NAME} : {SESSION_TTL_ATRIBUTO}")
+            return True
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            # La tabla ya tenia el TTL activado
+            if error_code == 'ValidationException' and 'already enabled' in error_message:
+                return True
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return False
+
+    def expiracion(self, session):
+
+        # Sesiones anteriores al TTL no tienen expiresAt: vencen a partir de su fecha
+        expira = session.get(SESSION_TTL_ATRIBUTO)
+        if expira is None:
+            expira = session.get('fecha', 0) + SESSION_DURACION
+        return int(expira)
+
     def generar_session_string(self, length=128):
 
         return secrets.token_hex(length // 2)
     
     def crear_sesion(self, alumno_id):
+
+        timestamp = int(time.time())
+
+        return self.guardar_sesion({
+            'id': str(uuid.uuid4()),
+            'fecha': timestamp,
+            SESSION_TTL_ATRIBUTO: timestamp + SESSION_DURACION,
+            'alumnoId': alumno_id,
+            'active': True,
+            'sessionString': self.generar_session_string(128)
+        })
+
+    def guardar_sesion(self, session_data):
         
         try:
-            session_id = str(uuid.uuid4())
-            session_string = self.generar_session_string(128)
-            timestamp = int(time.time())
-            
-            session_data = {
-                'id': session_id,
-                'fecha': timestamp,
-                'alumnoId': alumno_id,
-                'active': True,
-                'sessionString': session_string
-            }
-            
             self.table.put_item(Item=session_data)
+            self.cache.guardar(session_data['sessionString'], session_data)
             
-            print(f"Sesion creada : ID={session_id}, AlumnoID={alumno_id}")
+            print(f"Sesion creada : ID={session_data['id']}, AlumnoID={session_data['alumnoId']}")
             
             return session_data
             
@@ -54,71 +227,59 @@ class DynamoDBService:
             print(f"Error durante la creacion de la sesion : {e}")
             return None
     
+    def obtener_sesion_activa(self, session_string):
+
+        # Una sola lectura: devuelve la sesion si existe y esta activa
+        session = self.obtener_sesion_por_string(session_string)
+
+        if session is None:
+            print(f"Ninguna sesion encontrada con esta sessionString")
+            return None
+
+        is_active = session.get('active', False)
+
+        # Una sesion vencida se rechaza sin escribir: el TTL de DynamoDB la borrara
+        if is_active and self.expiracion(session) <= time.time():
+            print(f"Sesion expirada : ID={session['id']}")
+            return None
+
+        if is_active:
+            print(f"Sesion valida : ID={session['id']}, AlumnoID={session['alumnoId']}")
+            return session
+        else:
+            print(f"Sesion inactiva : ID={session['id']}")
+            return None
+
     def verificar_sesion(self, session_string):
-        
-        try:
 
-            response = self.table.scan(
-                FilterExpression='sessionString = :ss',
-                ExpressionAttributeValues={
-                    ':ss': session_string
-                }
-            )
-            
-            items = response.get('Items', [])
-            
-            if not items:
-                print(f"Ninguna sesion encontrada con esta sessionString")
-                return False
-            
-            session = items[0]
-            
-            is_active = session.get('active', False)
-            
-            if is_active:
-                print(f"Sesion valida : ID={session['id']}, AlumnoID={session['alumnoId']}")
-                return True
-            else:
-                print(f"Sesion inactiva : ID={session['id']}")
-                return False
-            
-        except ClientError as e:
-            error_code = e.response['Error']['Code']
-            error_message = e.response['Error']['Message']
-            print(f"Error DynamoDB [{error_code}]: {error_message}")
-            return False
-            
-        except Exception as e:
-            print(f"Error durante la verificacion : {e}")
-            return False
-    
-    def cerrar_sesion(self, session_string):
-        
+        return self.obtener_sesion_activa(session_string) is not None
+
+    def cerrar_sesion(self, session_string, session=None):
+
         try:
-            response = self.table.scan(
-                FilterExpression='sessionString = :ss',
-                ExpressionAttributeValues={
-                    ':ss': session_string
-                }
-            )
-            
-            items = response.get('Items', [])
-            
-            if not items:
+            if session is None:
+                session = self.obtener_sesion_por_string(session_string)
+
+            if session is None:
                 print(f"Ninguna sesion encontrada con esta sessionString")
                 return False
-            
-            session = items[0]
+
             session_id = session['id']
             
             self.table.update_item(
                 Key={'id': session_id},
-                UpdateExpression='SET active = :val',
+                UpdateExpression='SET active = :val, #expira = :ahora',
+                ExpressionAttributeNames={
+                    '#expira': SESSION_TTL_ATRIBUTO
+                },
                 ExpressionAttributeValues={
-                    ':val': False
+                    ':val': False,
+                    ':ahora': int(time.time())
                 }
             )
             
+            self._cachear_cerrada(session)
+
             print(f"Sesion cerrada : ID={session_id}")
             return True
             
@@ -132,23 +293,230 @@ class DynamoDBService:
             print(f"Error durante la cerrada : {e}")
             return False
     
+    def _cachear_cerrada(self, session):
+
+        # El GSI es eventualmente consistente: si solo se borrara la llave, la siguiente lectura
+        # podria volver a cachear la copia con active=True. Se cachea la sesion ya cerrada
+        self.cache.guardar(session['sessionString'], {
+            **session,
+            'active': False,
+            SESSION_TTL_ATRIBUTO: int(time.time())
+        })
+
     def obtener_sesion_por_string(self, session_string):
         
+        session = self.cache.obtener(session_string, False)
+        if session is not False:
+            return session
+
         try:
-            response = self.table.scan(
-                FilterExpression='sessionString = :ss',
-                ExpressionAttributeValues={
-                    ':ss': session_string
-                }
+            # Query sobre el GSI: el costo no crece con el historial de sesiones
+            response = self.table.query(
+                IndexName=self.session_index,
+                KeyConditionExpression=Key('sessionString').eq(session_string),
+                Limit=1
             )
-            
+
             items = response.get('Items', [])
-            
+
             if not items:
+                self.cache.guardar(session_string, None, ttl=SESSION_CACHE_NEGATIVE_TTL)
                 return None
-            
+
+            self.cache.guardar(session_string, items[0])
             return items[0]
             
         except Exception as e:
             print(f"Error durante la recuperacion : {e}")
-            return None
\ No newline at end of file
+            return None
+
+    def listar_sesiones(self, alumno_id):
+
+        # Query paginada sobre el GSI alumnoId, mas recientes primero; None si DynamoDB falla
+        sesiones = []
+        parametros = {
+            'IndexName': self.alumno_index,
+            'KeyConditionExpression': Key('alumnoId').eq(alumno_id),
+            'ScanIndexForward': False
+        }
+
+        try:
+            while True:
+                response = self.table.query(**parametros)
+                sesiones.extend(response.get('Items', []))
+
+                if 'LastEvaluatedKey' not in response:
+                    return sesiones
+                parametros['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return None
+
+    def cerrar_sesiones_alumno(self, alumno_id):
+
+        # Revoca todas las sesiones del alumno: BatchWriteItem borra de 25 en 25 y
+        # batch_writer reintenta los items no procesados. Devuelve cuantas se cerraron o None
+        sesiones = self.listar_sesiones(alumno_id)
+        if sesiones is None:
+            return None
+
+        try:
+            with self.table.batch_writer() as lote:
+                for session in sesiones:
+                    lote.delete_item(Key={'id': session['id']})
+
+            for session in sesiones:
+                self._cachear_cerrada(session)
+
+            print(f"Sesiones cerradas : AlumnoID={alumno_id}, total={len(sesiones)}")
+            return len(sesiones)
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return None
+
+    def revocar_sesion(self, session):
+
+        # Modo token: el token sigue siendo valido por firma hasta expirar, asi que la sesion se marca
+        # como revocada (y entra al indice disperso) en vez de borrarse; el TTL la borra al vencer
+        try:
+            self.table.update_item(
+                Key={'id': session['id']},
+                UpdateExpression='SET active = :falso, revocada = :uno, alumnoId = :alumno, fecha = :fecha, #expira = :expira',
+                ExpressionAttributeNames={
+                    '#expira': SESSION_TTL_ATRIBUTO
+                },
+                ExpressionAttributeValues={
+                    ':falso': False,
+                    ':uno': 1,
+                    ':alumno': session['alumnoId'],
+                    ':fecha': session['fecha'],
+                    ':expira': self.expiracion(session)
+                }
+            )
+
+            self.cache.invalidar(session['sessionString'])
+
+            print(f"Sesion revocada : ID={session['id']}")
+            return True
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return False
+
+    def revocar_sesiones_alumno(self, alumno_id):
+
+        # Como revocar_sesion para todas las sesiones vigentes del alumno. BatchWriteItem no admite
+        # updates: cada item se reescribe completo a partir del GSI, que proyecta todos sus atributos.
+        # Devuelve las sesiones revocadas o None
+        sesiones = self.listar_sesiones(alumno_id)
+        if sesiones is None:
+            return None
+
+        ahora = int(time.time())
+        vigentes = [
+            session for session in sesiones
+            if session.get('active') is True and self.expiracion(session) > ahora
+        ]
+
+        try:
+            with self.table.batch_writer() as lote:
+                for session in vigentes:
+                    lote.put_item(Item={
+                        **session,
+                        'active': False,
+                        'revocada': 1,
+                        SESSION_TTL_ATRIBUTO: self.expiracion(session)
+                    })
+
+            for session in vigentes:
+                self.cache.invalidar(session['sessionString'])
+
+            print(f"Sesiones revocadas : AlumnoID={alumno_id}, total={len(vigentes)}")
+            return vigentes
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return None
+
+    def listar_revocadas(self):
+
+        # {id: expiresAt} de las revocaciones aun no vencidas; solo lee el indice disperso (KEYS_ONLY)
+        revocadas = {}
+        parametros = {
+            'IndexName': self.revocadas_index,
+            'KeyConditionExpression': Key('revocada').eq(1) & Key(SESSION_TTL_ATRIBUTO).gt(int(time.time()))
+        }
+
+        try:
+            while True:
+                response = self.table.query(**parametros)
+
+                for session in response.get('Items', []):
+                    revocadas[session['id']] = int(session[SESSION_TTL_ATRIBUTO])
+
+                if 'LastEvaluatedKey' not in response:
+                    return revocadas
+                parametros['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return None
+
+    def barrer_sesiones(self, simular=False):
+
+        # Compacta la tabla: borra sesiones cerradas o vencidas y pone expiresAt a las
+        # sesiones antiguas que no lo tienen, para que el TTL se encargue de ellas despues
+        ahora = int(time.time())
+        resumen = {'revisadas': 0, 'borradas': 0, 'actualizadas': 0}
+
+        filtro = Attr('active').ne(True) | Attr(SESSION_TTL_ATRIBUTO).not_exists() | Attr(SESSION_TTL_ATRIBUTO).lte(ahora)
+        parametros = {
+            'FilterExpression': filtro,
+            'ProjectionExpression': '#id, active, revocada, fecha, #expira',
+            'ExpressionAttributeNames': {'#id': 'id', '#expira': SESSION_TTL_ATRIBUTO}
+        }
+
+        with self.table.batch_writer() as lote:
+            while True:
+                response = self.table.scan(**parametros)
+
+                for session in response.get('Items', []):
+                    resumen['revisadas'] += 1
+                    vencida = self.expiracion(session) <= ahora
+
+                    # Una revocacion de modo token debe seguir existiendo mientras el token no venza
+                    if session.get('revocada') is not None and not vencida:
+                        continue
+
+                    if session.get('active') is not True or vencida:
+                        resumen['borradas'] += 1
+                        if not simular:
+                            lote.delete_item(Key={'id': session['id']})
+                    else:
+                        resumen['actualizadas'] += 1
+                        if not simular:
+                            self.table.update_item(
+                                Key={'id': session['id']},
+                                UpdateExpression='SET #expira = :expira',
+                                ExpressionAttributeNames={'#expira': SESSION_TTL_ATRIBUTO},
+                                ExpressionAttributeValues={':expira': self.expiracion(session)}
+                            )
+
+                if 'LastEvaluatedKey' not in response:
+                    break
+                parametros['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+        print(f"Barrido de sesiones : {resumen['revisadas']} revisadas, {resumen['borradas']} borradas, {resumen['actualizadas']} con expiresAt nuevo")
+        return resumen
\ No newline at end of file
@@ -0,0 +1,291 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+import glob
+import json
+import os
+import threading
+import time
+
+# ===== METRICAS EN FORMATO DE TEXTO DE PROMETHEUS =====
+# Contadores e histogramas en memoria del proceso. Con varios workers cada uno publica su
+# instantanea en un directorio y /metrics suma todas (ver publicar_instantanea).
+
+BUCKETS_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _formatear_numero(valor):
+    if valor == float("inf"):
+        return "+Inf"
+    if float(valor).is_integer():
+        return str(int(valor))
+    return repr(float(valor))
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _etiquetas(nombres, valores, extra=""):
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+class Contador:
+
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def incrementar(self, *valores, cantidad=1):
+
+        with self._lock:
+            self._series[valores] = self._series.get(valores, 0) + cantidad
+
+    def instantanea(self):
+
+        with self._lock:
+            return [[list(valores), total] for valores, total in self._series.items()]
+
+    @staticmethod
+    def combinar(series):
+
+        total = {}
+        for valores, valor in series:
+            clave = tuple(valores)
+            total[clave] = total.get(clave, 0) + valor
+        return total
+
+    def exponer(self, series):
+
+        for valores, valor in sorted(series.items()):
+            yield f"{self.nombre}{_etiquetas(self.etiquetas, valores)} {_formatear_numero(valor)}"
+
+class Histograma:
+
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+
+        # Conteos por bucket sin acumular; el ultimo indice es +Inf
+        indice = bisect_left(self.buckets, valor)
+
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def instantanea(self):
+
+        with self._lock:
+            return [[list(valores), list(conteos), suma] for valores, (conteos, suma) in self._series.items()]
+
+    @staticmethod
+    def combinar(series):
+
+        total = {}
+        for valores, conteos, suma in series:
+            clave = tuple(valores)
+            if clave not in total:
+                total[clave] = [list(conteos), suma]
+            else:
+                acumulado = total[clave]
+                acumulado[0] = [a + b for a, b in zip(acumulado[0], conteos)]
+                acumulado[1] += suma
+        return total
+
+    def exponer(self, series):
+
+        for valores, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.buckets + (float("inf"),), conteos):
+                acumulado += conteo
+                le = 'le="' + _formatear_numero(limite) + '"'
+                yield f"{self.nombre}_bucket{_etiquetas(self.etiquetas, valores, le)} {acumulado}"
+            yield f"{self.nombre}_sum{_etiquetas(self.etiquetas, valores)} {repr(float(suma))}"
+            yield f"{self.nombre}_count{_etiquetas(self.etiquetas, valores)} {acumulado}"
+
+class RegistroMetricas:
+
+    def __init__(self):
+
+        self._metricas = {}
+
+    def contador(self, nombre, ayuda, etiquetas=()):
+
+        return self._metricas.setdefault(nombre, Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_LATENCIA):
+
+        return self._metricas.setdefault(nombre, Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def instantanea(self):
+
+        return {nombre: metrica.instantanea() for nombre, metrica in self._metricas.items()}
+
+    def exponer(self, instantaneas=None):
+
+        # Texto de exposicion; instantaneas: las de varios procesos para sumarlas
+        if instantaneas is None:
+            instantaneas = [self.instantanea()]
+
+        lineas = []
+        for nombre, metrica in self._metricas.items():
+            series = metrica.combinar(
+                serie for instantanea in instantaneas for serie in instantanea.get(nombre, ())
+            )
+            lineas.append(f"# HELP {nombre} {metrica.ayuda}")
+            lineas.append(f"# TYPE {nombre} {metrica.tipo}")
+            lineas.extend(metrica.exponer(series))
+
+        return "\n".join(lineas) + "\n"
+
+    # ===== VARIOS WORKERS (METRICAS_DIR) =====
+
+    def publicar_instantanea(self, directorio):
+
+        # Escritura atomica: quien lee nunca ve un archivo a medias
+        ruta = os.path.join(directorio, f"metricas-{os.getpid()}.json")
+        temporal = f"{ruta}.tmp"
+        with open(temporal, "w") as archivo:
+            json.dump(self.instantanea(), archivo)
+        os.replace(temporal, ruta)
+
+    def leer_instantaneas(self, directorio):
+
+        # Incluye a los workers ya reciclados: sus contadores no deben retroceder
+        instantaneas = []
+        for ruta in glob.glob(os.path.join(directorio, "metricas-*.json")):
+            try:
+                with open(ruta) as archivo:
+                    instantaneas.append(json.load(archivo))
+            except (OSError, ValueError) as e:
+                print(f"Instantanea de metricas ilegible {ruta} : {e}")
+        return instantaneas
+
+class PublicadorMetricas:
+
+    # Hilo que publica la instantanea del proceso cada intervalo (se crea al primer uso en cada proceso)
+
+    def __init__(self, registro, directorio, intervalo):
+
+        self.registro = registro
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._pid = None
+        self._detener = threading.Event()
+
+    def asegurar_hilo(self):
+
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            threading.Thread(target=self._publicar_periodicamente, name='metricas', daemon=True).start()
+
+    def _publicar_periodicamente(self):
+
+        while not self._detener.wait(self.intervalo):
+            self.publicar()
+
+    def publicar(self):
+
+        try:
+            self.registro.publicar_instantanea(self.directorio)
+        except OSError as e:
+            print(f"Error publicando metricas : {e}")
+
+    def detener(self):
+
+        self._detener.set()
+        self.publicar()
+
+def limpiar_instantaneas(directorio):
+
+    # Al arrancar el servidor: los archivos de una ejecucion anterior no deben sumarse
+    for ruta in glob.glob(os.path.join(directorio, "metricas-*.json*")):
+        os.remove(ruta)
+
+registro = RegistroMetricas()
+
+# ===== LLAMADAS A AWS =====
+
+aws_llamadas = registro.contador(
+    "aws_requests_total", "Llamadas a AWS por servicio y operacion.", ("service", "operation")
+)
+aws_errores = registro.contador(
+    "aws_request_errors_total", "Llamadas a AWS fallidas por servicio, operacion y codigo de error.", ("service", "operation", "code")
+)
+aws_duracion = registro.histograma(
+    "aws_request_duration_seconds", "Latencia de las llamadas a AWS, reintentos incluidos.", ("service", "operation")
+)
+
+def registrar_llamada_aws(servicio, operacion, inicio, codigo_error=None):
+
+    aws_llamadas.incrementar(servicio, operacion)
+    aws_duracion.observar(time.perf_counter() - inicio, servicio, operacion)
+    if codigo_error is not None:
+        aws_errores.incrementar(servicio, operacion, codigo_error)
+
+def _antes_de_llamada(model, context, **kwargs):
+
+    context["_metricas_aws"] = (model.service_model.service_name, model.name, time.perf_counter())
+
+def _despues_de_llamada(http_response, parsed, context, **kwargs):
+
+    medicion = context.pop("_metricas_aws", None)
+    if medicion is not None:
+        codigo = None
+        if http_response.status_code >= 300:
+            codigo = parsed.get("Error", {}).get("Code") or str(http_response.status_code)
+        registrar_llamada_aws(*medicion, codigo_error=codigo)
+
+def _despues_de_error(exception, context, **kwargs):
+
+    # Errores sin respuesta HTTP (conexion, timeout)
+    medicion = context.pop("_metricas_aws", None)
+    if medicion is not None:
+        registrar_llamada_aws(*medicion, codigo_error=type(exception).__name__)
+
+def instrumentar_cliente_aws(cliente):
+
+    # Cada operacion de la API (PutObject, Publish, Query...) pasa por los eventos de botocore
+    eventos = cliente.meta.events
+    eventos.register("before-call.*.*", _antes_de_llamada, unique_id="metricas-antes")
+    eventos.register("after-call.*.*", _despues_de_llamada, unique_id="metricas-despues")
+    eventos.register("after-call-error.*.*", _despues_de_error, unique_id="metricas-error")
+    return cliente
+
+@contextmanager
+def medir_aws(servicio, operacion):
+
+    # Para operaciones compuestas de boto3 (upload_fileobj) que hacen una o varias llamadas a la API
+    inicio = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        # Algunas excepciones de botocore traen response=None
+        codigo = (getattr(e, "response", None) or {}).get("Error", {}).get("Code") or type(e).__name__
+        registrar_llamada_aws(servicio, operacion, inicio, codigo_error=codigo)
+        raise
+    registrar_llamada_aws(servicio, operacion, inicio)
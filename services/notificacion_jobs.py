@@ -0,0 +1,102 @@
+from botocore.exceptions import ClientError
+from services.aws_session import obtener_recurso
+from config import DYNAMODB_JOBS_TABLE_NAME, DYNAMODB_ENDPOINT_URL, SESSION_TTL_ATRIBUTO, SNS_JOBS_DURACION
+import time
+
+CAMPOS_NUMERICOS = ('alumnoId', 'attempts', 'createdAt', 'finishedAt')
+
+class NotificacionJobs:
+
+    # Estado de los envios asincronos en DynamoDB: cualquier worker del servidor (o uno nuevo tras
+    # un reciclado) responde /notificaciones/<job_id>. DynamoDB borra cada job por su expiresAt
+
+    def __init__(self, duracion=SNS_JOBS_DURACION):
+
+        self.duracion = duracion
+        self._table = (None, None)
+
+    @property
+    def dynamodb(self):
+
+        return obtener_recurso('dynamodb', DYNAMODB_ENDPOINT_URL)
+
+    @property
+    def table(self):
+
+        dynamodb = self.dynamodb
+        if self._table[0] is not dynamodb:
+            self._table = (dynamodb, dynamodb.Table(DYNAMODB_JOBS_TABLE_NAME))
+        return self._table[1]
+
+    def crear_tabla(self):
+
+        try:
+            table = self.dynamodb.create_table(
+                TableName=DYNAMODB_JOBS_TABLE_NAME,
+                KeySchema=[
+                    {'AttributeName': 'jobId', 'KeyType': 'HASH'}
+                ],
+                AttributeDefinitions=[
+                    {'AttributeName': 'jobId', 'AttributeType': 'S'}
+                ],
+                BillingMode='PAY_PER_REQUEST'
+            )
+            table.wait_until_exists()
+
+            self.dynamodb.meta.client.update_time_to_live(
+                TableName=DYNAMODB_JOBS_TABLE_NAME,
+                TimeToLiveSpecification={
+                    'Enabled': True,
+                    'AttributeName': SESSION_TTL_ATRIBUTO
+                }
+            )
+
+            print(f"Tabla creada : {DYNAMODB_JOBS_TABLE_NAME}")
+            return True
+
+        except ClientError as e:
+            error_code = e.response['Error']['Code']
+            error_message = e.response['Error']['Message']
+            print(f"Error DynamoDB [{error_code}]: {error_message}")
+            return False
+
+    def registrar(self, job):
+
+        # False si DynamoDB falla: sin registro no se encola, el estado no se podria consultar
+        try:
+            self.table.put_item(Item={**job, SESSION_TTL_ATRIBUTO: job['createdAt'] + self.duracion})
+            return True
+
+        except Exception as e:
+            print(f"Error registrando el job {job['jobId']} : {e}")
+            return False
+
+    def actualizar(self, job_id, cambios):
+
+        # Un fallo aqui no detiene el envio: el job queda con el ultimo estado que si se guardo
+        nombres = {f'#c{i}': campo for i, campo in enumerate(cambios)}
+        valores = {f':v{i}': valor for i, valor in enumerate(cambios.values())}
+
+        try:
+            self.table.update_item(
+                Key={'jobId': job_id},
+                UpdateExpression='SET ' + ', '.join(f'#c{i} = :v{i}' for i in range(len(cambios))),
+                ExpressionAttributeNames=nombres,
+                ExpressionAttributeValues=valores
+            )
+
+        except Exception as e:
+            print(f"Error actualizando el job {job_id} : {e}")
+
+    def obtener(self, job_id):
+
+        # Un fallo de DynamoDB se propaga (500): no es lo mismo que un job inexistente
+        job = self.table.get_item(Key={'jobId': job_id}, ConsistentRead=True).get('Item')
+
+        # El TTL de DynamoDB borra en horas, no al instante
+        if job is None or job[SESSION_TTL_ATRIBUTO] <= time.time():
+            return None
+
+        job.pop(SESSION_TTL_ATRIBUTO)
+        # Los numeros de DynamoDB llegan como Decimal
+        return {campo: int(valor) if campo in CAMPOS_NUMERICOS and valor is not None else valor for campo, valor in job.items()}
@@ -0,0 +1,122 @@
+from botocore.exceptions import ClientError, BotoCoreError
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from config import SNS_WORKERS, SNS_COLA_MAXIMA, SNS_REINTENTOS, SNS_BACKOFF_BASE
+import random
+import threading
+import time
+import uuid
+
+CODIGOS_REINTENTABLES = {'Throttling', 'ThrottlingException', 'ThrottledException', 'InternalError', 'InternalFailure', 'ServiceUnavailable', 'KMSThrottlingException'}
+
+class NotificacionWorker:
+
+    # Pool de hilos acotado que publica en SNS fuera del hilo de la peticion.
+    # El estado de cada job se guarda en NotificacionJobs (DynamoDB), no en este proceso
+
+    def __init__(self, sns_service, jobs, max_workers=SNS_WORKERS, max_pendientes=SNS_COLA_MAXIMA, reintentos=SNS_REINTENTOS, backoff_base=SNS_BACKOFF_BASE):
+
+        self.sns_service = sns_service
+        self.jobs = jobs
+        self.max_workers = max_workers
+        self.reintentos = reintentos
+        self.backoff_base = backoff_base
+
+        # El executor se crea al primer uso para que cada proceso tenga sus propios hilos
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pendientes = threading.BoundedSemaphore(max_pendientes)
+
+    def _obtener_executor(self):
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='sns-worker')
+            return self._executor
+
+    def encolar(self, alumno):
+
+        # None si la cola esta llena o el job no se pudo registrar; el llamador responde 503
+        if not self._pendientes.acquire(blocking=False):
+            return None
+
+        # Copia de los campos: el objeto ORM no se puede usar fuera de la peticion
+        datos = SimpleNamespace(
+            id=alumno.id,
+            nombres=alumno.nombres,
+            apellidos=alumno.apellidos,
+            matricula=alumno.matricula,
+            promedio=alumno.promedio
+        )
+
+        job_id = str(uuid.uuid4())
+        registrado = self.jobs.registrar({
+            'jobId': job_id,
+            'alumnoId': alumno.id,
+            'status': 'queued',
+            'attempts': 0,
+            'messageId': None,
+            'error': None,
+            'createdAt': int(time.time()),
+            'finishedAt': None
+        })
+
+        if not registrado:
+            self._pendientes.release()
+            return None
+
+        try:
+            self._obtener_executor().submit(self._ejecutar, job_id, datos)
+        except RuntimeError:
+            self._pendientes.release()
+            self._actualizar(job_id, {'status': 'failed', 'error': 'Worker detenido', 'finishedAt': int(time.time())})
+
+        return job_id
+
+    def detener(self, esperar=True):
+
+        # Al reciclar un worker del servidor: termina los envios ya encolados antes de salir
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=esperar)
+
+    def estado(self, job_id):
+
+        return self.jobs.obtener(job_id)
+
+    def _actualizar(self, job_id, cambios):
+
+        self.jobs.actualizar(job_id, cambios)
+
+    def _es_reintentable(self, error):
+
+        if isinstance(error, ClientError):
+            codigo = error.response['Error']['Code']
+            status = error.response.get('ResponseMetadata', {}).get('HTTPStatusCode', 0)
+            return codigo in CODIGOS_REINTENTABLES or status >= 500
+        return isinstance(error, BotoCoreError)
+
+    def _ejecutar(self, job_id, datos):
+
+        try:
+            for intento in range(1, self.reintentos + 2):
+                self._actualizar(job_id, {'status': 'sending', 'attempts': intento})
+
+                try:
+                    message_id = self.sns_service.publicar_notificacion(datos, reintentar=False)
+                    self._actualizar(job_id, {'status': 'sent', 'messageId': message_id, 'finishedAt': int(time.time())})
+                    print(f"Notificacion enviada. Job={job_id}, MessageId: {message_id}")
+                    return
+
+                except Exception as e:
+                    if intento > self.reintentos or not self._es_reintentable(e):
+                        self._actualizar(job_id, {'status': 'failed', 'error': str(e), 'finishedAt': int(time.time())})
+                        print(f"Error SNS Job={job_id} : {e}")
+                        return
+
+                    # Backoff exponencial con jitter
+                    espera = self.backoff_base * (2 ** (intento - 1))
+                    time.sleep(random.uniform(0, espera))
+        finally:
+            self._pendientes.release()
@@ -0,0 +1,198 @@
+from collections import Counter
+from contextvars import ContextVar
+import _thread
+import os
+import re
+import sys
+import time
+
+# Con gevent el muestreador debe ser un hilo real del sistema: un greenlet no corre
+# mientras la peticion perfilada tiene el control
+try:
+    from gevent import monkey
+    _iniciar_hilo = monkey.get_original('_thread', 'start_new_thread')
+    _id_hilo = monkey.get_original('_thread', 'get_ident')
+    _dormir = monkey.get_original('time', 'sleep')
+except ImportError:
+    _iniciar_hilo = _thread.start_new_thread
+    _id_hilo = _thread.get_ident
+    _dormir = time.sleep
+
+# ===== PERFILADO DE UNA PETICION =====
+# Solo existe mientras se perfila una peticion; los hooks de SQL y AWS consultan
+# esta ContextVar y no hacen nada si esta vacia.
+
+traza_actual = ContextVar("traza_perfilado", default=None)
+
+LARGO_MAXIMO_PARAMETROS = 300
+
+# Campos cuyo valor nunca llega a un perfil, en minusculas y sin el sufijo _N de los binds de SQLAlchemy.
+# ExpressionAttributeValues lleva los valores de las condiciones de DynamoDB (p. ej. el sessionString)
+CAMPOS_SECRETOS = {"password", "sessionstring", "token", "secreto", "expressionattributevalues", "message", "body"}
+OCULTO = "***"
+SUFIJO_BIND = re.compile(r"_\d+$")
+
+def _es_secreto(campo):
+    return isinstance(campo, str) and SUFIJO_BIND.sub("", campo).lower() in CAMPOS_SECRETOS
+
+def _ocultar(valor):
+    if isinstance(valor, dict):
+        return {campo: OCULTO if _es_secreto(campo) else _ocultar(v) for campo, v in valor.items()}
+    if isinstance(valor, list):
+        return [_ocultar(v) for v in valor]
+    if isinstance(valor, tuple):
+        return tuple(_ocultar(v) for v in valor)
+    return valor
+
+def _resumir(valor):
+    texto = repr(_ocultar(valor))
+    if len(texto) > LARGO_MAXIMO_PARAMETROS:
+        return texto[:LARGO_MAXIMO_PARAMETROS] + "..."
+    return texto
+
+class MuestreadorPila:
+
+    # Toma la pila del hilo de la peticion cada intervalo desde otro hilo (sys._current_frames).
+    # Con gevent el hilo es el del worker completo: puede incluir otros greenlets.
+
+    def __init__(self, intervalo):
+
+        self.intervalo = intervalo
+        self.hilo = _id_hilo()
+        self._pilas = []
+        self._activo = False
+
+    def iniciar(self):
+
+        self._activo = True
+        _iniciar_hilo(self._muestrear, ())
+
+    def detener(self):
+
+        self._activo = False
+
+    def _muestrear(self):
+
+        while self._activo:
+            _dormir(self.intervalo)
+            frame = sys._current_frames().get(self.hilo)
+            pila = []
+            while frame is not None:
+                codigo = frame.f_code
+                pila.append(f"{codigo.co_name} ({os.path.basename(codigo.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            if pila:
+                # list.append es atomico: no hace falta lock con el hilo de la peticion
+                self._pilas.append(";".join(reversed(pila)))
+
+    def resultado(self):
+
+        # Formato "collapsed" (raiz;...;hoja conteo), el que leen flamegraph.pl y speedscope
+        return [f"{pila} {conteo}" for pila, conteo in Counter(list(self._pilas)).most_common()]
+
+class TrazaPeticion:
+
+    def __init__(self, perfil_id, metodo, ruta, intervalo):
+
+        self.perfil_id = perfil_id
+        self.metodo = metodo
+        self.ruta = ruta
+        self.inicio = time.perf_counter()
+        self.sql = []
+        self.aws = []
+        self.muestreador = MuestreadorPila(intervalo)
+
+    def registrar_sql(self, sentencia, parametros, duracion):
+
+        self.sql.append((sentencia, _resumir(parametros), duracion))
+
+    def registrar_aws(self, servicio, operacion, parametros, duracion, error):
+
+        self.aws.append((f"{servicio}.{operacion}", parametros, duracion, error))
+
+    def total_sql(self):
+
+        return sum(duracion for _, _, duracion in self.sql)
+
+    def total_aws(self):
+
+        return sum(duracion for _, _, duracion, _ in self.aws)
+
+    def resumen(self):
+
+        total = time.perf_counter() - self.inicio
+        total_sql = self.total_sql()
+        total_aws = self.total_aws()
+
+        # Llamadas identicas (misma sentencia y parametros) repetidas en la misma peticion
+        repetidas = [
+            {"tipo": tipo, "llamada": llamada, "parametros": parametros, "veces": veces}
+            for tipo, eventos in (("sql", self.sql), ("aws", self.aws))
+            for (llamada, parametros), veces in Counter((evento[0], evento[1]) for evento in eventos).items()
+            if veces > 1
+        ]
+
+        return {
+            "perfilId": self.perfil_id,
+            "method": self.metodo,
+            "route": self.ruta,
+            "totalMs": round(total * 1000, 3),
+            "sqlMs": round(total_sql * 1000, 3),
+            "awsMs": round(total_aws * 1000, 3),
+            # Lo que no es espera de SQL ni de AWS: Python, serializacion, la propia app
+            "pythonMs": round(max(total - total_sql - total_aws, 0) * 1000, 3),
+            "sql": [
+                {"sentencia": sentencia, "parametros": parametros, "ms": round(duracion * 1000, 3)}
+                for sentencia, parametros, duracion in self.sql
+            ],
+            "aws": [
+                {"llamada": llamada, "parametros": parametros, "ms": round(duracion * 1000, 3), "error": error}
+                for llamada, parametros, duracion, error in self.aws
+            ],
+            "repetidas": repetidas,
+            "muestreo": {
+                "intervaloMs": self.muestreador.intervalo * 1000,
+                "pilas": self.muestreador.resultado()
+            }
+        }
+
+# ===== LLAMADAS A AWS DE LA PETICION PERFILADA =====
+
+def _antes_de_parametros(params, model, context, **kwargs):
+
+    if traza_actual.get() is not None:
+        context["_perfilado_aws"] = (model.service_model.service_name, model.name, _resumir(params))
+
+def _antes_de_llamada(context, **kwargs):
+
+    medicion = context.get("_perfilado_aws")
+    if medicion is not None:
+        context["_perfilado_aws"] = medicion + (time.perf_counter(),)
+
+def _registrar(context, error):
+
+    medicion = context.pop("_perfilado_aws", None)
+    traza = traza_actual.get()
+    if medicion is not None and len(medicion) == 4 and traza is not None:
+        servicio, operacion, parametros, inicio = medicion
+        traza.registrar_aws(servicio, operacion, parametros, time.perf_counter() - inicio, error)
+
+def _despues_de_llamada(http_response, parsed, context, **kwargs):
+
+    error = None
+    if http_response.status_code >= 300:
+        error = parsed.get("Error", {}).get("Code") or str(http_response.status_code)
+    _registrar(context, error)
+
+def _despues_de_error(exception, context, **kwargs):
+
+    _registrar(context, type(exception).__name__)
+
+def instrumentar_cliente_perfilado(cliente):
+
+    eventos = cliente.meta.events
+    eventos.register("before-parameter-build.*.*", _antes_de_parametros, unique_id="perfilado-parametros")
+    eventos.register("before-call.*.*", _antes_de_llamada, unique_id="perfilado-antes")
+    eventos.register("after-call.*.*", _despues_de_llamada, unique_id="perfilado-despues")
+    eventos.register("after-call-error.*.*", _despues_de_error, unique_id="perfilado-error")
+    return cliente
@@ -1,22 +1,220 @@
-import boto3
 from botocore.exceptions import ClientError
-from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN, AWS_REGION, S3_BUCKET_NAME, S3_BASE_URL
+from services.aws_session import obtener_cliente, reiniciar
+from services.metricas_service import medir_aws
+from config import S3_ENDPOINT_URL, S3_BUCKET_NAME, S3_BASE_URL, S3_FOTO_MAX_BYTES, S3_PRESIGNED_EXPIRACION, IMAGEN_VARIANTES, IMAGEN_CALIDAD_WEBP, IMAGEN_WORKERS, IMAGEN_MAX_PENDIENTES
+from concurrent.futures import ProcessPoolExecutor
+import io
+import threading
 import uuid
 import os
+import re
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    print("Pillow no instalado : las variantes de foto estan deshabilitadas")
+    Image = None
+
+EXTENSIONES_PERMITIDAS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+TIPOS_CONTENIDO = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp'
+}
+
+def crear_cliente_s3():
+
+    return obtener_cliente('s3', S3_ENDPOINT_URL)
+
+def variante_key(file_key, nombre):
+
+    return f"{os.path.splitext(file_key)[0]}_{nombre}.webp"
+
+# ===== PROCESOS DE VARIANTES (fuera de los hilos que atienden peticiones) =====
+
+_s3_client_worker = None
+
+def _inicializar_worker():
+
+    global _s3_client_worker
+    # Prioridad baja: el trabajo de imagenes cede CPU a las peticiones
+    if hasattr(os, 'nice'):
+        os.nice(10)
+    reiniciar()
+    _s3_client_worker = crear_cliente_s3()
+
+def _procesar_variantes(bucket_name, file_key):
+
+    original = _s3_client_worker.get_object(Bucket=bucket_name, Key=file_key)['Body'].read()
+
+    with Image.open(io.BytesIO(original)) as imagen:
+        # En JPEG decodifica directo a una escala reducida
+        lado_maximo = max(IMAGEN_VARIANTES.values())
+        imagen.draft('RGB', (lado_maximo, lado_maximo))
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen = imagen.convert('RGBA' if imagen.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        keys = {}
+        for nombre, lado in IMAGEN_VARIANTES.items():
+            variante = imagen.copy()
+            variante.thumbnail((lado, lado), Image.LANCZOS)
+
+            buffer = io.BytesIO()
+            variante.save(buffer, format='WEBP', quality=IMAGEN_CALIDAD_WEBP, method=4)
+            buffer.seek(0)
+
+            key = variante_key(file_key, nombre)
+            _s3_client_worker.upload_fileobj(
+                buffer,
+                bucket_name,
+                key,
+                ExtraArgs={
+                    'ACL': 'public-read',
+                    'ContentType': 'image/webp',
+                    'CacheControl': 'public, max-age=31536000, immutable'
+                }
+            )
+            keys[nombre] = key
+
+    return keys
 
 class S3Service:
     
     def __init__(self):
 
-        self.s3_client = boto3.client(
-            's3',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            aws_session_token=AWS_SESSION_TOKEN,
-            region_name=AWS_REGION
-        )
         self.bucket_name = S3_BUCKET_NAME
+
+        # El pool de procesos se crea al primer uso (despues del fork del servidor)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._pendientes = threading.BoundedSemaphore(IMAGEN_MAX_PENDIENTES)
+
+    @property
+    def s3_client(self):
+
+        # El cliente se crea en la primera llamada real a S3
+        return crear_cliente_s3()
+
+    def _obtener_pool(self):
+
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=IMAGEN_WORKERS, initializer=_inicializar_worker)
+            return self._pool
+
+    def detener(self, esperar=True):
+
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=esperar)
+
+    def generar_variantes(self, file_key, al_terminar=None):
+
+        # Encola el redimensionado; si la cola esta llena se omite (el original sigue disponible).
+        # al_terminar recibe {nombre: url} solo si todas las variantes se subieron
+        if Image is None:
+            return False
+
+        if not self._pendientes.acquire(blocking=False):
+            print(f"Cola de variantes llena, se omite : {file_key}")
+            return False
+
+        def terminado(future):
+            self._pendientes.release()
+            error = future.exception()
+            if error is not None:
+                print(f"Error generando variantes de {file_key} : {error}")
+            else:
+                keys = future.result()
+                print(f"Variantes generadas : {', '.join(keys.values())}")
+                if al_terminar is not None:
+                    try:
+                        al_terminar({nombre: f"{S3_BASE_URL}/{key}" for nombre, key in keys.items()})
+                    except Exception as e:
+                        print(f"Error registrando variantes de {file_key} : {e}")
+
+        try:
+            self._obtener_pool().submit(_procesar_variantes, self.bucket_name, file_key).add_done_callback(terminado)
+        except Exception as e:
+            self._pendientes.release()
+            print(f"Error encolando variantes de {file_key} : {e}")
+            return False
+
+        return True
     
+    def key_de_url(self, file_url):
+
+        return file_url[len(S3_BASE_URL) + 1:]
+
+    def generar_key_foto(self, alumno_id, file_extension):
+
+        unique_id = str(uuid.uuid4())[:8]
+        return f"alumnos/{alumno_id}/perfil_{unique_id}{file_extension}"
+
+    def generar_subida_presignada(self, alumno_id, filename):
+
+        # El cliente sube directo a S3; la politica limita extension, tamano y prefijo
+        file_extension = os.path.splitext(filename or '')[1].lower()
+
+        if file_extension not in EXTENSIONES_PERMITIDAS:
+            raise ValueError(f"Extension prohibida. Utiliza : {', '.join(EXTENSIONES_PERMITIDAS)}")
+
+        content_type = TIPOS_CONTENIDO[file_extension]
+        file_key = self.generar_key_foto(alumno_id, file_extension)
+
+        try:
+            presigned = self.s3_client.generate_presigned_post(
+                Bucket=self.bucket_name,
+                Key=file_key,
+                Fields={
+                    'acl': 'public-read',
+                    'Content-Type': content_type
+                },
+                Conditions=[
+                    {'acl': 'public-read'},
+                    {'Content-Type': content_type},
+                    ['starts-with', '$key', f"alumnos/{alumno_id}/"],
+                    ['content-length-range', 1, S3_FOTO_MAX_BYTES]
+                ],
+                ExpiresIn=S3_PRESIGNED_EXPIRACION
+            )
+
+            return {
+                'url': presigned['url'],
+                'fields': presigned['fields'],
+                'key': file_key,
+                'maxBytes': S3_FOTO_MAX_BYTES,
+                'expiresIn': S3_PRESIGNED_EXPIRACION
+            }
+
+        except ClientError as e:
+            print(f"Error S3 : {e}")
+            return None
+
+    def confirmar_subida(self, alumno_id, file_key):
+
+        # Solo se aceptan llaves con el formato que genera generar_key_foto
+        patron = rf"alumnos/{alumno_id}/perfil_[0-9a-f]{{8}}({'|'.join(re.escape(ext) for ext in EXTENSIONES_PERMITIDAS)})"
+        if not isinstance(file_key, str) or not re.fullmatch(patron, file_key):
+            raise ValueError("Llave de foto inválida")
+
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket_name, Key=file_key)
+
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey', 'NotFound'):
+                raise ValueError("La foto no existe en S3")
+            print(f"Error S3 : {e}")
+            return None
+
+        if head.get('ContentLength', 0) > S3_FOTO_MAX_BYTES:
+            raise ValueError("La foto excede el tamaño máximo permitido")
+
+        return f"{S3_BASE_URL}/{file_key}"
+
     def upload_foto_perfil(self, file, alumno_id):
 
         if not file:
@@ -24,23 +222,22 @@ class S3Service:
         
         file_extension = os.path.splitext(file.filename)[1].lower()
         
-        allowed_extensions = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-        if file_extension not in allowed_extensions:
-            raise ValueError(f"Extension prohibida. Utiliza : {', '.join(allowed_extensions)}")
+        if file_extension not in EXTENSIONES_PERMITIDAS:
+            raise ValueError(f"Extension prohibida. Utiliza : {', '.join(EXTENSIONES_PERMITIDAS)}")
         
-        unique_id = str(uuid.uuid4())[:8]
-        file_key = f"alumnos/{alumno_id}/perfil_{unique_id}{file_extension}"
+        file_key = self.generar_key_foto(alumno_id, file_extension)
         
         try:
-            self.s3_client.upload_fileobj(
-                file,
-                self.bucket_name,
-                file_key,
-                ExtraArgs={
-                    'ACL': 'public-read',
-                    'ContentType': file.content_type
-                }
-            )
+            with medir_aws('s3', 'upload_fileobj'):
+                self.s3_client.upload_fileobj(
+                    file,
+                    self.bucket_name,
+                    file_key,
+                    ExtraArgs={
+                        'ACL': 'public-read',
+                        'ContentType': file.content_type
+                    }
+                )
             
             file_url = f"{S3_BASE_URL}/{file_key}"
             
@@ -1,27 +1,31 @@
-import boto3
 from botocore.exceptions import ClientError
-from config import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_SESSION_TOKEN, AWS_REGION, SNS_TOPIC_ARN
+from services.aws_session import obtener_cliente
+from config import SNS_TOPIC_ARN, SNS_ENDPOINT_URL, SNS_TAMANO_LOTE
 
 class SNSService:
     
     def __init__(self):
 
-        self.sns_client = boto3.client(
-            'sns',
-            aws_access_key_id=AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=AWS_SECRET_ACCESS_KEY,
-            aws_session_token=AWS_SESSION_TOKEN,
-            region_name=AWS_REGION
-        )
         self.topic_arn = SNS_TOPIC_ARN
+
+    @property
+    def sns_client(self):
+
+        # El cliente se crea en la primera llamada real a SNS
+        return obtener_cliente('sns', SNS_ENDPOINT_URL)
+
+    @property
+    def sns_client_sin_reintentos(self):
+
+        # Para el worker asincrono: sus reintentos con backoff no se suman a los de botocore
+        return obtener_cliente('sns', SNS_ENDPOINT_URL, max_attempts=0)
     
-    def enviar_notificacion_alumno(self, alumno):
+    def construir_notificacion(self, alumno):
 
+        # Mismo contenido para el envio individual, asincrono y por lotes
+        subject = f"Notificación de Alumno: {alumno.nombres} {alumno.apellidos}"
         
-        try:
-            subject = f"Notificación de Alumno: {alumno.nombres} {alumno.apellidos}"
-            
-            message = f"""
+        message = f"""
 Hola,
 
 Se ha solicitado el envío de información del siguiente alumno:
@@ -39,25 +43,38 @@ Este mensaje fue generado automáticamente por el sistema UADY-AWS.
 
 Saludos cordiales,
 Sistema de Gestión de Alumnos
-            """.strip()
-            
-            response = self.sns_client.publish(
-                TopicArn=self.topic_arn,
-                Subject=subject,
-                Message=message,
-                MessageAttributes={
-                    'AlumnoID': {
-                        'DataType': 'Number',
-                        'StringValue': str(alumno.id)
-                    },
-                    'Matricula': {
-                        'DataType': 'String',
-                        'StringValue': alumno.matricula or 'N/A'
-                    }
+        """.strip()
+
+        return {
+            'Subject': subject,
+            'Message': message,
+            'MessageAttributes': {
+                'AlumnoID': {
+                    'DataType': 'Number',
+                    'StringValue': str(alumno.id)
+                },
+                'Matricula': {
+                    'DataType': 'String',
+                    'StringValue': alumno.matricula or 'N/A'
                 }
-            )
-            
-            message_id = response.get('MessageId')
+            }
+        }
+
+    def publicar_notificacion(self, alumno, reintentar=True):
+
+        # Lanza las excepciones de botocore para que el llamador decida si reintenta
+        cliente = self.sns_client if reintentar else self.sns_client_sin_reintentos
+        response = cliente.publish(
+            TopicArn=self.topic_arn,
+            **self.construir_notificacion(alumno)
+        )
+
+        return response.get('MessageId')
+
+    def enviar_notificacion_alumno(self, alumno):
+
+        try:
+            message_id = self.publicar_notificacion(alumno)
             
             if message_id:
                 print(f"Notificacion enviada. MessageId: {message_id}")
@@ -74,4 +91,50 @@ Sistema de Gestión de Alumnos
             
         except Exception as e:
             print(f"Error durante el envio del SNS : {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def enviar_notificaciones_lote(self, alumnos):
+
+        # PublishBatch acepta hasta 10 mensajes por llamada
+        resultados = []
+
+        for inicio in range(0, len(alumnos), SNS_TAMANO_LOTE):
+            lote = alumnos[inicio:inicio + SNS_TAMANO_LOTE]
+            entradas = []
+
+            for alumno in lote:
+                notificacion = self.construir_notificacion(alumno)
+                notificacion['Id'] = str(alumno.id)
+                entradas.append(notificacion)
+
+            try:
+                response = self.sns_client.publish_batch(
+                    TopicArn=self.topic_arn,
+                    PublishBatchRequestEntries=entradas
+                )
+
+                for ok in response.get('Successful', []):
+                    resultados.append({
+                        'alumnoId': int(ok['Id']),
+                        'success': True,
+                        'messageId': ok.get('MessageId')
+                    })
+
+                for fallo in response.get('Failed', []):
+                    resultados.append({
+                        'alumnoId': int(fallo['Id']),
+                        'success': False,
+                        'error': f"[{fallo.get('Code')}] {fallo.get('Message', '')}".strip()
+                    })
+
+            except ClientError as e:
+                error_code = e.response['Error']['Code']
+                error_message = e.response['Error']['Message']
+                print(f"Error SNS [{error_code}]: {error_message}")
+                resultados.extend({'alumnoId': alumno.id, 'success': False, 'error': f"[{error_code}] {error_message}"} for alumno in lote)
+
+            except Exception as e:
+                print(f"Error durante el envio del SNS por lotes : {e}")
+                resultados.extend({'alumnoId': alumno.id, 'success': False, 'error': str(e)} for alumno in lote)
+
+        return resultados
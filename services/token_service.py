@@ -0,0 +1,221 @@
+from config import SESSION_DURACION, SESSION_TTL_ATRIBUTO, SESSION_TOKEN_SECRETO, SESSION_REVOCACION_INTERVALO
+import hashlib
+import hmac
+import os
+import threading
+import time
+import uuid
+
+VERSION_TOKEN = 'v1'
+
+class RevocacionesSesion:
+
+    # Copia en memoria de las sesiones revocadas ({id: expiresAt}); un hilo la recarga cada intervalo.
+    # Un logout hecho en este proceso se ve al instante, uno de otro worker tarda a lo mas un intervalo
+
+    def __init__(self, dynamodb_service, intervalo=SESSION_REVOCACION_INTERVALO):
+
+        self.dynamodb_service = dynamodb_service
+        self.intervalo = intervalo
+        self._revocadas = {}
+        self._cargada = False
+        self._lock = threading.Lock()
+        self._pid = None
+        self._detener = threading.Event()
+
+    def _asegurar_hilo(self):
+
+        # El hilo se crea al primer uso en cada proceso: los hilos no sobreviven al fork de gunicorn
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._detener.clear()
+            threading.Thread(target=self._recargar_periodicamente, name='revocaciones-sesion', daemon=True).start()
+
+    def _recargar_periodicamente(self):
+
+        while not self._detener.wait(self.intervalo):
+            self.recargar()
+
+    def detener(self):
+
+        self._detener.set()
+
+    def recargar(self):
+
+        revocadas = self.dynamodb_service.listar_revocadas()
+        if revocadas is None:
+            # Se conserva el conjunto anterior: una revocacion nunca se pierde por un fallo de lectura
+            return False
+
+        ahora = int(time.time())
+        with self._lock:
+            # Se mezclan para no olvidar revocaciones locales que el GSI aun no refleja
+            vigentes = {session_id: expira for session_id, expira in self._revocadas.items() if expira > ahora}
+            vigentes.update(revocadas)
+            self._revocadas = vigentes
+            self._cargada = True
+        return True
+
+    def agregar(self, session_id, expira):
+
+        with self._lock:
+            self._revocadas[session_id] = expira
+
+    def contiene(self, session_id):
+
+        # None si nunca se pudo cargar el conjunto: quien llama debe rechazar la sesion
+        self._asegurar_hilo()
+
+        if not self._cargada and not self.recargar():
+            return None
+
+        return session_id in self._revocadas
+
+    def estadisticas(self):
+
+        with self._lock:
+            return {
+                "revocadas": len(self._revocadas),
+                "cargada": self._cargada,
+                "intervalo": self.intervalo
+            }
+
+class TokenSesionService:
+
+    # Misma interfaz de sesiones que DynamoDBService, pero el sessionString es un token firmado:
+    # v1.<alumnoId>.<sessionId>.<fecha>.<expiresAt>.<hmac-sha256>
+    # Verificar no consulta DynamoDB; la tabla se sigue escribiendo al hacer login para poder
+    # listar y revocar sesiones. Los sessionString de 128 hex emitidos antes se siguen aceptando.
+
+    def __init__(self, dynamodb_service, secreto=SESSION_TOKEN_SECRETO):
+
+        # Sin un secreto compartido cada worker firmaria con uno distinto: se falla al arrancar
+        if not secreto:
+            raise RuntimeError("SESSION_MODO=token requiere SESSION_TOKEN_SECRETO")
+
+        self.dynamodb_service = dynamodb_service
+        self._secreto = secreto.encode()
+        self.revocaciones = RevocacionesSesion(dynamodb_service)
+
+    def _firmar(self, contenido):
+
+        return hmac.new(self._secreto, contenido.encode(), hashlib.sha256).hexdigest()
+
+    def _es_token(self, session_string):
+
+        return isinstance(session_string, str) and session_string.startswith(VERSION_TOKEN + '.')
+
+    def _decodificar(self, token):
+
+        # Solo comprueba la firma; devuelve la sesion descrita por el token o None
+        contenido, _, firma = token.rpartition('.')
+        partes = contenido.split('.')
+
+        if len(partes) != 5:
+            return None
+
+        if not hmac.compare_digest(firma.encode(), self._firmar(contenido).encode()):
+            return None
+
+        try:
+            alumno_id, fecha, expira = int(partes[1]), int(partes[3]), int(partes[4])
+        except ValueError:
+            return None
+
+        return {
+            'id': partes[2],
+            'fecha': fecha,
+            SESSION_TTL_ATRIBUTO: expira,
+            'alumnoId': alumno_id,
+            'active': True,
+            'sessionString': token
+        }
+
+    def crear_sesion(self, alumno_id):
+
+        session_id = str(uuid.uuid4())
+        timestamp = int(time.time())
+        expira = timestamp + SESSION_DURACION
+
+        contenido = f"{VERSION_TOKEN}.{alumno_id}.{session_id}.{timestamp}.{expira}"
+
+        return self.dynamodb_service.guardar_sesion({
+            'id': session_id,
+            'fecha': timestamp,
+            SESSION_TTL_ATRIBUTO: expira,
+            'alumnoId': alumno_id,
+            'active': True,
+            'sessionString': f"{contenido}.{self._firmar(contenido)}"
+        })
+
+    def obtener_sesion_activa(self, session_string):
+
+        if not self._es_token(session_string):
+            return self.dynamodb_service.obtener_sesion_activa(session_string)
+
+        session = self._decodificar(session_string)
+
+        if session is None:
+            print(f"Token de sesion invalido")
+            return None
+
+        if session[SESSION_TTL_ATRIBUTO] <= time.time():
+            print(f"Sesion expirada : ID={session['id']}")
+            return None
+
+        revocada = self.revocaciones.contiene(session['id'])
+
+        if revocada is None:
+            print(f"Revocaciones no disponibles, se rechaza la sesion : ID={session['id']}")
+            return None
+
+        if revocada:
+            print(f"Sesion revocada : ID={session['id']}")
+            return None
+
+        return session
+
+    def verificar_sesion(self, session_string):
+
+        return self.obtener_sesion_activa(session_string) is not None
+
+    def obtener_sesion_por_string(self, session_string):
+
+        if not self._es_token(session_string):
+            return self.dynamodb_service.obtener_sesion_por_string(session_string)
+
+        return self._decodificar(session_string)
+
+    def cerrar_sesion(self, session_string, session=None):
+
+        if not self._es_token(session_string):
+            return self.dynamodb_service.cerrar_sesion(session_string, session=session)
+
+        if session is None:
+            session = self._decodificar(session_string)
+
+        if session is None:
+            print(f"Token de sesion invalido")
+            return False
+
+        if not self.dynamodb_service.revocar_sesion(session):
+            return False
+
+        self.revocaciones.agregar(session['id'], session[SESSION_TTL_ATRIBUTO])
+        return True
+
+    def cerrar_sesiones_alumno(self, alumno_id):
+
+        revocadas = self.dynamodb_service.revocar_sesiones_alumno(alumno_id)
+        if revocadas is None:
+            return None
+
+        for session in revocadas:
+            self.revocaciones.agregar(session['id'], self.dynamodb_service.expiracion(session))
+
+        return len(revocadas)
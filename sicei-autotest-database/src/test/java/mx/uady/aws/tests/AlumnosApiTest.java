@@ -169,7 +169,7 @@ public class AlumnosApiTest {
                 .body(alumno)
                 .post("/alumnos/" + alumnoId + "/email")
                 .then()
-                .statusCode(200).contentType(ContentType.JSON);
+                .statusCode(202).contentType(ContentType.JSON);
     }
 
     @Test
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# La configuracion se lee al importar app/config: el entorno de pruebas se fija antes
+_DIRECTORIO = tempfile.mkdtemp(prefix="sicei-tests-")
+
+os.environ["DATABASE_URI"] = f"sqlite:///{os.path.join(_DIRECTORIO, 'primario.db')}"
+os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+os.environ["AWS_SESSION_TOKEN"] = "testing"
+os.environ["SNS_ENVIO_ASINCRONO"] = "false"
+os.environ["IMPORT_RECHAZOS_DIR"] = os.path.join(_DIRECTORIO, "rechazos")
+os.environ.setdefault("FLASK_SKIP_DOTENV", "1")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import api_rest  # noqa: E402,F401  registra todas las rutas
+from app import app as flask_app, db  # noqa: E402
+
+@pytest.fixture
+def app():
+    from cache_entidades import cache_entidades, BackendMemoria
+
+    # Cada prueba parte de tablas vacias: nada cacheado de una prueba anterior debe sobrevivir
+    cache_entidades.backend = BackendMemoria()
+
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        yield flask_app
+        db.session.remove()
+
+@pytest.fixture
+def client(app):
+    # buffered: cierra el cuerpo de la respuesta igual que un servidor WSGI
+    cliente = app.test_client()
+    for metodo in ("get", "post", "put", "delete"):
+        original = getattr(cliente, metodo)
+        setattr(cliente, metodo, lambda *args, _original=original, **kwargs: _original(*args, buffered=True, **kwargs))
+    return cliente
@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import event
+
+from app import db, Alumno
+from cache_entidades import cache_entidades, BackendCompartido
+from config import S3_BASE_URL
+from controllers import api_route_alumnos
+
+class SesionesFalsas:
+
+    def crear_sesion(self, alumno_id):
+        return {"id": "s1", "alumnoId": alumno_id, "fecha": 0, "sessionString": "x" * 128}
+
+@pytest.fixture
+def alumno(client, monkeypatch):
+    db.session.add(Alumno(nombres="Ana", apellidos="Diaz", matricula="A1", promedio=90, password="secreto"))
+    db.session.commit()
+    monkeypatch.setattr(api_route_alumnos, "sesiones", SesionesFalsas())
+
+def _login(client, password):
+    return client.post("/alumnos/1/session/login", json={"password": password})
+
+def test_password_nunca_entra_a_la_cache(client, alumno):
+    respuesta = client.get("/alumnos/1")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["password"] == "secreto"
+    guardado = cache_entidades.backend.obtener("alumnos:1")
+    assert guardado["matricula"] == "A1"
+    assert "password" not in guardado
+
+def test_login_compara_con_la_base_de_datos(client, alumno):
+    cache_entidades.obtener(Alumno, 1)
+
+    assert _login(client, "secreto").status_code == 200
+    assert _login(client, "otro").status_code == 400
+    assert client.post("/alumnos/2/session/login", json={"password": "secreto"}).status_code == 404
+
+def test_login_no_usa_un_password_de_la_cache(client, alumno):
+    # Aunque una entrada vieja lo trajera, el login no lo lee de la cache
+    cache_entidades.backend.guardar("alumnos:1", {"id": 1, "matricula": "A1", "password": "viejo", "version": 1})
+
+    assert _login(client, "viejo").status_code == 400
+    assert _login(client, "secreto").status_code == 200
+
+def test_304_no_lee_el_password(client, alumno):
+    etag = client.get("/alumnos/1").headers["ETag"]
+    sentencias = []
+    escuchar = lambda conn, cursor, sentencia, *args: sentencias.append(sentencia)
+    event.listen(db.engine, "before_cursor_execute", escuchar)
+    try:
+        respuesta = client.get("/alumnos/1", headers={"If-None-Match": etag})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", escuchar)
+
+    assert respuesta.status_code == 304
+    assert sentencias == []
+
+# ===== BACKEND COMPARTIDO CON UN CLIENTE LOCAL (get / set(ex=) / delete) =====
+
+class ClienteFalso:
+
+    def __init__(self):
+        self.datos = {}
+        self.caido = False
+
+    def _revisar(self):
+        if self.caido:
+            raise ConnectionError("cache no disponible")
+
+    def get(self, clave):
+        self._revisar()
+        return self.datos.get(clave)
+
+    def set(self, clave, valor, ex=None):
+        self._revisar()
+        assert ex is not None
+        self.datos[clave] = valor.encode()
+
+    def delete(self, *claves):
+        self._revisar()
+        for clave in claves:
+            self.datos.pop(clave, None)
+
+class S3Falso:
+
+    def key_de_url(self, file_url):
+        return file_url[len(S3_BASE_URL) + 1:]
+
+    def confirmar_subida(self, alumno_id, file_key):
+        return f"{S3_BASE_URL}/{file_key}"
+
+    def generar_variantes(self, file_key, al_terminar=None):
+        return True
+
+@pytest.fixture
+def compartido(alumno, monkeypatch):
+    cliente = ClienteFalso()
+    monkeypatch.setattr(cache_entidades, "backend", BackendCompartido(cliente))
+    monkeypatch.setattr(api_route_alumnos, "s3_service", S3Falso())
+    return cliente
+
+CLAVE = "sicei:entidad:v2:alumnos:1"
+
+def test_compartido_miss_y_luego_hit(client, compartido):
+    assert client.get("/alumnos/1").status_code == 200
+    assert CLAVE in compartido.datos
+    assert client.get("/alumnos/1").json["matricula"] == "A1"
+
+    estadisticas = cache_entidades.estadisticas()
+    assert estadisticas["backend"] == "compartido"
+    assert (estadisticas["misses"], estadisticas["hits"], estadisticas["errors"]) == (1, 1, 0)
+
+def test_compartido_nunca_guarda_el_password(client, compartido):
+    client.get("/alumnos/1")
+    assert _login(client, "secreto").status_code == 200
+
+    assert b"password" not in compartido.datos[CLAVE]
+    assert b"secreto" not in compartido.datos[CLAVE]
+
+@pytest.mark.parametrize("escribir", [
+    lambda client: client.put("/alumnos/1", json={"nombres": "Beatriz"}),
+    lambda client: client.delete("/alumnos/1"),
+    lambda client: client.post("/alumnos/1/fotoPerfil/confirm", json={"key": "alumnos/1/perfil_aaaaaaaa.png"}),
+])
+def test_compartido_se_invalida_al_escribir(client, compartido, escribir):
+    client.get("/alumnos/1")
+    assert CLAVE in compartido.datos
+
+    assert escribir(client).status_code == 200
+    assert CLAVE not in compartido.datos
+
+def test_compartido_caido_lee_de_la_base_de_datos(client, compartido):
+    compartido.caido = True
+
+    respuesta = client.get("/alumnos/1")
+    assert respuesta.status_code == 200
+    assert respuesta.json["matricula"] == "A1"
+    assert client.put("/alumnos/1", json={"nombres": "Beatriz"}).status_code == 200
+    assert client.get("/alumnos/1").json["nombres"] == "Beatriz"
+    assert cache_entidades.estadisticas()["errors"] >= 3
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+from sqlalchemy import event
+
+from app import db, Alumno
+from carga_masiva import insertar_en_lotes
+
+ALUMNO = {"nombres": "Ana", "apellidos": "Diaz", "promedio": 80, "password": "pw"}
+
+@pytest.fixture
+def sentencias(client):
+    registradas = []
+    escuchar = lambda conn, cursor, sentencia, *args: registradas.append(sentencia)
+    event.listen(db.engine, "before_cursor_execute", escuchar)
+    yield registradas
+    event.remove(db.engine, "before_cursor_execute", escuchar)
+
+def _matriculas():
+    return db.session.execute(db.select(Alumno.matricula).order_by(Alumno.id)).scalars().all()
+
+@pytest.mark.parametrize("url", ["/alumnos/bulk", "/profesores/bulk"])
+@pytest.mark.parametrize("cuerpo, tipo", [
+    ("", "application/json"),
+    ("[]", "application/json"),
+    ("\n\n", "application/x-ndjson"),
+])
+def test_un_cuerpo_sin_registros_es_un_400(client, url, cuerpo, tipo):
+    respuesta = client.post(url, data=cuerpo, content_type=tipo)
+
+    assert respuesta.status_code == 400
+    assert "error" in respuesta.json
+
+def test_se_inserta_en_lotes_de_tamano_fijo(client, sentencias):
+    filas = [{**ALUMNO, "matricula": f"A{i}"} for i in range(1, 6)]
+
+    insertados, errores = insertar_en_lotes(Alumno, filas, tamano_lote=2)
+
+    assert (insertados, errores) == (5, [])
+    assert sum(sentencia.startswith("INSERT INTO alumnos") for sentencia in sentencias) == 3
+    assert _matriculas() == ["A1", "A2", "A3", "A4", "A5"]
+
+def test_un_duplicado_reintenta_solo_su_lote_fila_por_fila(client, sentencias):
+    db.session.add(Alumno(matricula="A3", **ALUMNO))
+    db.session.commit()
+    sentencias.clear()
+    filas = [{**ALUMNO, "matricula": f"A{i}"} for i in (1, 2, 3, 4, 5)]
+
+    insertados, errores = insertar_en_lotes(Alumno, filas, indices=[10, 11, 12, 13, 14], tamano_lote=2)
+
+    assert insertados == 4
+    assert errores == [{"index": 12, "errors": {"database": "Registro duplicado."}}]
+    # Lote 1 de una vez; lote 2 falla y se repite fila por fila (A3, A4); lote 3 de una vez
+    assert sum(sentencia.startswith("INSERT INTO alumnos") for sentencia in sentencias) == 5
+    assert _matriculas() == ["A3", "A1", "A2", "A4", "A5"]
+
+def test_el_endpoint_rechaza_solo_el_duplicado(client):
+    db.session.add(Alumno(matricula="A2", **ALUMNO))
+    db.session.commit()
+
+    respuesta = client.post("/alumnos/bulk", json=[{**ALUMNO, "matricula": f"A{i}"} for i in (1, 2, 3)])
+
+    assert respuesta.status_code == 207
+    assert respuesta.json == {
+        "received": 3,
+        "inserted": 2,
+        "errors": [{"index": 1, "errors": {"database": "Registro duplicado."}}]
+    }
+
+def test_ndjson_y_arreglo_json_dan_el_mismo_resultado(client):
+    registros = [{**ALUMNO, "matricula": "A1"}, {**ALUMNO, "matricula": "A2", "promedio": 101}]
+
+    arreglo = client.post("/alumnos/bulk", data=json.dumps(registros), content_type="application/json")
+    db.session.execute(db.delete(Alumno))
+    db.session.commit()
+    ndjson = client.post("/alumnos/bulk", data="\n".join(map(json.dumps, registros)), content_type="application/x-ndjson")
+
+    assert arreglo.status_code == ndjson.status_code == 207
+    assert arreglo.json == ndjson.json
+    assert arreglo.json["inserted"] == 1
+    assert [error["index"] for error in arreglo.json["errors"]] == [1]
+
+def test_una_linea_ndjson_invalida_se_rechaza_con_su_indice(client):
+    cuerpo = "\n".join([json.dumps({**ALUMNO, "matricula": "A1"}), "{no es json", json.dumps({**ALUMNO, "matricula": "A2"})])
+
+    respuesta = client.post("/alumnos/bulk", data=cuerpo, content_type="application/x-ndjson")
+
+    assert respuesta.status_code == 207
+    assert respuesta.json["inserted"] == 2
+    assert respuesta.json["errors"] == [{"index": 1, "errors": {"json": "Línea JSON inválida."}}]
+    assert _matriculas() == ["A1", "A2"]
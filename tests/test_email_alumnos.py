@@ -0,0 +1,50 @@
+import pytest
+
+from app import db, Alumno
+from controllers import api_route_alumnos
+
+class SNSFalso:
+
+    def __init__(self):
+        self.enviados = []
+
+    def enviar_notificaciones_lote(self, alumnos):
+        self.enviados.extend(alumno.id for alumno in alumnos)
+        return [{"alumnoId": alumno.id, "success": True} for alumno in alumnos]
+
+@pytest.fixture
+def sns(client, monkeypatch):
+    for i, promedio in enumerate((60, 85, 95), start=1):
+        db.session.add(Alumno(nombres=f"A{i}", apellidos="B", matricula=f"M{i}", promedio=promedio, password="pw"))
+    db.session.commit()
+
+    falso = SNSFalso()
+    monkeypatch.setattr(api_route_alumnos, "sns_service", falso)
+    return falso
+
+@pytest.mark.parametrize("cuerpo", [
+    {"filtro": {}},
+    {"filtro": {"promedioMinimo": 80}},
+    {"todos": False},
+    {"todos": "true"},
+    {"todos": True, "filtro": {"promedioMin": 80}},
+    {},
+])
+def test_filtro_vacio_o_desconocido_no_notifica_a_nadie(client, sns, cuerpo):
+    respuesta = client.post("/alumnos/email", json=cuerpo)
+
+    assert respuesta.status_code == 400
+    assert sns.enviados == []
+
+def test_filtro_notifica_solo_a_los_que_cumplen(client, sns):
+    respuesta = client.post("/alumnos/email", json={"filtro": {"promedioMin": 80}})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["sent"] == 2
+    assert len(sns.enviados) == 2
+
+def test_todos_debe_pedirse_explicitamente(client, sns):
+    respuesta = client.post("/alumnos/email", json={"todos": True})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["sent"] == 3
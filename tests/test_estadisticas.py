@@ -0,0 +1,57 @@
+import math
+
+import pytest
+
+import estadisticas
+from app import db, Alumno
+
+@pytest.fixture(params=["numpy", "python"])
+def calculo(request, client, monkeypatch):
+    # Los mismos numeros con NumPy y con la implementacion en Python puro
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(estadisticas, "np", None)
+
+    estadisticas.invalidar_estadisticas(Alumno)
+    for i, promedio in enumerate((70, 80, 90, 100, None), start=1):
+        db.session.add(Alumno(nombres="Ana", apellidos="Diaz", matricula=f"A{i}", promedio=promedio, password="pw"))
+    db.session.commit()
+    return request.param
+
+def test_estadisticas_de_promedio(client, calculo):
+    resultado = client.get("/alumnos/stats?bins=2").json
+
+    assert resultado["count"] == 4
+    assert resultado["nulls"] == 1
+    assert resultado["mean"] == 85
+    assert (resultado["min"], resultado["max"]) == (70, 100)
+    assert resultado["stddev"] == pytest.approx(math.sqrt(125))
+    assert resultado["percentiles"]["p25"] == pytest.approx(77.5)
+    assert resultado["percentiles"]["p50"] == pytest.approx(85)
+    assert resultado["percentiles"]["p99"] == pytest.approx(99.7)
+    assert resultado["histogram"] == {"edges": [70, 85, 100], "counts": [2, 2]}
+
+def test_un_post_invalida_las_estadisticas(client, calculo):
+    assert client.get("/alumnos/stats").json["count"] == 4
+
+    client.post("/alumnos", json={"nombres": "Eva", "apellidos": "Ruiz", "matricula": "A9", "promedio": 60, "password": "pw"})
+
+    resultado = client.get("/alumnos/stats").json
+    assert resultado["count"] == 5
+    assert resultado["min"] == 60
+
+def test_un_calculo_que_cruza_una_escritura_no_se_guarda(client, calculo, monkeypatch):
+    calcular = estadisticas.calcular_estadisticas
+
+    def calcular_y_escribir(modelo, campo, bins):
+        # Lee antes de la escritura y termina despues de invalidar_estadisticas
+        resultado = calcular(modelo, campo, bins)
+        client.post("/alumnos", json={"nombres": "Eva", "apellidos": "Ruiz", "matricula": "A9", "promedio": 60, "password": "pw"})
+        return resultado
+
+    monkeypatch.setattr(estadisticas, "calcular_estadisticas", calcular_y_escribir)
+    assert client.get("/alumnos/stats").json["count"] == 4
+
+    monkeypatch.setattr(estadisticas, "calcular_estadisticas", calcular)
+    assert client.get("/alumnos/stats").json["count"] == 5
@@ -0,0 +1,85 @@
+import io
+import os
+import stat
+import time
+
+import importacion_csv
+from config import IMPORT_RECHAZOS_DIR
+
+CSV = "nombres,apellidos,matricula,promedio,password\nAna,Diaz,A1,90,pw\nBeto,Paz,X9,80,pw\n"
+
+def _importar(client):
+    return client.post(
+        "/alumnos/import",
+        data={"archivo": (io.BytesIO(CSV.encode()), "alumnos.csv")},
+        content_type="multipart/form-data",
+    )
+
+def test_rechazos_en_directorio_privado_y_descargables(client):
+    respuesta = _importar(client)
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["inserted"] == 1
+    nombre = respuesta.json["rejectsFile"]
+    assert importacion_csv.NOMBRE_RECHAZOS.match(nombre)
+
+    assert stat.S_IMODE(os.stat(IMPORT_RECHAZOS_DIR).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(os.path.join(IMPORT_RECHAZOS_DIR, nombre)).st_mode) == 0o600
+
+    descarga = client.get(f"/alumnos/import/rechazos/{nombre}")
+    assert descarga.status_code == 200
+    assert "X9" in descarga.get_data(as_text=True)
+
+def test_solo_se_sirven_nombres_de_rechazos(client):
+    _importar(client)
+    with open(os.path.join(IMPORT_RECHAZOS_DIR, "otro.csv"), "w") as archivo:
+        archivo.write("secreto")
+
+    for nombre in ("otro.csv", "rechazos_123.csv", "..%2Fprimario.db", "rechazos_" + "g" * 32 + ".csv"):
+        assert client.get(f"/alumnos/import/rechazos/{nombre}").status_code == 404
+
+def test_rechazos_viejos_se_borran(client, monkeypatch):
+    nombre = _importar(client).json["rejectsFile"]
+    ruta = os.path.join(IMPORT_RECHAZOS_DIR, nombre)
+    viejo = time.time() - importacion_csv.IMPORT_RECHAZOS_EDAD_MAXIMA - 60
+    os.utime(ruta, (viejo, viejo))
+
+    assert client.get(f"/alumnos/import/rechazos/{nombre}").status_code == 404
+    assert not os.path.exists(ruta)
+
+def _csv_cortado(filas_validas):
+    # Filas validas (y una rechazada) y luego bytes que no son UTF-8: el error llega despues de varios lotes
+    lineas = ["nombres,apellidos,matricula,promedio,password", "Beto,Paz,X9,80,pw"]
+    lineas += [f"Ana,Diaz,A{i},90,pw" for i in range(1, filas_validas + 1)]
+    return ("\n".join(lineas) + "\n").encode() + b"Eva,Ruiz,A\xff\xfe,70,pw\n"
+
+def test_csv_cortado_a_la_mitad_devuelve_el_resumen_parcial(client):
+    assert client.get("/alumnos/stats").json["count"] == 0
+
+    respuesta = client.post(
+        "/alumnos/import?batchSize=100",
+        data={"archivo": (io.BytesIO(_csv_cortado(1000)), "alumnos.csv")},
+        content_type="multipart/form-data",
+    )
+
+    assert respuesta.status_code == 400
+    resumen = respuesta.json
+    assert resumen["error"].startswith("CSV inválido")
+    assert resumen["errorLine"] > 2
+    assert 0 < resumen["inserted"] <= 1000
+    assert resumen["rejected"] == 1
+
+    # El archivo de rechazos se conserva y las estadisticas ya cuentan lo insertado
+    assert "X9" in client.get(f"/alumnos/import/rechazos/{resumen['rejectsFile']}").get_data(as_text=True)
+    assert client.get("/alumnos/stats").json["count"] == resumen["inserted"]
+
+def test_la_importacion_invalida_la_cache_de_ids_reutilizados(client):
+    from app import db, Alumno
+    from cache_entidades import cache_entidades
+
+    # Una entrada vieja de la cache para un id que la importacion va a ocupar
+    cache_entidades.backend.guardar("alumnos:1", {"id": 1, "nombres": "Viejo", "matricula": "A0", "version": 0})
+
+    assert _importar(client).status_code == 200
+    assert client.get("/alumnos/1").json["nombres"] == "Ana"
+    assert db.session.get(Alumno, 1).matricula == "A1"
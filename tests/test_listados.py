@@ -0,0 +1,54 @@
+import pytest
+
+from app import db, Alumno
+
+@pytest.fixture
+def con_nulos(client):
+    # Filas insertadas sin validar: NULL y valores que hoy ya no pasarian validar_matricula/validar_promedio
+    db.session.execute(db.insert(Alumno), [
+        {"id": 1, "nombres": "Ana", "matricula": "A2", "promedio": 80.0},
+        {"id": 2, "nombres": "Beto", "matricula": None, "promedio": None},
+        {"id": 3, "nombres": "Caro", "matricula": "a-legado", "promedio": 120.5},
+        {"id": 4, "nombres": "Dani", "matricula": "A1", "promedio": None},
+        {"id": 5, "nombres": "Eli", "matricula": None, "promedio": 80.0},
+    ])
+    db.session.commit()
+
+def _ids(respuesta):
+    assert respuesta.status_code == 200, respuesta.json
+    return [item["id"] for item in respuesta.json]
+
+def _paginar(client, sort):
+    # Recorre todas las paginas siguiendo nextCursor
+    ids = []
+    after = None
+    while True:
+        respuesta = client.get("/alumnos", query_string={"sort": sort, "limit": 1, **({"after": after} if after is not None else {})})
+        assert respuesta.status_code == 200, respuesta.json
+        ids += [item["id"] for item in respuesta.json["items"]]
+        after = respuesta.json["nextCursor"]
+        if after is None:
+            return ids
+
+@pytest.mark.parametrize("sort, esperado", [
+    ("promedio", [2, 4, 1, 5, 3]),
+    ("-promedio", [3, 5, 1, 4, 2]),
+    ("matricula", [2, 5, 4, 1, 3]),
+    ("-matricula", [3, 1, 4, 5, 2]),
+])
+def test_ordenar_no_quita_las_filas_con_null(client, con_nulos, sort, esperado):
+    assert _ids(client.get(f"/alumnos?sort={sort}")) == esperado
+    assert _ids(client.get(f"/alumnos?sort={sort}&stream=true")) == esperado
+
+@pytest.mark.parametrize("sort, esperado", [
+    ("promedio", [2, 4, 1, 5, 3]),
+    ("-promedio", [3, 5, 1, 4, 2]),
+    ("matricula", [2, 5, 4, 1, 3]),
+    ("-matricula", [3, 1, 4, 5, 2]),
+])
+def test_el_cursor_pagina_sobre_null_y_valores_que_ya_no_validan(client, con_nulos, sort, esperado):
+    assert _paginar(client, sort) == esperado
+
+def test_cursor_invalido(client, con_nulos):
+    for after in ("80.0,1", "vabc,1", "n,x", "v80.0"):
+        assert client.get("/alumnos", query_string={"sort": "promedio", "limit": 1, "after": after}).status_code == 400
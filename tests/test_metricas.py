@@ -0,0 +1,20 @@
+import pytest
+from botocore.exceptions import ClientError
+
+from services.metricas_service import medir_aws, registro
+
+class ErrorSinRespuesta(Exception):
+
+    response = None
+
+@pytest.mark.parametrize("error, codigo", [
+    (ErrorSinRespuesta("sin respuesta"), "ErrorSinRespuesta"),
+    (ClientError({"Error": {"Code": "NoSuchBucket", "Message": "x"}}, "PutObject"), "NoSuchBucket"),
+])
+def test_medir_aws_propaga_el_error_original(error, codigo):
+    with pytest.raises(type(error)) as capturado:
+        with medir_aws("s3", "upload_fileobj"):
+            raise error
+
+    assert capturado.value is error
+    assert f'aws_request_errors_total{{service="s3",operation="upload_fileobj",code="{codigo}"}}' in registro.exponer()
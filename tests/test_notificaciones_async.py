@@ -0,0 +1,83 @@
+import pytest
+from moto import mock_aws
+
+from controllers import api_route_alumnos
+from services import aws_session
+from services.notificacion_jobs import NotificacionJobs
+from services.notificacion_worker import NotificacionWorker
+
+@pytest.fixture
+def sns(client, monkeypatch):
+    # SNS y la tabla de jobs en moto; un worker nuevo por prueba, sin esperas entre reintentos
+    with mock_aws():
+        aws_session.reiniciar()
+        jobs = NotificacionJobs()
+        jobs.crear_tabla()
+
+        sns_service = api_route_alumnos.sns_service
+        topico = sns_service.sns_client.create_topic(Name="notificaciones")["TopicArn"]
+        monkeypatch.setattr(sns_service, "topic_arn", topico)
+
+        worker = NotificacionWorker(sns_service, jobs, backoff_base=0)
+        monkeypatch.setattr(api_route_alumnos, "notificacion_worker", worker)
+        monkeypatch.setattr(api_route_alumnos, "SNS_ENVIO_ASINCRONO", True)
+
+        client.post("/alumnos", json={"nombres": "Ana", "apellidos": "Diaz", "matricula": "A1", "password": "pw"})
+        yield sns_service, worker
+
+    aws_session.reiniciar()
+
+def _encolar(client):
+    respuesta = client.post("/alumnos/1/email")
+    assert respuesta.status_code == 202
+    assert respuesta.headers["Location"] == respuesta.json["statusUrl"]
+    return respuesta.json["statusUrl"], respuesta.json["jobId"]
+
+def test_el_job_se_encola_y_termina_enviado(client, sns):
+    _, worker = sns
+    url, job_id = _encolar(client)
+
+    assert client.get(url).json["status"] in ("queued", "sending", "sent")
+
+    worker.detener()
+    respuesta = client.get(url)
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["status"] == "sent"
+    assert respuesta.json["attempts"] == 1
+    assert respuesta.json["messageId"]
+    assert respuesta.json["jobId"] == job_id
+
+def test_el_estado_se_ve_desde_otro_worker(client, sns):
+    sns_service, worker = sns
+    _, job_id = _encolar(client)
+    worker.detener()
+
+    # Otro proceso del servidor (u otro tras un reciclado) no comparte memoria con este
+    otro = NotificacionWorker(sns_service, NotificacionJobs())
+    assert otro.estado(job_id)["status"] == "sent"
+
+def test_el_job_falla_sin_reintentar_un_error_no_reintentable(client, sns, monkeypatch):
+    sns_service, worker = sns
+    monkeypatch.setattr(sns_service, "topic_arn", sns_service.topic_arn + "-inexistente")
+    llamadas = []
+    sns_service.sns_client_sin_reintentos.meta.events.register("before-call.sns.Publish", lambda **kwargs: llamadas.append(1))
+
+    url, _ = _encolar(client)
+    worker.detener()
+    job = client.get(url).json
+
+    assert job["status"] == "failed"
+    assert job["attempts"] == 1
+    assert job["error"]
+    assert len(llamadas) == 1
+
+def test_el_worker_no_suma_los_reintentos_de_botocore(sns):
+    sns_service, _ = sns
+
+    # botocore guarda el total de intentos, el inicial incluido
+    assert sns_service.sns_client_sin_reintentos.meta.config.retries["total_max_attempts"] == 1
+    assert sns_service.sns_client_sin_reintentos is not sns_service.sns_client
+
+def test_job_inexistente(client, sns):
+    assert client.get("/notificaciones/no-existe").status_code == 404
@@ -0,0 +1,105 @@
+import json
+import os
+import stat
+
+import pytest
+from moto import mock_aws
+from sqlalchemy import event
+
+import perfilado
+from services import aws_session
+from services.perfilado_service import instrumentar_cliente_perfilado
+
+TOKEN = "token-de-admin"
+
+@pytest.fixture
+def perfilando(app, tmp_path, monkeypatch):
+    from app import db
+
+    # En las pruebas PERFILADO_TOKEN no esta definido: los hooks se instalan solo aqui
+    monkeypatch.setattr(perfilado, "PERFILADO_TOKEN", TOKEN)
+    monkeypatch.setattr(perfilado, "PERFILADO_DIR", str(tmp_path / "perfiles"))
+    monkeypatch.setattr(app, "before_request_funcs", {None: [perfilado.iniciar_perfilado]})
+    monkeypatch.setattr(app, "after_request_funcs", {None: [perfilado.terminar_perfilado]})
+    monkeypatch.setattr(app, "teardown_request_funcs", {None: [perfilado.cancelar_perfilado]})
+    event.listen(db.engine, "before_cursor_execute", perfilado.antes_de_consulta)
+    event.listen(db.engine, "after_cursor_execute", perfilado.despues_de_consulta)
+
+    yield tmp_path / "perfiles"
+
+    event.remove(db.engine, "before_cursor_execute", perfilado.antes_de_consulta)
+    event.remove(db.engine, "after_cursor_execute", perfilado.despues_de_consulta)
+
+def _perfil(directorio, respuesta):
+    with open(directorio / f"{respuesta.headers['X-Perfil-Id']}.json") as archivo:
+        return json.load(archivo)
+
+def test_solo_se_perfila_con_el_token_aunque_la_ruta_este_en_perfilado_rutas(client, perfilando, monkeypatch):
+    monkeypatch.setattr(perfilado, "PERFILADO_RUTAS", {"/alumnos/<int:alumno_id>"})
+    client.post("/alumnos", json={"nombres": "Ana", "matricula": "A1", "password": "pw"})
+
+    assert "X-Perfil-Id" not in client.get("/alumnos/1").headers
+    assert client.get("/alumnos/1", headers={"X-Perfilar": "otro"}).status_code == 403
+    assert "X-Perfil-Id" in client.get("/alumnos/1", headers={"X-Perfilar": TOKEN}).headers
+    # Con PERFILADO_RUTAS definido, las demas rutas no se perfilan ni con el token
+    assert "X-Perfil-Id" not in client.get("/alumnos", headers={"X-Perfilar": TOKEN}).headers
+
+def test_los_parametros_secretos_no_llegan_al_perfil_ni_al_log(client, perfilando, capsys):
+    respuesta = client.post(
+        "/alumnos",
+        json={"nombres": "Ana", "matricula": "A1", "password": "clave-muy-secreta"},
+        headers={"X-Perfilar": TOKEN}
+    )
+    respuesta = client.put(
+        "/alumnos/1",
+        json={"nombres": "Ana", "matricula": "A1", "password": "otra-clave-secreta"},
+        headers={"X-Perfilar": TOKEN}
+    )
+
+    perfil = _perfil(perfilando, respuesta)
+    assert any("UPDATE" in consulta["sentencia"] for consulta in perfil["sql"])
+    assert "otra-clave-secreta" not in json.dumps(perfil)
+    assert "***" in json.dumps(perfil)
+
+    salida = capsys.readouterr().out
+    assert "clave-muy-secreta" not in salida and "otra-clave-secreta" not in salida
+
+def test_los_valores_de_dynamodb_se_ocultan(app, perfilando):
+    from controllers.api_route_alumnos import dynamodb_service
+    from services.perfilado_service import TrazaPeticion, traza_actual
+
+    with mock_aws():
+        aws_session.reiniciar()
+        dynamodb_service.cache.limpiar()
+        dynamodb_service.crear_tabla()
+        instrumentar_cliente_perfilado(dynamodb_service.table.meta.client)
+
+        traza = TrazaPeticion("0" * 32, "POST", "/prueba", 1)
+        traza_actual.set(traza)
+        try:
+            dynamodb_service.table.put_item(Item={"id": "s1", "alumnoId": 1, "sessionString": "f" * 128})
+            dynamodb_service.obtener_sesion_por_string("e" * 128)
+        finally:
+            traza_actual.set(None)
+
+    aws_session.reiniciar()
+
+    texto = json.dumps(traza.resumen()["aws"])
+    assert [llamada["llamada"] for llamada in traza.resumen()["aws"]] == ["dynamodb.PutItem", "dynamodb.Query"]
+    assert "f" * 128 not in texto and "e" * 128 not in texto
+
+def test_perfiles_privados_y_solo_los_mas_recientes(client, perfilando, monkeypatch):
+    monkeypatch.setattr(perfilado, "PERFILADO_MAXIMO", 2)
+
+    ids = []
+    for _ in range(4):
+        respuesta = client.get("/alumnos", headers={"X-Perfilar": TOKEN})
+        ids.append(respuesta.headers["X-Perfil-Id"])
+        # mtime distinto aunque el sistema de archivos tenga poca resolucion
+        ruta = perfilando / f"{ids[-1]}.json"
+        os.utime(ruta, (len(ids), len(ids)))
+
+    assert stat.S_IMODE(os.stat(perfilando).st_mode) == 0o700
+    assert sorted(os.listdir(perfilando)) == sorted(f"{perfil_id}.json" for perfil_id in ids[-2:])
+    for nombre in os.listdir(perfilando):
+        assert stat.S_IMODE(os.stat(perfilando / nombre).st_mode) == 0o600
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import event
+
+from app import db, Alumno, Profesor
+
+@pytest.fixture
+def consultas(client):
+    for i in range(1, 201):
+        db.session.add(Alumno(nombres="Ana", apellidos="Diaz", matricula=f"A{i}", promedio=i % 100, password="pw"))
+        db.session.add(Profesor(nombres="Luis", apellidos="Paz", numeroEmpleado=1000 + i, horasClase=i % 40))
+    db.session.commit()
+    db.session.execute(db.text("ANALYZE"))
+
+    registradas = []
+    escuchar = lambda conn, cursor, sentencia, parametros, *args: registradas.append((sentencia, parametros))
+    event.listen(db.engine, "before_cursor_execute", escuchar)
+    yield registradas
+    event.remove(db.engine, "before_cursor_execute", escuchar)
+
+def _plan_del_listado(client, consultas, url):
+    # El plan de la sentencia que el endpoint ejecuto de verdad, no de una copia escrita a mano
+    tabla = url.split("?")[0].strip("/")
+    consultas.clear()
+    assert client.get(url).status_code == 200
+    sentencia, parametros = next(
+        (sentencia, parametros) for sentencia, parametros in consultas
+        if sentencia.lstrip().startswith(f"SELECT {tabla}.")
+    )
+    with db.engine.connect() as conexion:
+        filas = conexion.exec_driver_sql(f"EXPLAIN QUERY PLAN {sentencia}", parametros).all()
+    return " | ".join(fila[-1] for fila in filas)
+
+@pytest.mark.parametrize("url", [
+    "/alumnos?promedioMin=80",
+    "/alumnos?promedioMin=20&promedioMax=30&sort=promedio",
+    "/alumnos?sort=-promedio&limit=5",
+])
+def test_rangos_y_orden_por_promedio_usan_su_indice(client, consultas, url):
+    plan = _plan_del_listado(client, consultas, url)
+
+    assert "ix_alumnos_promedio_id" in plan
+    assert "TEMP B-TREE" not in plan
+
+def test_filtro_por_matricula_usa_su_indice(client, consultas):
+    plan = _plan_del_listado(client, consultas, "/alumnos?matricula=A15")
+
+    assert "ix_alumnos_matricula" in plan
+
+@pytest.mark.parametrize("url", [
+    "/profesores?numeroEmpleado=1015",
+    "/profesores?sort=numeroEmpleado&limit=5",
+])
+def test_filtro_y_orden_por_numero_de_empleado_usan_su_indice(client, consultas, url):
+    plan = _plan_del_listado(client, consultas, url)
+
+    assert "ix_profesores_numeroEmpleado" in plan
+    assert "TEMP B-TREE" not in plan
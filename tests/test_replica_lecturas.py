@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from app import db, Alumno
+from estadisticas import invalidar_estadisticas
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'replica.db'}")
+    db.metadata.create_all(engine)
+    monkeypatch.setitem(db.engines, "replica", engine)
+
+    # Filas distintas en cada base para saber de cual salio cada lectura
+    db.session.add(Alumno(nombres="Primario", apellidos="P", matricula="A100", promedio=90, password="pw"))
+    db.session.commit()
+    with engine.begin() as conexion:
+        conexion.execute(db.insert(Alumno).values(nombres="Replica", apellidos="R", matricula="A200", promedio=80, password="pw", version=1))
+
+    sentencias = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sentencia, *args: sentencias.append(sentencia))
+    engine.sentencias = sentencias
+
+    yield engine
+    engine.dispose()
+
+def _matriculas(engine):
+    with engine.connect() as conexion:
+        return sorted(conexion.execute(text("SELECT matricula FROM alumnos")).scalars())
+
+def test_get_lee_de_la_replica(client, replica):
+    respuesta = client.get("/alumnos")
+
+    assert respuesta.status_code == 200
+    assert [alumno["matricula"] for alumno in respuesta.json] == ["A200"]
+    assert replica.sentencias
+
+def test_escrituras_van_al_primario(client, replica):
+    respuesta = client.post("/alumnos", json={"nombres": "Nuevo", "apellidos": "N", "matricula": "A300", "promedio": 70, "password": "pw"})
+
+    assert respuesta.status_code == 201
+    assert replica.sentencias == []
+    assert _matriculas(db.engine) == ["A100", "A300"]
+    assert _matriculas(replica) == ["A200"]
+
+def test_lecturas_de_una_escritura_van_al_primario(client, replica):
+    # El PUT lee el alumno antes de escribirlo: esa lectura tambien debe ir al primario
+    respuesta = client.put("/alumnos/1", json={"nombres": "Cambiado", "apellidos": "P", "matricula": "A100", "promedio": 95, "password": "pw"})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["matricula"] == "A100"
+    assert respuesta.json["promedio"] == 95
+    assert replica.sentencias == []
+    with replica.connect() as conexion:
+        assert conexion.execute(text("SELECT nombres FROM alumnos")).scalar() == "Replica"
+
+def test_estadisticas_se_calculan_en_el_primario(client, replica):
+    # La cache es compartida: un calculo con la replica atrasada quedaria hasta el TTL
+    invalidar_estadisticas(Alumno)
+    client.post("/alumnos", json={"nombres": "Nuevo", "apellidos": "N", "matricula": "A300", "promedio": 70, "password": "pw"})
+    replica.sentencias.clear()
+
+    respuesta = client.get("/alumnos/stats")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["count"] == 2
+    assert respuesta.json["min"] == 70
+    assert replica.sentencias == []
+
+def test_la_cache_de_entidades_se_llena_del_primario(client, replica):
+    # El alumno 1 es "A100" en el primario y "A200" en la replica
+    respuesta = client.get("/alumnos/1?fields=id,matricula")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["matricula"] == "A100"
+    assert replica.sentencias == []
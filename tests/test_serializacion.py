@@ -0,0 +1,44 @@
+import json
+
+import pytest
+from flask import jsonify
+
+from app import db, Alumno, Profesor
+
+@pytest.fixture
+def datos(client):
+    # Lo que mas facil rompe una serializacion a mano: escapes, no ASCII, NULL y floats raros
+    db.session.add_all([
+        Alumno(nombres="José Ñandú", apellidos='O\'Neil "el 2"', matricula="A1", promedio=0.1 + 0.2, password="pw\\\n\t"),
+        Alumno(nombres="Zoë 😀", apellidos="日本", matricula="A2", promedio=float("inf"), password=None,
+               fotoPerfilUrl="https://s3/alumnos/2/perfil_aaaaaaaa.png",
+               fotoPerfilVariantesUrls=json.dumps({"thumb": "https://s3/alumnos/2/perfil_aaaaaaaa_thumb.webp"})),
+        Alumno(nombres=None, apellidos=None, matricula=None, promedio=None, password=None),
+        Alumno(nombres="Ana", apellidos="Diaz", matricula="A4", promedio=100.0, password="x" * 300),
+        Profesor(nombres="Ürsula", apellidos="\u2028", numeroEmpleado=7, horasClase=None),
+        Profesor(nombres="Beto", apellidos="Paz", numeroEmpleado=None, horasClase=40),
+    ])
+    db.session.commit()
+    db.session.expunge_all()
+
+def _anterior(modelo, campos=None):
+    # Lo que respondian los listados antes de SerializadorFilas: objetos ORM y to_dict por fila
+    return [registro.to_dict(campos) for registro in modelo.query.order_by(modelo.id).all()]
+
+@pytest.mark.parametrize("url, modelo, campos", [
+    ("/alumnos", Alumno, None),
+    ("/alumnos?fields=promedio,nombres,fotoPerfilVariantes", Alumno, ["promedio", "nombres", "fotoPerfilVariantes"]),
+    ("/alumnos?stream=true", Alumno, None),
+    ("/profesores", Profesor, None),
+    ("/profesores?stream=1&fields=apellidos", Profesor, ["apellidos"]),
+])
+def test_listado_identico_a_to_dict(client, datos, url, modelo, campos):
+    respuesta = client.get(url)
+
+    assert respuesta.get_data() == jsonify(_anterior(modelo, campos)).get_data()
+
+def test_pagina_identica_a_to_dict(client, datos):
+    respuesta = client.get("/alumnos?limit=3")
+
+    esperado = jsonify({"items": _anterior(Alumno)[:3], "nextCursor": 3}).get_data()
+    assert respuesta.get_data() == esperado
@@ -0,0 +1,210 @@
+from types import SimpleNamespace
+
+import pytest
+from moto import mock_aws
+
+from services import aws_session
+
+@pytest.fixture
+def dynamodb(app):
+    from controllers.api_route_alumnos import dynamodb_service
+
+    with mock_aws():
+        aws_session.reiniciar()
+        dynamodb_service.cache.limpiar()
+        dynamodb_service.crear_tabla()
+
+        llamadas = []
+        dynamodb_service.table.meta.client.meta.events.register(
+            "before-call.dynamodb.*", lambda model, **kwargs: llamadas.append(model.name)
+        )
+        yield dynamodb_service, llamadas
+
+    aws_session.reiniciar()
+
+def _crear_alumno_con_sesion(client):
+    client.post("/alumnos", json={"nombres": "Ana", "matricula": "A1", "password": "pw"})
+    return client.post("/alumnos/1/session/login", json={"password": "pw"}).json["sessionString"]
+
+def test_verify_usa_query_sobre_el_indice_y_nunca_scan(client, dynamodb):
+    dynamodb_service, llamadas = dynamodb
+    session_string = _crear_alumno_con_sesion(client)
+
+    # Sin cache, para forzar la lectura en DynamoDB
+    dynamodb_service.cache.limpiar()
+    llamadas.clear()
+
+    respuesta = client.post("/alumnos/1/session/verify", json={"sessionString": session_string})
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["valid"] is True
+    assert llamadas == ["Query"]
+
+def test_logout_usa_query_sobre_el_indice_y_nunca_scan(client, dynamodb):
+    dynamodb_service, llamadas = dynamodb
+    session_string = _crear_alumno_con_sesion(client)
+
+    dynamodb_service.cache.limpiar()
+    llamadas.clear()
+
+    respuesta = client.post("/alumnos/1/session/logout", json={"sessionString": session_string})
+
+    assert respuesta.status_code == 200
+    assert "Query" in llamadas
+    assert "Scan" not in llamadas
+
+    respuesta = client.post("/alumnos/1/session/verify", json={"sessionString": session_string})
+    assert respuesta.status_code == 400
+    assert "Scan" not in llamadas
+
+def test_sessionstring_inexistente_no_hace_scan(client, dynamodb):
+    _, llamadas = dynamodb
+    client.post("/alumnos", json={"nombres": "Ana", "matricula": "A1", "password": "pw"})
+    llamadas.clear()
+
+    respuesta = client.post("/alumnos/1/session/verify", json={"sessionString": "0" * 128})
+
+    assert respuesta.status_code == 400
+    assert llamadas == ["Query"]
+
+def test_logout_no_revive_la_sesion_con_una_lectura_atrasada_del_indice(client, dynamodb, monkeypatch):
+    dynamodb_service, _ = dynamodb
+    session_string = _crear_alumno_con_sesion(client)
+    activa = dynamodb_service.obtener_sesion_por_string(session_string)
+
+    client.post("/alumnos/1/session/logout", json={"sessionString": session_string})
+
+    # Simula un GSI que aun devuelve la copia anterior al logout
+    monkeypatch.setattr(dynamodb_service.table, "query", lambda **kwargs: {"Items": [activa]})
+
+    respuesta = client.post("/alumnos/1/session/verify", json={"sessionString": session_string})
+    assert respuesta.status_code == 400
+
+def test_listar_y_cerrar_todas_exigen_una_sesion_del_alumno(client, dynamodb):
+    session_string = _crear_alumno_con_sesion(client)
+    client.post("/alumnos", json={"nombres": "Luis", "matricula": "A2", "password": "pw2"})
+    otra = client.post("/alumnos/2/session/login", json={"password": "pw2"}).json["sessionString"]
+
+    for ruta in ("/alumnos/1/sessions", "/alumnos/1/session/logout-all"):
+        metodo = client.get if ruta.endswith("sessions") else client.post
+        assert metodo(ruta).status_code == 401
+        assert metodo(ruta, headers={"X-Session-String": "0" * 128}).status_code == 401
+        assert metodo(ruta, headers={"X-Session-String": otra}).status_code == 403
+
+    respuesta = client.get("/alumnos/1/sessions", headers={"X-Session-String": session_string})
+    assert respuesta.status_code == 200
+    assert "sessionString" not in respuesta.get_data(as_text=True)
+
+    respuesta = client.post("/alumnos/1/session/logout-all", json={"sessionString": session_string})
+    assert respuesta.status_code == 200
+
+    # La sesion del alumno 2 sigue activa; la del alumno 1 ya no verifica
+    assert client.post("/alumnos/2/session/verify", json={"sessionString": otra}).status_code == 200
+    assert client.post("/alumnos/1/session/verify", json={"sessionString": session_string}).status_code == 400
+
+def test_modo_token_sin_secreto_falla_al_arrancar():
+    from services.token_service import TokenSesionService
+
+    for secreto in (None, ""):
+        with pytest.raises(RuntimeError, match="SESSION_TOKEN_SECRETO"):
+            TokenSesionService(None, secreto=secreto)
+
+def _llenar_con_otras_sesiones(dynamodb_service, desde, hasta):
+    with dynamodb_service.table.batch_writer() as lote:
+        for i in range(desde, hasta):
+            lote.put_item(Item={
+                "id": f"otra-{i}", "alumnoId": 1000 + i, "fecha": i, "expiresAt": 2 ** 40,
+                "active": True, "sessionString": f"{i:0128x}"
+            })
+
+def test_el_costo_de_verificar_no_crece_con_la_tabla(client, dynamodb):
+    dynamodb_service, _ = dynamodb
+    session_string = _crear_alumno_con_sesion(client)
+
+    # Cada lectura (Query o Scan) pide su capacidad consumida y se registra cuantos items leyo
+    leidos = []
+    eventos = dynamodb_service.table.meta.client.meta.events
+    for operacion in ("Query", "Scan"):
+        eventos.register(f"before-parameter-build.dynamodb.{operacion}", lambda params, **kwargs: params.update(ReturnConsumedCapacity="TOTAL"))
+        eventos.register(f"after-call.dynamodb.{operacion}", lambda parsed, **kwargs: leidos.append((parsed["ScannedCount"], parsed["ConsumedCapacity"]["CapacityUnits"])))
+
+    costos = []
+    # N = 50 sesiones de otros alumnos y luego 10N
+    for desde, hasta in ((0, 50), (50, 500)):
+        _llenar_con_otras_sesiones(dynamodb_service, desde, hasta)
+        dynamodb_service.cache.limpiar()
+        leidos.clear()
+
+        respuesta = client.post("/alumnos/1/session/verify", json={"sessionString": session_string})
+        assert respuesta.status_code == 200
+        dynamodb_service.cache.limpiar()
+        assert dynamodb_service.obtener_sesion_por_string(session_string)["alumnoId"] == 1
+        costos.append(list(leidos))
+
+    # Una lectura de un item por busqueda (verify y la directa), con 50 o con 500 sesiones
+    assert costos[0] == costos[1]
+    assert [scanned for scanned, _ in costos[0]] == [1, 1]
+
+def test_cache_de_sesiones_cuenta_hits_y_misses_y_el_logout_la_actualiza(client, dynamodb):
+    dynamodb_service, llamadas = dynamodb
+    session_string = _crear_alumno_con_sesion(client)
+    dynamodb_service.cache.limpiar()
+    antes = dynamodb_service.cache.estadisticas()
+
+    # Primera verificacion: miss y Query; la segunda sale de la cache
+    llamadas.clear()
+    assert client.post("/alumnos/1/session/verify", json={"sessionString": session_string}).status_code == 200
+    assert client.post("/alumnos/1/session/verify", json={"sessionString": session_string}).status_code == 200
+    despues = dynamodb_service.cache.estadisticas()
+    assert llamadas == ["Query"]
+    assert despues["misses"] - antes["misses"] == 1
+    assert despues["hits"] - antes["hits"] == 1
+
+    # El logout reemplaza la entrada: este worker la rechaza sin volver a DynamoDB
+    client.post("/alumnos/1/session/logout", json={"sessionString": session_string})
+    llamadas.clear()
+    assert dynamodb_service.cache.obtener(session_string)["active"] is False
+    assert client.post("/alumnos/1/session/verify", json={"sessionString": session_string}).status_code == 400
+    assert "Query" not in llamadas
+
+def test_otro_worker_deja_de_aceptar_la_sesion_pasada_la_ventana(client, dynamodb, monkeypatch):
+    from services import cache_service
+    from services.dynamodb_service import DynamoDBService
+    from config import SESSION_CACHE_TTL
+
+    reloj = [1000.0]
+    monkeypatch.setattr(cache_service, "time", SimpleNamespace(monotonic=lambda: reloj[0]))
+
+    dynamodb_service, _ = dynamodb
+    session_string = _crear_alumno_con_sesion(client)
+
+    # Otro worker: su propia cache en memoria, ya con la sesion activa
+    otro = DynamoDBService()
+    assert otro.obtener_sesion_activa(session_string) is not None
+
+    client.post("/alumnos/1/session/logout", json={"sessionString": session_string})
+    assert otro.obtener_sesion_activa(session_string) is not None
+
+    reloj[0] += SESSION_CACHE_TTL + 0.001
+    assert otro.obtener_sesion_activa(session_string) is None
+
+def test_esperar_un_indice_que_no_termina_falla_con_timeout(monkeypatch):
+    from services import dynamodb_service as modulo
+
+    reloj = [0.0]
+    esperas = []
+    def dormir(segundos):
+        esperas.append(segundos)
+        reloj[0] += segundos
+    monkeypatch.setattr(modulo.time, "monotonic", lambda: reloj[0])
+    monkeypatch.setattr(modulo.time, "sleep", dormir)
+
+    tabla = {"Table": {"GlobalSecondaryIndexes": [{"IndexName": "alumnoId-index", "IndexStatus": "CREATING"}]}}
+    cliente = SimpleNamespace(describe_table=lambda TableName: tabla)
+    monkeypatch.setattr(modulo.DynamoDBService, "dynamodb", property(lambda self: SimpleNamespace(meta=SimpleNamespace(client=cliente))))
+
+    with pytest.raises(TimeoutError, match="alumnoId-index .* CREATING"):
+        modulo.DynamoDBService()._esperar_indice("alumnoId-index", timeout=200)
+
+    # Backoff con tope y sin pasarse del limite
+    assert esperas == [5, 10, 20, 40, 60, 60, 5]
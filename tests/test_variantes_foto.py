@@ -0,0 +1,65 @@
+import pytest
+
+from app import db, Alumno
+from config import S3_BASE_URL
+from controllers import api_route_alumnos
+
+class S3Falso:
+
+    def __init__(self):
+        self.pendientes = []
+
+    def key_de_url(self, file_url):
+        return file_url[len(S3_BASE_URL) + 1:]
+
+    def confirmar_subida(self, alumno_id, file_key):
+        return f"{S3_BASE_URL}/{file_key}"
+
+    def generar_variantes(self, file_key, al_terminar=None):
+        self.pendientes.append((file_key, al_terminar))
+        return True
+
+    def terminar(self, indice):
+        file_key, al_terminar = self.pendientes[indice]
+        base = file_key.rsplit(".", 1)[0]
+        al_terminar({"thumb": f"{S3_BASE_URL}/{base}_thumb.webp"})
+
+@pytest.fixture
+def s3(client, monkeypatch):
+    db.session.add(Alumno(nombres="Ana", apellidos="Diaz", matricula="A1", promedio=90, password="pw"))
+    db.session.commit()
+
+    falso = S3Falso()
+    monkeypatch.setattr(api_route_alumnos, "s3_service", falso)
+    return falso
+
+def _confirmar(client, key):
+    return client.post("/alumnos/1/fotoPerfil/confirm", json={"key": key})
+
+def test_sin_variantes_hasta_que_el_worker_termina(client, s3):
+    respuesta = _confirmar(client, "alumnos/1/perfil_aaaaaaaa.png")
+
+    assert respuesta.status_code == 200
+    assert respuesta.json["fotoPerfilUrl"] == f"{S3_BASE_URL}/alumnos/1/perfil_aaaaaaaa.png"
+    assert respuesta.json["fotoPerfilVariantes"] is None
+    assert client.get("/alumnos/1").json["fotoPerfilVariantes"] is None
+
+    s3.terminar(0)
+
+    esperado = {"thumb": f"{S3_BASE_URL}/alumnos/1/perfil_aaaaaaaa_thumb.webp"}
+    assert client.get("/alumnos/1").json["fotoPerfilVariantes"] == esperado
+    assert client.get("/alumnos?fields=id,fotoPerfilVariantes").json[0]["fotoPerfilVariantes"] == esperado
+
+def test_variantes_de_una_foto_reemplazada_se_descartan(client, s3):
+    _confirmar(client, "alumnos/1/perfil_aaaaaaaa.png")
+    _confirmar(client, "alumnos/1/perfil_bbbbbbbb.png")
+
+    s3.terminar(0)
+
+    assert client.get("/alumnos/1").json["fotoPerfilVariantes"] is None
+
+    s3.terminar(1)
+
+    assert client.get("/alumnos/1").json["fotoPerfilVariantes"] == {
+        "thumb": f"{S3_BASE_URL}/alumnos/1/perfil_bbbbbbbb_thumb.webp"
+    }
@@ -0,0 +1,63 @@
+from sqlalchemy import event
+
+from app import db, Alumno, versiones
+
+ALUMNO = {"nombres": "Ana", "apellidos": "Diaz", "promedio": 80, "password": "pw"}
+
+def _versiones():
+    return dict(db.session.execute(db.select(Alumno.id, Alumno.version)).all())
+
+def test_cada_escritura_sube_la_version(client):
+    client.post("/alumnos", json={**ALUMNO, "matricula": "A1"})
+    client.post("/alumnos", json={**ALUMNO, "matricula": "A2"})
+    antes = _versiones()
+    assert antes[2] > antes[1]
+
+    # Cambiar la fila mas vieja tambien debe mover max(version) y con ello la ETag del listado
+    etag = client.get("/alumnos").headers["ETag"]
+    assert client.put("/alumnos/1", json={**ALUMNO, "matricula": "A1", "promedio": 90}).status_code == 200
+
+    despues = _versiones()
+    assert despues[1] > antes[2]
+    assert client.get("/alumnos").headers["ETag"] != etag
+
+def test_un_insert_masivo_usa_una_sola_version(client):
+    sentencias = []
+    escuchar = lambda conn, cursor, sentencia, *args: sentencias.append(sentencia)
+    event.listen(db.engine, "before_cursor_execute", escuchar)
+    try:
+        respuesta = client.post("/alumnos/bulk", json=[{**ALUMNO, "matricula": f"A{i}"} for i in range(1, 6)])
+    finally:
+        event.remove(db.engine, "before_cursor_execute", escuchar)
+
+    assert respuesta.status_code == 201
+    assert len(set(_versiones().values())) == 1
+    assert sum("UPDATE versiones" in sentencia for sentencia in sentencias) == 1
+
+def test_el_contador_continua_desde_la_version_mas_alta(client):
+    db.session.add(Alumno(matricula="A1", version=10**15, **ALUMNO))
+    db.session.commit()
+    db.session.execute(db.delete(versiones))
+    db.session.commit()
+
+    client.post("/alumnos", json={**ALUMNO, "matricula": "A2"})
+
+    assert _versiones()[2] > 10**15
+
+def test_dos_primeras_escrituras_concurrentes_no_fallan(client):
+    db.session.execute(db.delete(versiones))
+    db.session.commit()
+
+    def crear_contador_antes(conn, cursor, sentencia, *args):
+        # Otra escritura inserta la fila del contador entre nuestro UPDATE vacio y nuestro INSERT
+        if "max(alumnos.version)" in sentencia:
+            cursor.execute("INSERT INTO versiones (tabla, valor) VALUES ('alumnos', 5)")
+
+    event.listen(db.engine, "before_cursor_execute", crear_contador_antes)
+    try:
+        respuesta = client.post("/alumnos", json={**ALUMNO, "matricula": "A1"})
+    finally:
+        event.remove(db.engine, "before_cursor_execute", crear_contador_antes)
+
+    assert respuesta.status_code == 201
+    assert _versiones() == {1: 6}
@@ -0,0 +1,147 @@
+# ===== VALIDACION DECLARATIVA DE PAYLOADS =====
+# Cada modelo declara su esquema una vez; al importarse se compila en una tupla
+# de (campo, validador, mensaje) que se recorre sin buscar nada por nombre.
+
+def validar_id(id):
+    try:
+        id = int(id)
+        if id > 0:
+            return id
+        return None
+    except (ValueError, TypeError):
+        return None
+
+def validar_matricula(matricula):
+    if not isinstance(matricula, str):
+        return None
+    matricula = matricula.strip()
+    # "A" seguida de digitos; str.isdigit acepta los mismos digitos Unicode que antes
+    if matricula[:1] != 'A' or not matricula[1:].isdigit():
+        return None
+    return matricula
+
+def validar_nombre(nombre):
+    if not isinstance(nombre, str):
+        return None
+    nombre = nombre.strip()
+    if not nombre:
+        return None
+    # Sin los simbolos permitidos solo deben quedar letras (o nada, p. ej. "-").
+    # replace + isalpha corren en C; str.translate con tabla resulta mas lento aqui
+    letras = nombre.replace(" ", "").replace("-", "").replace("'", "")
+    if letras and not letras.isalpha():
+        return None
+    return nombre
+
+def validar_promedio(promedio):
+    try:
+        promedio = float(promedio)
+        if 0 <= promedio <= 100:
+            return promedio
+        return None
+    except (ValueError, TypeError):
+        return None
+
+def validar_horas(horas):
+    try:
+        horas = int(horas)
+        if horas > 0:
+            return horas
+        return None
+    except (ValueError, TypeError):
+        return None
+
+def validar_password(password):
+    if isinstance(password, str):
+        return password
+    return None
+
+class Campo:
+
+    # mensaje=None: un valor invalido se descarta sin reportar error
+
+    def __init__(self, validador, mensaje=None):
+
+        self.validador = validador
+        self.mensaje = mensaje
+
+class Esquema:
+
+    def __init__(self, **campos):
+
+        self.campos = tuple(campos)
+        self._compilado = tuple((nombre, campo.validador, campo.mensaje) for nombre, campo in campos.items())
+
+    def validar(self, payload):
+
+        # Devuelve (datos normalizados, errores) solo con los campos presentes
+        datos = {}
+        errores = {}
+
+        for nombre, validador, mensaje in self._compilado:
+            if nombre in payload:
+                valor = validador(payload[nombre])
+                if valor is not None:
+                    datos[nombre] = valor
+                elif mensaje is not None:
+                    errores[nombre] = mensaje
+
+        return datos, errores
+
+    def errores(self, payload):
+
+        return self.validar(payload)[1]
+
+    def validar_lote(self, registros, campos):
+
+        # registros: iterable de (indice, dict). Devuelve filas listas para INSERT con
+        # todas las columnas de campos, sus indices y los errores por registro
+        # La fila se arma directo sobre una plantilla con todas las columnas en None
+        compilado = tuple((nombre, validador, mensaje, nombre in campos) for nombre, validador, mensaje in self._compilado)
+        plantilla = dict.fromkeys(campos)
+        filas = []
+        indices = []
+        errores = []
+
+        for indice, registro in registros:
+            if not isinstance(registro, dict):
+                errores.append({"index": indice, "errors": {"registro": "Se esperaba un objeto JSON."}})
+                continue
+
+            fila = plantilla.copy()
+            errores_registro = None
+
+            for nombre, validador, mensaje, en_fila in compilado:
+                if nombre in registro:
+                    valor = validador(registro[nombre])
+                    if valor is not None:
+                        if en_fila:
+                            fila[nombre] = valor
+                    elif mensaje is not None:
+                        if errores_registro is None:
+                            errores_registro = {}
+                        errores_registro[nombre] = mensaje
+
+            if errores_registro:
+                errores.append({"index": indice, "errors": errores_registro})
+                continue
+
+            filas.append(fila)
+            indices.append(indice)
+
+        return filas, indices, errores
+
+ESQUEMA_ALUMNO = Esquema(
+    nombres=Campo(validar_nombre, "Nombre inválido."),
+    apellidos=Campo(validar_nombre, "Apellido inválido."),
+    matricula=Campo(validar_matricula, "Matrícula inválida."),
+    promedio=Campo(validar_promedio, "Promedio inválido."),
+    password=Campo(validar_password)
+)
+
+ESQUEMA_PROFESOR = Esquema(
+    nombres=Campo(validar_nombre, "Nombre inválido."),
+    apellidos=Campo(validar_nombre, "Apellido inválido."),
+    numeroEmpleado=Campo(validar_id, "Número de empleado inválido."),
+    horasClase=Campo(validar_horas, "Horas de clase inválidas.")
+)
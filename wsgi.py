@@ -0,0 +1,3 @@
+# Punto de entrada WSGI de produccion: gunicorn -c gunicorn.conf.py wsgi:app
+# Reutiliza api_rest, asi el servidor carga los mismos modulos de app y controladores.
+from api_rest import app